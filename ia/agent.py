@@ -24,6 +24,8 @@ from sentence_transformers import SentenceTransformer
 from openai import OpenAI
 import anthropic
 
+from ia.files_to_csv import LectorFuentes
+
 load_dotenv()
 
 MODEL_CONFIG = {
@@ -61,6 +63,8 @@ class DocumentationSystemV4:
         self.faiss_index = None
         self.redis_client = None
         self.mapeo_indices = None
+        # Snapshot de fuentes: código de los chunks que no lo guardan en Redis
+        self.fuentes = None
         self.conversation_history = []
         
         self.embedding_dim = 384
@@ -135,9 +139,19 @@ class DocumentationSystemV4:
                     self.mapeo_indices = json.load(f)
                 print(f"✅ Mapeo: {len(self.mapeo_indices)} entradas")
             
+            self.fuentes = LectorFuentes.abrir_si_existe()
+            if self.fuentes is not None:
+                print(f"✅ Snapshot de fuentes: {len(self.fuentes.archivos)} archivos")
+            
         except Exception as e:
             print(f"⚠️ Error: {e}")
     
+    def _contenido_chunk(self, data: Dict) -> str:
+        """Código del chunk: 'contenido' o, si no lo guarda, leído del snapshot de fuentes"""
+        if 'contenido' in data or self.fuentes is None:
+            return data.get('contenido', '')
+        return self.fuentes.codigo_de(data, limite=2000)
+    
     def _cargar_cache_completo(self):
         """Carga todos los datos en memoria"""
         if not self.redis_client or not self.mapeo_indices:
@@ -178,7 +192,7 @@ class DocumentationSystemV4:
                                 'router_padre': data.get('router_padre', ''),
                                 'response_model': data.get('response_model', ''),
                                 'status_code': data.get('status_code', ''),
-                                'codigo': data.get('contenido', '')[:500]
+                                'codigo': self._contenido_chunk(data)[:500]
                             }
                             self.cache_endpoints.append(endpoint_info)
                     
@@ -349,7 +363,7 @@ También puedo generar documentación profesional si lo necesitas. ¡Pregunta lo
                         'elemento': chunk_data.get('elemento', ''),
                         'endpoint': endpoint_final,
                         'metodo_http': chunk_data.get('metodo_http', ''),
-                        'contenido': chunk_data.get('contenido', ''),
+                        'contenido': self._contenido_chunk(chunk_data),
                         'descripcion': chunk_data.get('descripcion', ''),
                         'router_padre': chunk_data.get('router_padre', '')
                     }
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+API del analyzer como librería
+Recorre un proyecto y entrega sus registros archivo a archivo con un
+generador, sin escribir nada por consola ni en datasets/: para integrar el
+analyzer en otros servicios y pasar los registros directamente a la etapa
+de embeddings sin tocar disco. Son los mismos registros (y en el mismo
+orden) que genera python -m ia.files_to_csv.
+
+Uso:
+    from ia.api_analisis import iterar_registros, OpcionesAnalisis
+
+    for registro in iterar_registros("ruta/al/proyecto"):
+        print(registro.categoria, registro.elemento)
+
+    opciones = OpcionesAnalisis(workers=4, extractores=['endpoints', 'clases'])
+    endpoints = [r for r in iterar_registros("ruta/al/proyecto", opciones) if r.categoria == 'ENDPOINT']
+"""
+
+import os
+from typing import List, Optional, Iterator
+
+from ia.files_to_csv import (
+    EnhancedEndpointAnalyzer, LimitesArchivo, Registro, ReportadorProgreso, NIVEL_SILENCIOSO
+)
+
+
+class OpcionesAnalisis:
+    """
+    Opciones de iterar_registros (las mismas que en línea de comandos):
+    workers (--workers), limites (--limite-*, ver LimitesArchivo),
+    extractores (--extractores) y montajes: con False no se resuelven los
+    prefixes con los que otros archivos montan cada router.
+    """
+
+    def __init__(self, workers: int = 1, limites: Optional[LimitesArchivo] = None,
+                 extractores: Optional[List[str]] = None, montajes: bool = True, usar_mmap: bool = True):
+        self.workers = workers
+        self.limites = limites
+        self.extractores = extractores
+        self.montajes = montajes
+        self.usar_mmap = usar_mmap
+
+
+def crear_analyzer(raiz: str, opciones: Optional[OpcionesAnalisis] = None) -> EnhancedEndpointAnalyzer:
+    """
+    Analyzer silencioso para raiz. Sirve para consultar sus estadísticas
+    (analyzer.estadisticas) después de recorrer analyzer.iterar_proyecto()
+    """
+    if not os.path.isdir(raiz):
+        raise NotADirectoryError(f"No existe el proyecto a analizar: {raiz}")
+    opciones = opciones or OpcionesAnalisis()
+    return EnhancedEndpointAnalyzer(
+        raiz, usar_mmap=opciones.usar_mmap, limites=opciones.limites,
+        extractores=opciones.extractores,
+        progreso=ReportadorProgreso(NIVEL_SILENCIOSO)
+    )
+
+
+def iterar_registros(raiz: str, opciones: Optional[OpcionesAnalisis] = None) -> Iterator[Registro]:
+    """
+    Registros del proyecto en raiz, generados a medida que se analiza cada
+    archivo (no se acumulan en memoria). Los errores de un archivo no cortan
+    el recorrido: ese archivo no genera registros.
+    """
+    opciones = opciones or OpcionesAnalisis()
+    analyzer = crear_analyzer(raiz, opciones)
+    return analyzer.iterar_proyecto(workers=opciones.workers, montajes=opciones.montajes)
+
+
+# Nombre en inglés para quien integra el analyzer desde otros servicios
+iter_records = iterar_registros
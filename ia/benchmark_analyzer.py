@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de regresión para EnhancedEndpointAnalyzer
+Genera módulos sintéticos en memoria y mide los extractores del analyzer
+
+Uso:
+    python -m ia.benchmark_analyzer
+    python -m ia.benchmark_analyzer --funciones 5000 --repeticiones 5
+    python -m ia.benchmark_analyzer --endpoints 20000
+    python -m ia.benchmark_analyzer --proyecto --archivos 300 --guardar-base
+    python -m ia.benchmark_analyzer --proyecto --archivos 300 --tolerancia 0.15
+"""
+
+import argparse
+import ast
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ia.files_to_csv import (
+    EnhancedEndpointAnalyzer,
+    EscritorRegistros,
+    NIVEL_SILENCIOSO,
+    PATRON_ENDPOINT,
+    ReportadorProgreso,
+    VERSION_ANALYZER,
+)
+
+# Tiempo(N) / Tiempo(N / FACTOR_ESCALA) por encima de este límite indica
+# un comportamiento cuadrático (lo esperado en un algoritmo lineal es ~10)
+FACTOR_ESCALA = 10
+LIMITE_RATIO_ESCALA = 25.0
+
+# Base de referencia del benchmark de proyecto sintético. Guarda ratios
+# frente a una calibración medida en el mismo proceso (no archivos/s ni MB
+# absolutos), así que sirve en máquinas distintas a la que la generó
+ARCHIVO_BASE_PROYECTO = "datasets/benchmark_base.json"
+# Empeoramiento relativo de los ratios tolerado frente a la base
+TOLERANCIA_BASE = 0.20
+# Ratios que se guardan en la base y se comparan (menor es mejor)
+METRICAS_BASE = ('ratio_tiempo', 'ratio_rss')
+
+# Patrones que extraer_endpoints_completos probaba uno a uno en cada
+# decorador antes de PATRON_ENDPOINT (referencia para comparar)
+PATRONES_ENDPOINT_LEGADO = [
+    r'@(\w+)\.(get|post|put|delete|patch|options|head|trace)\s*\(\s*["\']([^"\']+)["\']',
+    r'@(\w+)\.(get|post|put|delete|patch|options|head|trace)\s*\(\s*["\']([^"\'{}]+(?:\{[^}]+\})*[^"\']*)["\']',
+    r'@(\w+)\.route\s*\(\s*["\']([^"\']+)["\'][^)]*methods\s*=\s*\[\"([^\"]+)\"',
+]
+
+
+def generar_modulo_sintetico(num_funciones: int, metodos_por_clase: int = 10) -> str:
+    """
+    Genera un módulo con num_funciones funciones: la mitad sueltas
+    (helpers) y la otra mitad como métodos repartidos en clases
+    """
+    lineas = ['import os', 'from typing import Optional', '']
+    num_helpers = num_funciones // 2
+    num_metodos = num_funciones - num_helpers
+
+    for i in range(num_helpers):
+        lineas += [
+            f'def helper_{i}(valor: int, nombre: Optional[str] = None) -> int:',
+            f'    """Helper sintético {i}"""',
+            '    if valor > 0 and nombre:',
+            '        return valor',
+            '    return 0',
+            ''
+        ]
+
+    for c in range(0, num_metodos, metodos_por_clase):
+        lineas.append(f'class Servicio{c}:')
+        for m in range(c, min(c + metodos_por_clase, num_metodos)):
+            lineas += [
+                f'    def metodo_{m}(self, valor: int) -> int:',
+                '        for _ in range(valor):',
+                '            pass',
+                '        return valor',
+                ''
+            ]
+
+    return '\n'.join(lineas)
+
+
+def medir_extraer_funciones(num_funciones: int, repeticiones: int = 3) -> float:
+    """Mejor tiempo (segundos) de extraer_funciones_avanzado sobre el módulo sintético"""
+    contenido = generar_modulo_sintetico(num_funciones)
+    analyzer = EnhancedEndpointAnalyzer(progreso=ReportadorProgreso(NIVEL_SILENCIOSO))
+    mejor = float('inf')
+
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            analisis = analyzer.analizar_ast(contenido)
+            funciones = analyzer.extraer_funciones_avanzado(contenido, 'util', analisis)
+        mejor = min(mejor, time.perf_counter() - inicio)
+
+    esperadas = num_funciones // 2
+    if len(funciones) != esperadas:
+        raise AssertionError(f"Se esperaban {esperadas} funciones, se obtuvieron {len(funciones)}")
+
+    return mejor
+
+
+def generar_modulo_endpoints(num_endpoints: int) -> str:
+    """
+    Genera un módulo denso en decoradores: cada endpoint lleva además un
+    decorador que no es de endpoint, y uno de cada cuatro es Flask
+    """
+    lineas = ['from fastapi import APIRouter, Depends', '', 'router = APIRouter(prefix="/api")', '']
+    metodos = ['get', 'post', 'put', 'delete']
+
+    for i in range(num_endpoints):
+        if i % 4 == 3:
+            decorador = f'@app.route("/flask/{i}", methods=["GET"])'
+        else:
+            decorador = f'@router.{metodos[i % 4]}("/items/{i}/{{item_id}}", response_model=Item{i})'
+        lineas += [
+            '@requiere_permiso("admin")',
+            decorador,
+            f'async def endpoint_{i}(item_id: int, q: str = None):',
+            f'    return {{"id": item_id, "n": {i}}}',
+            ''
+        ]
+
+    return '\n'.join(lineas)
+
+
+def _coincidencias_legado(lineas: List[str]) -> int:
+    encontrados = 0
+    for linea in lineas:
+        for patron in PATRONES_ENDPOINT_LEGADO:
+            if re.search(patron, linea, re.IGNORECASE):
+                encontrados += 1
+                break
+    return encontrados
+
+
+def _coincidencias_compilado(lineas: List[str]) -> int:
+    return sum(1 for linea in lineas if PATRON_ENDPOINT.search(linea))
+
+
+def benchmark_patron_endpoints(num_endpoints: int = 20000, repeticiones: int = 3) -> Dict[str, float]:
+    """
+    Líneas de decorador por segundo: patrones separados sin compilar frente a
+    PATRON_ENDPOINT, y extraer_endpoints_completos sobre el módulo completo
+    """
+    contenido = generar_modulo_endpoints(num_endpoints)
+    decoradores = [l.strip() for l in contenido.split('\n') if l.lstrip().startswith('@')]
+    lineas_totales = contenido.count('\n') + 1
+
+    resultados = {'endpoints': num_endpoints, 'lineas_decorador': len(decoradores)}
+    for clave, contar in (('legado', _coincidencias_legado), ('compilado', _coincidencias_compilado)):
+        mejor = float('inf')
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            encontrados = contar(decoradores)
+            mejor = min(mejor, time.perf_counter() - inicio)
+        if encontrados != num_endpoints:
+            raise AssertionError(f"{clave}: se esperaban {num_endpoints} endpoints, se obtuvieron {encontrados}")
+        resultados[f'lineas_por_segundo_{clave}'] = len(decoradores) / mejor if mejor else 0.0
+
+    analyzer = EnhancedEndpointAnalyzer(progreso=ReportadorProgreso(NIVEL_SILENCIOSO))
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Como en procesar_archivo: AST parseado una vez y extracción sobre él
+            endpoints = analyzer.extraer_endpoints_completos(contenido, 'endpoints.py',
+                                                             analisis=analyzer.analizar_ast(contenido))
+        mejor = min(mejor, time.perf_counter() - inicio)
+    if len(endpoints) != num_endpoints:
+        raise AssertionError(f"Se esperaban {num_endpoints} endpoints, se obtuvieron {len(endpoints)}")
+    resultados['lineas_por_segundo_extraccion'] = lineas_totales / mejor if mejor else 0.0
+
+    return resultados
+
+
+def benchmark_deteccion_metodos(num_funciones: int = 5000, repeticiones: int = 3) -> Dict[str, float]:
+    """
+    Benchmark de regresión de la detección de métodos en extraer_funciones_avanzado.
+    Compara N contra N / FACTOR_ESCALA funciones para que el resultado no
+    dependa de la velocidad de la máquina.
+    """
+    tiempo_base = medir_extraer_funciones(num_funciones // FACTOR_ESCALA, repeticiones)
+    tiempo_total = medir_extraer_funciones(num_funciones, repeticiones)
+
+    return {
+        'funciones': num_funciones,
+        'segundos': tiempo_total,
+        'funciones_por_segundo': num_funciones / tiempo_total if tiempo_total else 0.0,
+        'ratio_escala': tiempo_total / tiempo_base if tiempo_base else 0.0
+    }
+
+
+# ==========================================
+# 🏗️  PROYECTO SINTÉTICO
+# ==========================================
+
+def generar_proyecto_sintetico(destino: str, archivos: int = 200, routers: int = 20,
+                               endpoints_por_router: int = 10, modelos: int = 400,
+                               helpers: int = 800) -> Dict[str, int]:
+    """
+    Genera un proyecto FastAPI en destino/app:
+    - main.py que monta todos los routers con include_router
+    - routers/router_{r}.py con endpoints_por_router endpoints cada uno
+    - schemas/schemas_{i}.py y services/servicio_{i}.py (archivos módulos en
+      total) con los modelos Pydantic y los helpers repartidos entre ellos
+    """
+    app = Path(destino) / 'app'
+    for carpeta in ('routers', 'schemas', 'services'):
+        (app / carpeta).mkdir(parents=True, exist_ok=True)
+        (app / carpeta / '__init__.py').write_text('', encoding='utf-8')
+    (app / '__init__.py').write_text('', encoding='utf-8')
+
+    modulos_schemas = max(1, archivos // 2)
+    modulos_servicios = max(1, archivos - modulos_schemas)
+    metodos = ['get', 'post', 'put', 'delete', 'patch']
+
+    # Modelos Pydantic
+    contenidos = {i: ['from typing import List, Optional', 'from pydantic import BaseModel', '']
+                  for i in range(modulos_schemas)}
+    for m in range(modelos):
+        contenidos[m % modulos_schemas] += [
+            f'class Modelo{m}(BaseModel):',
+            f'    """Modelo sintético {m}"""',
+            '    id: int',
+            '    nombre: str',
+            '    etiquetas: List[str] = []',
+            '    descripcion: Optional[str] = None',
+            ''
+        ]
+    for i, lineas in contenidos.items():
+        (app / 'schemas' / f'schemas_{i}.py').write_text('\n'.join(lineas), encoding='utf-8')
+
+    # Helpers
+    contenidos = {i: ['import os', 'from typing import Dict, Optional', '',
+                      'LIMITE = int(os.getenv("LIMITE", "10"))', '']
+                  for i in range(modulos_servicios)}
+    for h in range(helpers):
+        contenidos[h % modulos_servicios] += [
+            f'def helper_{h}(valor: int, opciones: Optional[Dict] = None) -> int:',
+            f'    """Helper sintético {h}"""',
+            '    total = 0',
+            '    for i in range(valor):',
+            '        if i % 2 and opciones:',
+            '            total += i',
+            '    return min(total, LIMITE)',
+            ''
+        ]
+    for i, lineas in contenidos.items():
+        (app / 'services' / f'servicio_{i}.py').write_text('\n'.join(lineas), encoding='utf-8')
+
+    # Routers
+    for r in range(routers):
+        modelo = f'Modelo{r % modelos}' if modelos else 'dict'
+        lineas = [
+            'from fastapi import APIRouter, Depends, Query, status',
+            f'from app.schemas.schemas_{(r % modelos) % modulos_schemas if modelos else 0} import *',
+            '',
+            f'router = APIRouter(prefix="/recurso{r}", tags=["recurso{r}"])',
+            '',
+            'def get_db():',
+            '    yield None',
+            ''
+        ]
+        for e in range(endpoints_por_router):
+            metodo = metodos[e % len(metodos)]
+            lineas += [
+                f'@router.{metodo}(',
+                f'    "/items{e}/{{item_id}}",',
+                f'    response_model={modelo},',
+                '    status_code=status.HTTP_200_OK,',
+                f'    summary="Endpoint {e} del recurso {r}",',
+                ')',
+                f'async def {metodo}_item_{e}(',
+                '    item_id: int,',
+                '    q: Optional[str] = Query(None),',
+                '    db=Depends(get_db),',
+                '):',
+                f'    """Endpoint sintético {e}"""',
+                '    if q:',
+                '        return {"id": item_id, "q": q}',
+                '    return {"id": item_id}',
+                ''
+            ]
+        (app / 'routers' / f'router_{r}.py').write_text('\n'.join(lineas), encoding='utf-8')
+
+    lineas = ['from fastapi import FastAPI', '']
+    lineas += [f'from app.routers import router_{r}' for r in range(routers)]
+    lineas += ['', 'app = FastAPI(title="Sintético")', '']
+    lineas += [f'app.include_router(router_{r}.router, prefix="/api/v1")' for r in range(routers)]
+    (app / 'main.py').write_text('\n'.join(lineas) + '\n', encoding='utf-8')
+
+    return {
+        'archivos': archivos,
+        'routers': routers,
+        'endpoints_por_router': endpoints_por_router,
+        'modelos': modelos,
+        'helpers': helpers
+    }
+
+
+def _pico_rss_mb() -> float:
+    """Pico de memoria residente de este proceso (ru_maxrss: KB en Linux, bytes en macOS)"""
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def _calibrar(ruta_proyecto: str) -> float:
+    """
+    Trabajo de referencia sobre los mismos archivos sin pasar por el
+    analyzer (lectura, ast.parse y tokenizado con re): mide la velocidad de
+    la máquina para normalizar el tiempo del escaneo
+    """
+    inicio = time.perf_counter()
+    for archivo in sorted(Path(ruta_proyecto).rglob('*.py')):
+        contenido = archivo.read_text(encoding='utf-8')
+        ast.parse(contenido)
+        re.findall(r'\w+|[^\w\s]', contenido)
+    return time.perf_counter() - inicio
+
+
+def _escanear_proyecto_medido(ruta_proyecto: str, workers: int) -> Dict[str, float]:
+    """
+    Escanea el proyecto como `files_to_csv --sin-cache` (sin cache y con
+    salida en streaming) y mide tiempo y pico de RSS. Corre en un proceso
+    nuevo para que el pico no arrastre memoria de mediciones anteriores;
+    la calibración se mide en ese mismo proceso justo antes del escaneo.
+    """
+    # Rutas relativas: la carpeta temporal (p.ej. /tmp) está en CARPETAS_EXCLUIR
+    os.chdir(ruta_proyecto)
+    analyzer = EnhancedEndpointAnalyzer('.', progreso=ReportadorProgreso(NIVEL_SILENCIOSO))
+    rss_inicial_mb = _pico_rss_mb()
+    segundos_calibracion = _calibrar('.')
+    salida = tempfile.mkdtemp(prefix='salida_benchmark_')
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            sink = EscritorRegistros(os.path.join(salida, 'documentacion.csv'),
+                                     os.path.join(salida, 'analisis.json')).abrir()
+            analyzer.escanear_proyecto(workers=workers, sink=sink)
+            sink.cerrar(analyzer.estadisticas_serializables(), analyzer.metadatos_salida(sink.total))
+            segundos = time.perf_counter() - inicio
+    finally:
+        shutil.rmtree(salida, ignore_errors=True)
+
+    pico_rss_mb = _pico_rss_mb()
+    return {
+        'segundos': segundos,
+        'archivos': analyzer.estadisticas['archivos_procesados'],
+        'registros': sink.total,
+        'pico_rss_mb': pico_rss_mb,
+        'ratio_tiempo': segundos / segundos_calibracion,
+        'ratio_rss': pico_rss_mb / rss_inicial_mb
+    }
+
+
+def benchmark_proyecto(config: Dict[str, int], repeticiones: int = 3, workers: int = 1) -> Dict[str, Any]:
+    """
+    Genera el proyecto sintético y mide el escaneo completo: archivos/s y
+    registros/s de la mejor repetición, el mayor pico de RSS y los ratios
+    frente a la calibración (el menor de las repeticiones)
+    """
+    carpeta = tempfile.mkdtemp(prefix='proyecto_benchmark_')
+    contexto = multiprocessing.get_context('spawn')
+    try:
+        generar_proyecto_sintetico(carpeta, **config)
+        mediciones = []
+        for _ in range(repeticiones):
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                mediciones.append(executor.submit(_escanear_proyecto_medido, carpeta, workers).result())
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    mejor = min(mediciones, key=lambda m: m['segundos'])
+    return {
+        'config': dict(config, workers=workers),
+        'version_analyzer': VERSION_ANALYZER,
+        'fecha': datetime.now().isoformat(),
+        'segundos': round(mejor['segundos'], 4),
+        'archivos': mejor['archivos'],
+        'registros': mejor['registros'],
+        'archivos_por_segundo': round(mejor['archivos'] / mejor['segundos'], 2),
+        'registros_por_segundo': round(mejor['registros'] / mejor['segundos'], 2),
+        'pico_rss_mb': round(max(m['pico_rss_mb'] for m in mediciones), 2),
+        'ratio_tiempo': round(min(m['ratio_tiempo'] for m in mediciones), 3),
+        'ratio_rss': round(min(m['ratio_rss'] for m in mediciones), 3)
+    }
+
+
+def base_desde_resultado(resultado: Dict[str, Any]) -> Dict[str, Any]:
+    """Lo que se guarda como base: configuración, registros y ratios (sin valores absolutos)"""
+    base = {clave: resultado[clave] for clave in ('config', 'version_analyzer', 'fecha', 'registros')}
+    base.update({metrica: resultado[metrica] for metrica in METRICAS_BASE})
+    return base
+
+
+def comparar_con_base(resultado: Dict[str, Any], base: Dict[str, Any],
+                      tolerancia: float = TOLERANCIA_BASE) -> List[str]:
+    """Regresiones de los ratios frente a la base (lista vacía = sin regresión)"""
+    regresiones = []
+    for metrica in METRICAS_BASE:
+        if resultado[metrica] > base[metrica] * (1 + tolerancia):
+            regresiones.append(f"{metrica}: {resultado[metrica]:.3f} > {base[metrica]:.3f} "
+                               f"(+{(resultado[metrica] / base[metrica] - 1) * 100:.1f}%)")
+    return regresiones
+
+
+def cargar_base(ruta: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def ejecutar_benchmark_proyecto(args: argparse.Namespace) -> int:
+    """Benchmark de proyecto sintético contra la base guardada"""
+    config = {
+        'archivos': args.archivos,
+        'routers': args.routers,
+        'endpoints_por_router': args.endpoints_por_router,
+        'modelos': args.modelos,
+        'helpers': args.helpers
+    }
+
+    print("=" * 80)
+    print("⏱️  BENCHMARK: proyecto FastAPI sintético (escaneo completo)")
+    print("=" * 80)
+    print("   " + ", ".join(f"{k}={v}" for k, v in config.items()) + f", workers={args.workers}")
+
+    resultado = benchmark_proyecto(config, args.repeticiones, args.workers)
+
+    print(f"\n   Archivos:            {resultado['archivos']}")
+    print(f"   Registros:           {resultado['registros']}")
+    print(f"   Tiempo:              {resultado['segundos']:.3f} s")
+    print(f"   Archivos/segundo:    {resultado['archivos_por_segundo']:.1f}")
+    print(f"   Registros/segundo:   {resultado['registros_por_segundo']:.1f}")
+    print(f"   Pico RSS:            {resultado['pico_rss_mb']:.1f} MB")
+    print(f"   Ratio tiempo:        {resultado['ratio_tiempo']:.3f} (escaneo / calibración)")
+    print(f"   Ratio RSS:           {resultado['ratio_rss']:.3f} (pico / proceso recién arrancado)")
+
+    ruta_base = args.base or ARCHIVO_BASE_PROYECTO
+    if args.guardar_base:
+        os.makedirs(os.path.dirname(ruta_base) or '.', exist_ok=True)
+        with open(ruta_base, 'w', encoding='utf-8') as f:
+            json.dump(base_desde_resultado(resultado), f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Base guardada en {ruta_base}")
+        return 0
+
+    base = cargar_base(ruta_base)
+    if base is None:
+        if args.base is not None:
+            # Base pedida explícitamente (p.ej. en CI): sin ella no hay comparación
+            print(f"\n❌ No se puede leer la base {ruta_base}")
+            return 1
+        print(f"\n⚠️  No hay base en {ruta_base}: guárdala con --guardar-base")
+        return 0
+    if any(metrica not in base for metrica in METRICAS_BASE):
+        print(f"\n⚠️  La base {ruta_base} no tiene ratios de calibración: regénerala con --guardar-base")
+        return 1 if args.base is not None else 0
+    if base.get('config') != resultado['config']:
+        print(f"\n⚠️  La base se midió con otra configuración ({base.get('config')}), no se compara")
+        return 0
+
+    print(f"\n📏 Base: ratio tiempo {base['ratio_tiempo']:.3f}, ratio RSS {base['ratio_rss']:.3f} "
+          f"(v{base.get('version_analyzer', '?')}, {base.get('fecha', '?')[:10]})")
+    if base.get('registros') != resultado['registros']:
+        print(f"⚠️  El número de registros cambió: {base.get('registros')} -> {resultado['registros']}")
+
+    regresiones = comparar_con_base(resultado, base, args.tolerancia)
+    if regresiones:
+        print(f"❌ REGRESIÓN (tolerancia {args.tolerancia:.0%}):")
+        for regresion in regresiones:
+            print(f"   • {regresion}")
+        return 1
+
+    print(f"✅ Sin regresiones frente a la base (tolerancia {args.tolerancia:.0%})")
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Benchmarks de EnhancedEndpointAnalyzer")
+    parser.add_argument('--funciones', type=int, default=5000,
+                        help="Número de funciones del módulo sintético")
+    parser.add_argument('--endpoints', type=int, default=20000,
+                        help="Número de endpoints del módulo denso en decoradores")
+    parser.add_argument('--repeticiones', type=int, default=3,
+                        help="Repeticiones por medición (se toma la mejor)")
+
+    proyecto = parser.add_argument_group("proyecto sintético")
+    proyecto.add_argument('--proyecto', action='store_true',
+                          help="Ejecuta el benchmark de proyecto sintético en lugar de los micro-benchmarks")
+    proyecto.add_argument('--archivos', type=int, default=200,
+                          help="Módulos de schemas y servicios (además de routers y main.py)")
+    proyecto.add_argument('--routers', type=int, default=20)
+    proyecto.add_argument('--endpoints-por-router', type=int, default=10)
+    proyecto.add_argument('--modelos', type=int, default=400, help="Modelos Pydantic")
+    proyecto.add_argument('--helpers', type=int, default=800, help="Funciones helper")
+    proyecto.add_argument('--workers', type=int, default=1, help="Workers del escaneo")
+    proyecto.add_argument('--base', default=None,
+                          help=f"JSON de la base de referencia (por defecto {ARCHIVO_BASE_PROYECTO}; "
+                               "si se indica y no existe, es un error)")
+    proyecto.add_argument('--guardar-base', action='store_true',
+                          help="Guarda el resultado como nueva base en lugar de comparar")
+    proyecto.add_argument('--tolerancia', type=float, default=TOLERANCIA_BASE,
+                          help="Empeoramiento relativo permitido de los ratios frente a la base")
+    args = parser.parse_args(argv)
+
+    if args.proyecto:
+        return ejecutar_benchmark_proyecto(args)
+
+    print("=" * 80)
+    print("⏱️  BENCHMARK: detección de métodos (extraer_funciones_avanzado)")
+    print("=" * 80)
+
+    resultado = benchmark_deteccion_metodos(args.funciones, args.repeticiones)
+
+    print(f"   Funciones:          {resultado['funciones']}")
+    print(f"   Tiempo:             {resultado['segundos']:.3f} s")
+    print(f"   Funciones/segundo:  {resultado['funciones_por_segundo']:.0f}")
+    print(f"   Ratio de escala x{FACTOR_ESCALA}: {resultado['ratio_escala']:.1f} "
+          f"(límite {LIMITE_RATIO_ESCALA})")
+
+    if resultado['ratio_escala'] > LIMITE_RATIO_ESCALA:
+        print("❌ REGRESIÓN: el coste crece más que linealmente con el número de funciones")
+        return 1
+
+    print("✅ Escalado lineal")
+
+    print("\n" + "=" * 80)
+    print("⏱️  BENCHMARK: decoradores de endpoint (extraer_endpoints_completos)")
+    print("=" * 80)
+
+    resultado = benchmark_patron_endpoints(args.endpoints, args.repeticiones)
+
+    print(f"   Endpoints:                    {resultado['endpoints']}")
+    print(f"   Líneas de decorador:          {resultado['lineas_decorador']}")
+    print(f"   Líneas/s patrones separados:  {resultado['lineas_por_segundo_legado']:.0f}")
+    print(f"   Líneas/s PATRON_ENDPOINT:     {resultado['lineas_por_segundo_compilado']:.0f}")
+    print(f"   Líneas/s extracción completa: {resultado['lineas_por_segundo_extraccion']:.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,15 +16,34 @@ from sklearn.preprocessing import StandardScaler
 import faiss
 import redis
 import json
+import hashlib
 import logging
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
+
+from ia.files_to_csv import LectorFuentes, ARCHIVO_SNAPSHOT_FUENTES, ARCHIVO_INDICE_FUENTES
+
+# pyarrow es opcional: sin él se lee siempre el CSV
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
 
 
 class ConfigEmbeddingsV3:
     """Configuración unificada"""
     BASE_PATH = Path("datasets")
     INPUT_CSV = BASE_PATH / "documentacion.csv"
+    # Salida de `files_to_csv --parquet`: se prefiere al CSV si existe
+    INPUT_PARQUET = BASE_PATH / "documentacion.parquet"
+    # Salida de `files_to_csv --snapshot-fuentes`: el código de los registros
+    # sin codigo_limpio se lee de aquí con su índice
+    INPUT_SNAPSHOT = Path(ARCHIVO_SNAPSHOT_FUENTES)
+    INPUT_INDICE_FUENTES = Path(ARCHIVO_INDICE_FUENTES)
+    # Caracteres de código que se usan por registro
+    LIMITE_CODIGO = 2000
     OUTPUT_PATH = BASE_PATH / "embeddings"
+    # Vectores de texto de la ejecución anterior, por clave de símbolo
+    CACHE_EMBEDDINGS = OUTPUT_PATH / "cache_simbolos.npz"
     
     MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
     EMBEDDING_DIM = 384
@@ -43,8 +62,9 @@ class GeneradorTextoBusquedaV3Fixed:
     Genera texto
     """
     
-    def __init__(self):
+    def __init__(self, fuentes: Optional[LectorFuentes] = None):
         self.logger = logging.getLogger(__name__)
+        self.fuentes = fuentes
     
     def _limpiar_texto(self, texto):
         if pd.isna(texto) or texto is None or texto == '':
@@ -59,6 +79,13 @@ class GeneradorTextoBusquedaV3Fixed:
         except:
             return default
     
+    def _codigo(self, row: pd.Series) -> str:
+        """codigo_limpio, o el código leído del snapshot de fuentes si el registro lo omite"""
+        codigo = self._get_safe(row, 'codigo_limpio')
+        if codigo or self.fuentes is None:
+            return codigo
+        return self.fuentes.codigo_de(row, limite=ConfigEmbeddingsV3.LIMITE_CODIGO).strip()
+    
     def _extraer_routers_desde_json(self, include_routers_str: str) -> List[str]:
         """
         Extrae información de routers desde el JSON de include_routers
@@ -185,7 +212,7 @@ class GeneradorTextoBusquedaV3Fixed:
             partes.append(f"decoradores {decoradores}")
         
         # 13. CÓDIGO (primera línea)
-        codigo_limpio = self._get_safe(row, 'codigo_limpio')
+        codigo_limpio = self._codigo(row)
         if codigo_limpio:
             primera_linea = codigo_limpio.split('\n')[0]
             partes.append(primera_linea[:100])
@@ -204,8 +231,9 @@ class GeneradorTextoBusquedaV3Fixed:
         if self._get_safe(row, 'categoria'):
             partes.append(f"categoría {row['categoria']}")
         
-        if self._get_safe(row, 'codigo_limpio'):
-            lineas = [l.strip() for l in row['codigo_limpio'].split('\n') 
+        codigo_limpio = self._codigo(row)
+        if codigo_limpio:
+            lineas = [l.strip() for l in codigo_limpio.split('\n') 
                      if any(keyword in l.lower() for keyword in ['=', ':', 'column', 'relationship'])]
             partes.extend(lineas[:8])
         
@@ -223,8 +251,9 @@ class GeneradorTextoBusquedaV3Fixed:
         if self._get_safe(row, 'response_model'):
             partes.append(f"usado como response_model {row['response_model']}")
         
-        if self._get_safe(row, 'codigo_limpio'):
-            lineas = [l.strip() for l in row['codigo_limpio'].split('\n') 
+        codigo_limpio = self._codigo(row)
+        if codigo_limpio:
+            lineas = [l.strip() for l in codigo_limpio.split('\n') 
                      if ':' in l and '=' not in l]
             partes.extend(lineas[:8])
         
@@ -270,6 +299,48 @@ class GeneradorTextoBusquedaV3Fixed:
             return self.generar_para_route(row)
 
 
+class CacheEmbeddingsSimbolos:
+    """
+    Embeddings de texto de la ejecución anterior. Los registros con
+    hash_simbolo (clases, funciones, endpoints) se identifican por ese hash
+    y su texto sin la ruta del archivo: un símbolo movido o renombrado de
+    archivo reutiliza su vector. El resto se identifica por su texto.
+    """
+
+    def __init__(self, ruta: Path, modelo: str):
+        self.ruta = ruta
+        self.modelo = modelo
+        self.vectores: Dict[str, np.ndarray] = {}
+
+    def cargar(self) -> 'CacheEmbeddingsSimbolos':
+        if self.ruta.exists():
+            try:
+                with np.load(self.ruta, allow_pickle=False) as datos:
+                    if str(datos['modelo']) == self.modelo:
+                        self.vectores = dict(zip(datos['claves'].tolist(), datos['vectores']))
+            except (OSError, KeyError, ValueError):
+                self.vectores = {}
+        return self
+
+    def clave(self, row: pd.Series) -> str:
+        texto = str(row.get('texto_busqueda', ''))
+        simbolo = str(row.get('hash_simbolo', '') or '')
+        if simbolo:
+            ruta = str(row.get('ruta', '') or '')
+            texto = f"{simbolo}|{texto.replace(ruta, '') if ruta else texto}"
+        return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+    def guardar(self, claves: List[str], vectores: np.ndarray):
+        """Guarda solo los vectores de la ejecución actual"""
+        unicas = dict(zip(claves, vectores))
+        self.ruta.parent.mkdir(exist_ok=True, parents=True)
+        with open(self.ruta, 'wb') as f:
+            np.savez(
+                f, modelo=np.array(self.modelo), claves=np.array(list(unicas), dtype=str),
+                vectores=np.array(list(unicas.values()), dtype='float32')
+            )
+
+
 class GeneradorEmbeddingsV3:
     """Pipeline con generador mejorado"""
     
@@ -277,7 +348,12 @@ class GeneradorEmbeddingsV3:
         self.logger = self._setup_logger()
         self.model = SentenceTransformer(ConfigEmbeddingsV3.MODEL_NAME)
         self.model.max_seq_length = 512
-        self.generador_texto = GeneradorTextoBusquedaV3Fixed()
+        self.fuentes = LectorFuentes.abrir_si_existe(
+            str(ConfigEmbeddingsV3.INPUT_SNAPSHOT), str(ConfigEmbeddingsV3.INPUT_INDICE_FUENTES)
+        )
+        if self.fuentes is not None:
+            self.logger.info(f"🗂️ Snapshot de fuentes: {len(self.fuentes.archivos)} archivos")
+        self.generador_texto = GeneradorTextoBusquedaV3Fixed(self.fuentes)
         self.scaler = StandardScaler()
     
     def _setup_logger(self):
@@ -287,18 +363,41 @@ class GeneradorEmbeddingsV3:
         )
         return logging.getLogger(__name__)
     
+    def leer_parquet(self, parquet_path: Path) -> pd.DataFrame:
+        """
+        Lee el Parquet columna a columna. Los tipos vienen del esquema del
+        archivo (texto, int32, bool), así que pandas no los vuelve a inferir.
+        """
+        archivo = pq.ParquetFile(parquet_path)
+        columnas = {
+            nombre: archivo.read(columns=[nombre]).column(0).to_pandas()
+            for nombre in archivo.schema_arrow.names
+        }
+        return pd.DataFrame(columnas)
+    
     def leer_csv(self) -> pd.DataFrame:
-        """Lee CSV y analiza estructura"""
+        """Lee el dataset (Parquet si existe y no es anterior al CSV, si no CSV) y analiza estructura"""
         csv_path = ConfigEmbeddingsV3.INPUT_CSV
+        parquet_path = ConfigEmbeddingsV3.INPUT_PARQUET
+        usar_parquet = pq is not None and parquet_path.exists() and (
+            not csv_path.exists() or parquet_path.stat().st_mtime >= csv_path.stat().st_mtime
+        )
+        if not usar_parquet and parquet_path.exists():
+            self.logger.warning(f"⚠️  {parquet_path} es anterior a {csv_path}: se lee el CSV")
         
-        if not csv_path.exists():
+        if not usar_parquet and not csv_path.exists():
             raise FileNotFoundError(f"No se encontró: {csv_path}")
         
-        self.logger.info(f"Leyendo CSV: {csv_path}")
-        
         try:
-            df = pd.read_csv(csv_path)
-            self.logger.info(f"✅ CSV: {len(df)} registros, {len(df.columns)} columnas")
+            if usar_parquet:
+                self.logger.info(f"Leyendo Parquet: {parquet_path}")
+                df = self.leer_parquet(parquet_path)
+                self.logger.info(f"✅ Parquet: {len(df)} registros, {len(df.columns)} columnas")
+            else:
+                self.logger.info(f"Leyendo CSV: {csv_path}")
+                # Los ids del índice de fuentes son hex: como texto aunque parezcan números
+                df = pd.read_csv(csv_path, dtype={'archivo_id': str, 'hash_codigo': str, 'hash_simbolo': str})
+                self.logger.info(f"✅ CSV: {len(df)} registros, {len(df.columns)} columnas")
             
       
             self.logger.info("\n📊 ANÁLISIS DE CAMPOS:")
@@ -375,7 +474,7 @@ class GeneradorEmbeddingsV3:
             feature_vector = [
                 tipo_weight.get(row.get('tipo', ''), 0.5),
                 1.0 if row.get('endpoint', '') or row.get('endpoint_completo', '') else 0.0,
-                min(len(str(row.get('codigo_limpio', '')).split('\n')), 100),
+                min(len(self.generador_texto._codigo(row).split('\n')), 100),
                 1.0 if row.get('dependencias', '') else 0.0,
                 min(num_parametros, 10),
                 1.0 if row.get('es_async', False) in ['True', 'true', '1', True] else 0.0,
@@ -398,13 +497,30 @@ class GeneradorEmbeddingsV3:
         """Genera embeddings completos"""
         self.logger.info(f"\n🧮 Generando embeddings para {len(df)} registros...")
         
-        textos = df['texto_busqueda'].tolist()
-        embeddings_texto = self.model.encode(
-            textos,
-            batch_size=32,
-            show_progress_bar=True,
-            normalize_embeddings=True
-        )
+        cache = CacheEmbeddingsSimbolos(
+            ConfigEmbeddingsV3.CACHE_EMBEDDINGS, ConfigEmbeddingsV3.MODEL_NAME
+        ).cargar()
+        claves = [cache.clave(row) for _, row in df.iterrows()]
+        
+        # Solo se codifican los textos cuya clave no está en la caché
+        pendientes = {}
+        for clave, texto in zip(claves, df['texto_busqueda'].tolist()):
+            if clave not in cache.vectores:
+                pendientes.setdefault(clave, texto)
+        self.logger.info(f"♻️  Reutilizados: {len(claves) - sum(c in pendientes for c in claves)}, "
+                         f"a codificar: {len(pendientes)}")
+        
+        if pendientes:
+            nuevos = self.model.encode(
+                list(pendientes.values()),
+                batch_size=32,
+                show_progress_bar=True,
+                normalize_embeddings=True
+            )
+            cache.vectores.update(zip(pendientes, nuevos))
+        
+        embeddings_texto = np.array([cache.vectores[c] for c in claves], dtype='float32')
+        cache.guardar(claves, embeddings_texto)
         
         features = self.extraer_features(df)
         
@@ -458,6 +574,7 @@ class GeneradorEmbeddingsV3:
             
             for idx, row in df.iterrows():
                 chunk_key = f"chunk:{idx}"
+                codigo = self.generador_texto._codigo(row)
                 
                 # CAMPOS DISPONIBLES
                 metadata = {
@@ -476,12 +593,10 @@ class GeneradorEmbeddingsV3:
                     'tags': str(row.get('tags', '')),
                     'response_model': str(row.get('response_model', '')),
                     'status_code': str(row.get('status_code', '')),
-                    'contenido': str(row.get('codigo_limpio', ''))[:2000],
-                    'codigo_limpio': str(row.get('codigo_limpio', ''))[:2000],
                     'dependencias': str(row.get('dependencias', '')),
                     'tecnologias': str(row.get('tecnologias', '')),
                     'funciones': json.dumps([row.get('elemento', '')]),
-                    'complejidad': str(len(str(row.get('codigo_limpio', '')).split('\n'))),
+                    'complejidad': str(len(codigo.split('\n'))),
                     'router_padre': str(row.get('router_padre', '')),
                     'router_prefix': str(row.get('router_prefix', '')),
                     'include_routers': str(row.get('include_routers', '')),
@@ -490,6 +605,14 @@ class GeneradorEmbeddingsV3:
                     'texto_busqueda': str(row.get('texto_busqueda', ''))[:1000]  # ✅ NUEVO
                 }
                 
+                # El código se guarda una vez: como referencia al snapshot de
+                # fuentes si el registro lo omite, si no como contenido
+                if self.fuentes is not None and not self.generador_texto._get_safe(row, 'codigo_limpio') and codigo:
+                    for campo in ('archivo_id', 'offset_codigo', 'longitud_codigo', 'hash_codigo'):
+                        metadata[campo] = str(row.get(campo, ''))
+                else:
+                    metadata['contenido'] = codigo[:ConfigEmbeddingsV3.LIMITE_CODIGO]
+                
                 pipe.hmset(chunk_key, metadata)
                 
                 # Índices secundarios
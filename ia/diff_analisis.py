@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Diff entre dos ejecuciones del analyzer
+Compara dos salidas (analisis_mejorado.json, documentacion.csv o
+documentacion.parquet) por identidad de símbolo y genera un changeset
+compacto: agregados, eliminados, modificados (solo los campos que
+cambian), reubicados (solo cambia la ubicación del código en el archivo)
+y movidos (el mismo símbolo en otra ruta: una función llevada a otro
+módulo, un archivo renombrado). Las etapas de embeddings y Redis pueden
+aplicar solo el changeset en lugar de reconstruirlo todo.
+
+Uso:
+    python -m ia.diff_analisis anterior.json datasets/analisis_mejorado.json
+    python -m ia.diff_analisis anterior.parquet datasets/documentacion.parquet -o cambios.json
+"""
+
+import os
+import csv
+import sys
+import json
+import argparse
+from datetime import datetime
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from ia.files_to_csv import (
+    Registro, CAMPOS_CSV, CAMPOS_ENTEROS, CAMPOS_BOOLEANOS, VERSION_ANALYZER, cargar_pyarrow, comparar_registros,
+    indexar_registros
+)
+
+ARCHIVO_CAMBIOS_DIFF = "datasets/cambios_diff.json"
+
+
+# ==========================================
+# 📂 LECTURA DE SALIDAS DEL ANALYZER
+# ==========================================
+
+def normalizar_registro(valores: Dict[str, Any]) -> Registro:
+    """
+    Registro con los tipos del analyzer a partir de cualquier salida (el
+    CSV lo trae todo como texto); los campos que no existían en la versión
+    que generó la salida quedan vacíos
+    """
+    normalizados = {}
+    for campo in CAMPOS_CSV:
+        valor = valores.get(campo)
+        if campo in CAMPOS_ENTEROS:
+            valor = int(valor) if valor not in (None, '') else 0
+        elif campo in CAMPOS_BOOLEANOS:
+            valor = valor if isinstance(valor, bool) else str(valor) == 'True'
+        else:
+            valor = '' if valor is None else str(valor)
+        normalizados[campo] = valor
+    return Registro(normalizados)
+
+
+def cargar_analisis(ruta: str) -> List[Registro]:
+    """Registros de una salida del analyzer según su extensión (.json, .csv, .parquet)"""
+    extension = Path(ruta).suffix.lower()
+    if extension == '.json':
+        with open(ruta, 'r', encoding='utf-8') as f:
+            filas = json.load(f)['registros']
+    elif extension == '.csv':
+        csv.field_size_limit(sys.maxsize)
+        with open(ruta, 'r', encoding='utf-8', newline='') as f:
+            filas = list(csv.DictReader(f))
+    elif extension == '.parquet':
+        if not cargar_pyarrow():
+            raise SystemExit("❌ Leer Parquet requiere pyarrow (pip install pyarrow)")
+        import pyarrow.parquet as pq
+        filas = pq.read_table(ruta).to_pylist()
+    else:
+        raise SystemExit(f"❌ Formato no soportado: {ruta} (se espera .json, .csv o .parquet)")
+    return [normalizar_registro(fila) for fila in filas]
+
+
+# ==========================================
+# 🔀 CHANGESET POR IDENTIDAD DE SÍMBOLO
+# ==========================================
+
+def identidad_simbolo(registro: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """
+    Identidad independiente de la ubicación: el hash del AST normalizado en
+    clases, funciones y endpoints; el hash del código en el resto (config,
+    dependencias, archivos). None si el registro no tiene ninguno.
+    """
+    hash_registro = registro.get('hash_simbolo') or registro.get('hash_codigo')
+    return (registro['categoria'], hash_registro) if hash_registro else None
+
+
+def campos_cambiados(anterior: Dict[str, Any], nuevo: Dict[str, Any]) -> Dict[str, Any]:
+    contenido, ubicacion = comparar_registros(anterior, nuevo)
+    return dict(contenido, **ubicacion)
+
+
+def clave_cambio(clave: Tuple[Tuple[str, str, str, str], int]) -> List:
+    """Clave de un registro en el changeset: ruta, categoría, elemento, método HTTP y ocurrencia"""
+    return [*clave[0], clave[1]]
+
+
+def calcular_cambios(anteriores: List[Dict], nuevos: List[Dict]) -> Dict[str, List]:
+    """
+    Changeset entre dos análisis. Los registros con la misma clave son
+    modificados si cambia algún campo de contenido y reubicados si solo
+    cambia su ubicación en el archivo (archivo_id, offsets); los que solo
+    existen en uno de los dos se emparejan por identidad de símbolo
+    (movidos) y los que quedan son agregados o eliminados.
+    """
+    previo = indexar_registros(anteriores)
+    actual = indexar_registros(nuevos)
+
+    modificados, reubicados = [], []
+    for clave, registro in actual.items():
+        if clave in previo:
+            contenido, ubicacion = comparar_registros(previo[clave], registro)
+            if contenido:
+                modificados.append({'clave': clave_cambio(clave), 'campos': dict(contenido, **ubicacion)})
+            elif ubicacion:
+                reubicados.append({'clave': clave_cambio(clave), 'campos': ubicacion})
+
+    # Candidatos a movidos: mismo símbolo, emparejados en orden de aparición
+    sin_pareja: Dict[Tuple[str, str], List] = defaultdict(list)
+    for clave, registro in previo.items():
+        if clave not in actual:
+            identidad = identidad_simbolo(registro)
+            if identidad is not None:
+                sin_pareja[identidad].append(clave)
+
+    movidos, agregados, emparejados = [], [], set()
+    for clave, registro in actual.items():
+        if clave in previo:
+            continue
+        identidad = identidad_simbolo(registro)
+        candidatos = sin_pareja.get(identidad) if identidad is not None else None
+        if candidatos:
+            desde = candidatos.pop(0)
+            emparejados.add(desde)
+            movidos.append({
+                'desde': clave_cambio(desde),
+                'hasta': clave_cambio(clave),
+                'campos': campos_cambiados(previo[desde], registro)
+            })
+        else:
+            agregados.append(dict(registro))
+
+    eliminados = [
+        clave_cambio(clave) for clave in previo
+        if clave not in actual and clave not in emparejados
+    ]
+    return {
+        'agregados': agregados,
+        'eliminados': eliminados,
+        'modificados': modificados,
+        'reubicados': reubicados,
+        'movidos': movidos
+    }
+
+
+def aplicar_cambios(anteriores: List[Dict], cambios: Dict[str, List]) -> List[Registro]:
+    """
+    Registros del análisis nuevo a partir del anterior y su changeset (los
+    mismos que calcular_cambios recibió como nuevos; el orden puede variar)
+    """
+    indice = {tuple(clave_cambio(clave)): normalizar_registro(registro)
+              for clave, registro in indexar_registros(anteriores).items()}
+
+    for clave in cambios['eliminados']:
+        del indice[tuple(clave)]
+    for cambio in cambios['modificados'] + cambios.get('reubicados', []):
+        registro = indice[tuple(cambio['clave'])]
+        for campo, valor in cambio['campos'].items():
+            registro[campo] = valor
+    movidos = []
+    for cambio in cambios['movidos']:
+        registro = indice.pop(tuple(cambio['desde']))
+        for campo, valor in cambio['campos'].items():
+            registro[campo] = valor
+        movidos.append(registro)
+
+    return list(indice.values()) + movidos + [normalizar_registro(r) for r in cambios['agregados']]
+
+
+def escribir_cambios(cambios: Dict[str, Any], archivo_cambios: str):
+    os.makedirs(os.path.dirname(archivo_cambios) or '.', exist_ok=True)
+    with open(archivo_cambios + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(cambios, f, indent=2, ensure_ascii=False)
+    os.replace(archivo_cambios + '.tmp', archivo_cambios)
+
+
+def main(argv: List[str] = None) -> int:
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Changeset entre dos ejecuciones del analyzer")
+    parser.add_argument('anterior', help="Salida anterior (.json, .csv o .parquet)")
+    parser.add_argument('nuevo', help="Salida nueva (.json, .csv o .parquet)")
+    parser.add_argument('-o', '--salida', default=ARCHIVO_CAMBIOS_DIFF,
+                        help=f"Archivo del changeset (por defecto {ARCHIVO_CAMBIOS_DIFF})")
+    args = parser.parse_args(argv)
+
+    for ruta in (args.anterior, args.nuevo):
+        if not os.path.isfile(ruta):
+            raise SystemExit(f"❌ No existe: {ruta}")
+
+    anteriores = cargar_analisis(args.anterior)
+    nuevos = cargar_analisis(args.nuevo)
+    print(f"📂 {len(anteriores)} registros en {args.anterior}, {len(nuevos)} en {args.nuevo}")
+
+    cambios = calcular_cambios(anteriores, nuevos)
+    cambios.update(
+        anterior=args.anterior, nuevo=args.nuevo,
+        fecha=datetime.now().isoformat(), version_analyzer=VERSION_ANALYZER
+    )
+    escribir_cambios(cambios, args.salida)
+
+    print(f"\n🔀 Changeset: {len(cambios['agregados'])} agregados, {len(cambios['eliminados'])} eliminados, "
+          f"{len(cambios['modificados'])} modificados, {len(cambios['reubicados'])} reubicados, "
+          f"{len(cambios['movidos'])} movidos")
+    print(f"   Guardado en: {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
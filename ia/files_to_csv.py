@@ -2,23 +2,53 @@
 """
 Enhanced Code Analyzer - Captura Dinámica de Endpoints
 Escanea línea por línea para capturar TODOS los endpoints de FastAPI/Flask/Django
-Versión: 4.0.0 - Mejora crítica de captura de endpoints
+Versión: 4.2.0 - Análisis incremental y en paralelo
 """
 
 import os
+import io
+import sys
 import re
+import mmap
+import shutil
+import hashlib
+import textwrap
 import csv
 import json
 import ast
-from typing import List, Dict, Any, Optional, Tuple
+import copy
+import argparse
+import bisect
+import heapq
+import contextlib
+import time
+from collections import deque
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterator
 from pathlib import Path
 from datetime import datetime
 import traceback
 
+# pyarrow es opcional y pesado: solo se importa al escribir Parquet (cargar_pyarrow)
+pa = None
+pq = None
+
 # Configuración
 RUTA_PROYECTO = "."
 ARCHIVO_SALIDA_CSV = "datasets/documentacion.csv"
 ARCHIVO_SALIDA_JSON = "datasets/analisis_mejorado.json"
+ARCHIVO_SALIDA_PARQUET = "datasets/documentacion.parquet"
+# Snapshot de las fuentes analizadas e índice de sus archivos (--snapshot-fuentes)
+ARCHIVO_SNAPSHOT_FUENTES = "datasets/fuentes.snapshot"
+ARCHIVO_INDICE_FUENTES = "datasets/fuentes.indice.json"
+CARPETA_CACHE = "datasets/cache_analisis"
+# Salidas de los escaneos --shard i/N (se combinan con --merge)
+CARPETA_SHARDS = "datasets/shards"
+# Eventos por archivo en JSONL (--eventos)
+ARCHIVO_EVENTOS = "datasets/eventos_analisis.jsonl"
+
+VERSION_ANALYZER = "4.2.0"
 
 # Carpetas raíces a buscar
 CARPETAS_RAICES = ['app', 'src', 'backend', 'api', 'web', 'server', 'core']
@@ -34,6 +64,29 @@ CARPETAS_EXCLUIR = {
 # Extensiones permitidas
 EXTENSIONES_PERMITIDAS = {'.py'}
 
+# Archivos desde este tamaño se leen con mmap en lugar de read(). Debe
+# quedar por debajo de LIMITE_BYTES_ARCHIVO: los archivos que superan ese
+# límite no se leen enteros
+UMBRAL_MMAP_BYTES = 256 * 1024
+
+# Filtro previo (ver LimitesArchivo): los archivos que superan un límite o
+# parecen generados no se parsean, solo generan un registro FILE (0 = sin límite)
+LIMITE_BYTES_ARCHIVO = 1024 * 1024
+LIMITE_LINEAS_ARCHIVO = 20000
+LIMITE_LONGITUD_LINEA = 1000
+# Caracteres de código de los registros FILE (vista previa del archivo)
+CARACTERES_VISTA_PREVIA = 500
+# Inicio del archivo en el que se buscan las marcas de código generado
+BYTES_CABECERA_GENERADO = 2048
+MARCAS_GENERADO = (
+    b'@generated', b'do not edit', b'generated by the protocol buffer compiler',
+    b'autogenerated', b'auto-generated', b'automatically generated', b'code generated by',
+    b'openapi-generator', b'swagger-codegen'
+)
+# Solo los archivos que montan routers aportan aristas al grafo de montajes;
+# el resto se resume bajo demanda al resolver nombres
+MARCA_MONTAJE = b'include_router'
+
 # Campos completos para CSV
 CAMPOS_CSV = [
     'tipo', 'ruta', 'nombre_archivo', 'elemento', 'categoria',
@@ -43,13 +96,1593 @@ CAMPOS_CSV = [
     'tipos_parametros', 'codigo_limpio', 'dependencias', 'tecnologias',
     'linea_inicio', 'numero_lineas', 'complejidad', 'imports',
     'router_padre', 'middlewares', 'event_handlers', 'include_routers',
-    'responses', 'ejemplos', 'validaciones', 'es_async', 'es_decorador'
+    'responses', 'ejemplos', 'validaciones', 'es_async', 'es_decorador',
+    # Índice de fuentes: archivo (hash de su texto), rango en bytes del código
+    # del elemento dentro del archivo y hash de ese código
+    'archivo_id', 'offset_codigo', 'longitud_codigo', 'hash_codigo',
+    # Hash del AST normalizado de clases, funciones y endpoints (ver hash_simbolo)
+    'hash_simbolo'
 ]
 
+# Tipos de los campos no textuales (el resto son texto) para el esquema Parquet
+CAMPOS_ENTEROS = {'linea_inicio', 'numero_lineas', 'complejidad', 'offset_codigo', 'longitud_codigo'}
+CAMPOS_BOOLEANOS = {'es_async', 'es_decorador'}
+
+# Registros por row group del Parquet (lo que se acumula en memoria antes de escribir)
+TAMANO_LOTE_PARQUET = 8192
+
+# Niveles de los mensajes por consola (--nivel)
+NIVEL_SILENCIOSO = 0   # nada (uso como librería, CI)
+NIVEL_RESUMEN = 1      # barra de progreso, errores y resumen final
+NIVEL_DETALLADO = 2    # además, cada archivo y cada endpoint detectado
+NIVELES_PROGRESO = {'silencioso': NIVEL_SILENCIOSO, 'resumen': NIVEL_RESUMEN, 'detallado': NIVEL_DETALLADO}
+# Segundos mínimos entre dos actualizaciones de la barra (en terminal y en logs de CI)
+INTERVALO_BARRA = 0.2
+INTERVALO_BARRA_LOG = 10.0
+ANCHO_BARRA = 30
+
+
+def cargar_pyarrow() -> bool:
+    """Importa pyarrow bajo demanda; False si no está instalado"""
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            return False
+        pa, pq = pyarrow, pyarrow.parquet
+    return True
+
+
+def esquema_parquet() -> 'pa.Schema':
+    """Esquema tipado de los registros, en el orden de CAMPOS_CSV"""
+    campos = []
+    for campo in CAMPOS_CSV:
+        if campo in CAMPOS_ENTEROS:
+            tipo = pa.int32()
+        elif campo in CAMPOS_BOOLEANOS:
+            tipo = pa.bool_()
+        else:
+            tipo = pa.string()
+        campos.append(pa.field(campo, tipo, nullable=False))
+    return pa.schema(campos, metadata={'version_analyzer': VERSION_ANALYZER})
+
+
+# ==========================================
+# 🧱 REGISTROS COMPACTOS
+# ==========================================
+
+class Registro(MutableMapping):
+    """
+    Registro del análisis con un slot por campo de CAMPOS_CSV en lugar de un
+    dict de 35 claves. Se usa como un dict (registro['campo'], dict(registro),
+    DictWriter) pero ocupa una fracción de la memoria; los textos por archivo
+    (ruta, imports, tecnologías...) son el mismo objeto en todos sus registros.
+    """
+
+    __slots__ = tuple(CAMPOS_CSV)
+
+    def __init__(self, valores: Optional[Dict[str, Any]] = None):
+        if valores is not None:
+            for campo in CAMPOS_CSV:
+                setattr(self, campo, valores[campo])
+
+    @classmethod
+    def desde_valores(cls, valores) -> 'Registro':
+        """Registro a partir de los valores en el orden de CAMPOS_CSV"""
+        registro = cls()
+        for campo, valor in zip(CAMPOS_CSV, valores):
+            setattr(registro, campo, valor)
+        return registro
+
+    def valores(self) -> Tuple:
+        return tuple(getattr(self, campo) for campo in CAMPOS_CSV)
+
+    def __getitem__(self, campo: str) -> Any:
+        try:
+            return getattr(self, campo)
+        except (AttributeError, TypeError):
+            raise KeyError(campo) from None
+
+    def __setitem__(self, campo: str, valor: Any):
+        if campo not in Registro.__slots__:
+            raise KeyError(campo)
+        setattr(self, campo, valor)
+
+    def __delitem__(self, campo: str):
+        raise TypeError("Los campos de un Registro son fijos")
+
+    def __iter__(self):
+        return iter(CAMPOS_CSV)
+
+    def __len__(self) -> int:
+        return len(CAMPOS_CSV)
+
+    def __eq__(self, otro) -> bool:
+        if isinstance(otro, Registro):
+            return self.valores() == otro.valores()
+        return super().__eq__(otro)
+
+    def __reduce__(self):
+        # Pickle compacto (pool de procesos): solo la tupla de valores
+        return Registro.desde_valores, (self.valores(),)
+
+    def __repr__(self) -> str:
+        return f"Registro({dict(self)!r})"
+
+
+class ContextoArchivo:
+    """Campos de registro comunes a todo un archivo, calculados una sola vez"""
+
+    __slots__ = ('origen', 'ruta', 'nombre_archivo', 'tecnologias', 'imports', 'include_routers', 'archivo_id')
+
+    def __init__(self, ruta: Path, tecnologias: List[str], imports: List[str], include_routers: List,
+                 archivo_id: str = ''):
+        # Objetos de los que sale el contexto, para saber si sigue valiendo
+        self.origen = (ruta, tecnologias, imports, include_routers)
+        self.ruta = str(ruta)
+        self.nombre_archivo = ruta.name
+        self.tecnologias = ', '.join(tecnologias)
+        self.imports = ', '.join(imports[:10])
+        self.include_routers = json.dumps(include_routers)
+        self.archivo_id = archivo_id
+
+    def corresponde(self, ruta: Path, tecnologias: List[str], imports: List[str],
+                    include_routers: Optional[List] = None) -> bool:
+        """True si se calculó con estos mismos objetos (include_routers=None no se compara)"""
+        actuales = (ruta, tecnologias, imports, include_routers)
+        return all(b is None or a is b for a, b in zip(self.origen, actuales))
+
+
+def empaquetar_registros(registros: List[Dict]) -> Dict[str, Any]:
+    """
+    Forma compacta de los registros de un archivo para la cache: los campos
+    con el mismo valor en todos los registros se guardan una vez y el resto
+    como filas
+    """
+    if not registros:
+        return {'compartidos': {}, 'campos': [], 'filas': []}
+    primero = registros[0]
+    compartidos = {
+        campo: primero[campo] for campo in CAMPOS_CSV
+        if all(r[campo] == primero[campo] for r in registros)
+    }
+    propios = [campo for campo in CAMPOS_CSV if campo not in compartidos]
+    return {
+        'compartidos': compartidos,
+        'campos': propios,
+        'filas': [[r[campo] for campo in propios] for r in registros]
+    }
+
+
+def desempaquetar_registros(paquete: Dict[str, Any]) -> List[Registro]:
+    """Inversa de empaquetar_registros; los campos compartidos son el mismo objeto"""
+    compartidos = list(paquete['compartidos'].items())
+    propios = paquete['campos']
+    registros = []
+    for fila in paquete['filas']:
+        registro = Registro()
+        for campo, valor in compartidos:
+            setattr(registro, campo, valor)
+        for campo, valor in zip(propios, fila):
+            setattr(registro, campo, valor)
+        registros.append(registro)
+    return registros
+
+
+def clave_registro(registro: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    """Identidad de un registro dentro del análisis"""
+    return (registro['ruta'], registro['categoria'], registro['elemento'], registro.get('metodo_http', ''))
+
+
+def indexar_registros(registros: List[Dict]) -> Dict[Tuple[Tuple[str, str, str, str], int], Dict]:
+    """Registros por (clave, ocurrencia), en el orden de la lista"""
+    indice = {}
+    for registro in registros:
+        clave = clave_registro(registro)
+        # Elementos repetidos (p.ej. dos endpoints con el mismo nombre)
+        ocurrencia = 0
+        while (clave, ocurrencia) in indice:
+            ocurrencia += 1
+        indice[(clave, ocurrencia)] = registro
+    return indice
+
+
+# Campos que ubican el código en el archivo: cambian con cualquier edición
+# del archivo (archivo_id es su hash) aunque el elemento siga igual
+CAMPOS_UBICACION = ('archivo_id', 'offset_codigo', 'longitud_codigo')
+
+
+def comparar_registros(anterior: Dict[str, Any], nuevo: Dict[str, Any]
+                       ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Campos que cambian entre dos versiones de un registro (con su valor
+    nuevo), separados en (contenido, ubicación): si solo cambia la
+    ubicación, el elemento no cambió. codigo_limpio solo cuenta si cambia
+    hash_codigo.
+    """
+    contenido, ubicacion = {}, {}
+    # Mismo código: codigo_limpio puede faltar en un lado (--snapshot-fuentes)
+    mismo_codigo = bool(anterior['hash_codigo']) and anterior['hash_codigo'] == nuevo['hash_codigo']
+    for campo in CAMPOS_CSV:
+        if campo == 'codigo_limpio' and mismo_codigo:
+            continue
+        if anterior[campo] != nuevo[campo]:
+            (ubicacion if campo in CAMPOS_UBICACION else contenido)[campo] = nuevo[campo]
+    return contenido, ubicacion
+
+
+def calcular_delta(anteriores: List[Dict], nuevos: List[Dict]) -> Dict[str, List]:
+    """
+    Registros agregados, eliminados (por clave) y modificados entre dos
+    listas. Los que solo cambian de ubicación en el archivo (archivo_id,
+    offsets) van aparte, en reubicados: no hace falta recalcular su embedding.
+    """
+    previo = indexar_registros(anteriores)
+    actual = indexar_registros(nuevos)
+    modificados, reubicados = [], []
+    for clave, registro in actual.items():
+        if clave in previo:
+            contenido, ubicacion = comparar_registros(previo[clave], registro)
+            if contenido:
+                modificados.append(registro)
+            elif ubicacion:
+                reubicados.append(registro)
+    return {
+        'agregados': [r for k, r in actual.items() if k not in previo],
+        'eliminados': [list(k[0]) for k in previo if k not in actual],
+        'modificados': modificados,
+        'reubicados': reubicados
+    }
+
+
+# Patrones precompilados (se usan en todos los archivos)
+PATRON_COMPLEJIDAD = re.compile(r'\b(?:if|elif|for|while|except)\s+|\btry\s*:')
+PATRON_INCLUDE_ROUTER = re.compile(r'\.(include_router|include)\s*\(([^)]+)\)')
+PATRON_DEPENDS = re.compile(r'Depends\(([^)]+)\)')
+PATRON_DECLARACION_ROUTER = re.compile(r'(\w+)\s*=\s*(?:APIRouter|FastAPI|Blueprint)\s*\(([^)]*)\)')
+PATRON_INCLUDE_PREFIX = re.compile(
+    r'(?:app|main)\.include_router\s*\(\s*(\w+)\s*,\s*prefix\s*=\s*["\']([^"\']+)["\']'
+)
+PATRON_PREFIX = re.compile(r'prefix\s*=\s*["\']([^"\']+)["\']')
+PATRON_TAGS = re.compile(r'tags\s*=\s*\[([^\]]+)\]')
+
+# Decoradores de endpoint en una sola alternativa:
+#   FastAPI  @router.get("/path")                 -> grupos 1 (router), 2 (método), 3 (ruta)
+#   Flask    @app.route("/path", methods=["GET"]) -> grupos 1 (router), 4 (ruta), 5 (método)
+METODOS_HTTP = 'get|post|put|delete|patch|options|head|trace'
+PATRON_ENDPOINT = re.compile(
+    r'@(\w+)\.(?:'
+    rf'({METODOS_HTTP})\s*\(\s*["\']([^"\']+)["\']'
+    r'|route\s*\(\s*["\']([^"\']+)["\'][^)]*methods\s*=\s*\["([^"]+)"'
+    r')',
+    re.IGNORECASE
+)
+# Prefiltro por archivo: sin ningún decorador de este tipo no hay endpoints
+PATRON_PREFILTRO_ENDPOINT = re.compile(rf'@\w+\.(?:{METODOS_HTTP}|route)\s*\(', re.IGNORECASE)
+PATRON_HTTP_STATUS = re.compile(r'HTTP_(\d+)')
+
+
+class TablaRouters:
+    """
+    Declaraciones de routers (APIRouter/FastAPI/Blueprint) de un archivo,
+    ordenadas por línea, más los prefixes de include_router del mismo archivo.
+    Se construye una vez por archivo y responde cada endpoint con bisect.
+    """
+
+    def __init__(self, contenido: str):
+        self.routers: List[Dict[str, Any]] = []
+        # Línea (0-based) donde termina cada declaración, para bisect
+        self.lineas_fin: List[int] = []
+        # router -> prefixes de include_router en orden de aparición
+        self.prefijos_include: Dict[str, List[str]] = {}
+
+        if any(x in contenido for x in ('APIRouter', 'FastAPI', 'Blueprint')):
+            self._indexar_declaraciones(contenido)
+        if 'include_router' in contenido:
+            for match in PATRON_INCLUDE_PREFIX.finditer(contenido):
+                self.prefijos_include.setdefault(match.group(1), []).append(match.group(2))
+
+    def _indexar_declaraciones(self, contenido: str):
+        linea = 0
+        posicion = 0
+        for match in PATRON_DECLARACION_ROUTER.finditer(contenido):
+            linea += contenido.count('\n', posicion, match.start())
+            linea_fin = linea + contenido.count('\n', match.start(), match.end())
+            posicion = match.start()
+            parametros = match.group(2)
+
+            # Extraer prefix
+            prefix = ''
+            prefix_match = PATRON_PREFIX.search(parametros)
+            if prefix_match:
+                prefix = prefix_match.group(1)
+
+            # Extraer tags
+            tags = []
+            tags_match = PATRON_TAGS.search(parametros)
+            if tags_match:
+                tags = [tag.strip().strip('"\'') for tag in tags_match.group(1).split(',')]
+
+            self.routers.append({
+                'nombre': match.group(1),
+                'prefix': prefix,
+                'tags': tags,
+                'linea': linea
+            })
+            self.lineas_fin.append(linea_fin)
+
+    def router_en_linea(self, linea_actual: int) -> Optional[Dict[str, Any]]:
+        """Router declarado por completo antes de linea_actual (el más cercano)"""
+        # Las declaraciones no se solapan: las que terminan antes son un prefijo
+        i = bisect.bisect_left(self.lineas_fin, linea_actual) - 1
+        if i < 0:
+            return None
+        # Con varias declaraciones en la misma línea gana la primera
+        while i > 0 and self.routers[i - 1]['linea'] == self.routers[i]['linea']:
+            i -= 1
+        return self.routers[i]
+
+
+class AnalisisAST:
+    """
+    Resultado de UNA sola pasada sobre el AST de un archivo.
+    Agrupa los nodos que usan los extractores (imports, clases, funciones,
+    configuraciones, dependencias y endpoints) para no
+    parsear ni recorrer el árbol otra vez en cada uno de ellos.
+    """
+
+    def __init__(self, tree: ast.Module):
+        self.tree = tree
+        self.imports: List[str] = []
+        self.clases: List[ast.ClassDef] = []
+        self.funciones: List[ast.AST] = []
+        self.generadores: List[ast.AST] = []
+        # Nombre local -> (módulo, nombre importado o None, nivel relativo)
+        self.nombres_importados: Dict[str, Tuple[Optional[str], Optional[str], int]] = {}
+        # Llamadas X.include_router(...)
+        self.includes_router: List[ast.Call] = []
+        # Índice de ámbitos: clase/función que contiene a cada clase o función
+        self.ambitos: Dict[ast.AST, Optional[ast.AST]] = {}
+        # Métodos (funciones en el cuerpo directo de una clase) -> su clase
+        self.metodos: Dict[ast.AST, ast.ClassDef] = {}
+        self._recorrer()
+
+    def _recorrer(self):
+        """Recorre el árbol en anchura (mismo orden que ast.walk)"""
+        con_yield = set()
+        # Cada nodo viaja con la función que lo contiene (para detectar yield)
+        # y con el ámbito (clase o función) más cercano
+        pendientes = deque([(self.tree, None, None)])
+
+        while pendientes:
+            node, funcion, ambito = pendientes.popleft()
+
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    self.imports.append(alias.name)
+                    if alias.asname:
+                        self.nombres_importados[alias.asname] = (alias.name, None, 0)
+                    else:
+                        raiz = alias.name.split('.')[0]
+                        self.nombres_importados[raiz] = (raiz, None, 0)
+            elif isinstance(node, ast.ImportFrom):
+                if node.module:
+                    self.imports.append(node.module)
+                for alias in node.names:
+                    self.nombres_importados[alias.asname or alias.name] = (node.module, alias.name, node.level)
+            elif isinstance(node, ast.Call):
+                if isinstance(node.func, ast.Attribute) and node.func.attr == 'include_router':
+                    self.includes_router.append(node)
+            elif isinstance(node, ast.ClassDef):
+                self.clases.append(node)
+                self.ambitos[node] = ambito
+                for item in node.body:
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        self.metodos[item] = node
+                ambito = node
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.funciones.append(node)
+                self.ambitos[node] = ambito
+                funcion = ambito = node
+            elif isinstance(node, ast.Lambda):
+                funcion = node
+            elif isinstance(node, (ast.Yield, ast.YieldFrom)):
+                if funcion is not None:
+                    con_yield.add(funcion)
+
+            pendientes.extend((hijo, funcion, ambito) for hijo in ast.iter_child_nodes(node))
+
+        self.generadores = sorted(
+            (f for f in self.funciones if f in con_yield),
+            key=lambda f: (f.lineno, f.col_offset)
+        )
+
+    def clase_del_metodo(self, node: ast.AST) -> Optional[ast.ClassDef]:
+        """Clase a la que pertenece un método, o None si no es método (O(1))"""
+        return self.metodos.get(node)
+
+    def ambito_de(self, node: ast.AST) -> Optional[ast.AST]:
+        """Clase o función que contiene a una clase/función (None = módulo)"""
+        return self.ambitos.get(node)
+
+
+def hash_archivo(ruta_archivo: str) -> str:
+    """SHA-256 del contenido binario de un archivo"""
+    h = hashlib.sha256()
+    with open(ruta_archivo, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def version_cache() -> str:
+    """
+    Versión usada para invalidar la cache: versión del analyzer más el hash
+    de este módulo, así cualquier cambio en el código invalida lo guardado
+    """
+    return f"{VERSION_ANALYZER}+{hash_archivo(__file__)[:12]}"
+
+
+class CacheAnalisis:
+    """
+    Manifiesto persistente para el análisis incremental.
+    Cada archivo se identifica por ruta, tamaño, mtime, hash de contenido y
+    versión del analyzer; sus registros y estadísticas se guardan en un JSON
+    propio y se reutilizan mientras el archivo no cambie.
+    """
+
+    def __init__(self, carpeta: str = CARPETA_CACHE, version: Optional[str] = None):
+        self.carpeta = Path(carpeta)
+        self.carpeta_registros = self.carpeta / 'registros'
+        self.ruta_manifiesto = self.carpeta / 'manifiesto.json'
+        self.version = version or version_cache()
+        self.entradas: Dict[str, Dict[str, Any]] = {}
+        # "modulo:router" -> prefix de montaje externo de la última ejecución
+        self.prefijos: Dict[str, str] = {}
+        self.resumen = {'reutilizados': 0, 'analizados': 0, 'reubicados': 0, 'eliminados': 0}
+        # Huellas (tamaño, mtime, hash) calculadas durante vigente()
+        self._huellas: Dict[str, Dict[str, Any]] = {}
+        # Rutas guardadas en esta ejecución: leerlas no es reutilizarlas
+        self._guardadas = set()
+        self._cargar_manifiesto()
+
+    def _cargar_manifiesto(self):
+        try:
+            with open(self.ruta_manifiesto, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if datos.get('version') != self.version:
+            # Analyzer distinto: nada de lo guardado es válido
+            self.invalidar()
+            return
+
+        self.entradas = datos.get('archivos', {})
+        self.prefijos = datos.get('prefijos_montaje', {})
+
+    def invalidar(self):
+        """Descarta todas las entradas (fuerza un análisis completo)"""
+        self.entradas = {}
+        self.prefijos = {}
+        shutil.rmtree(self.carpeta_registros, ignore_errors=True)
+
+    def huella(self, ruta_archivo: str) -> Dict[str, Any]:
+        """Tamaño, mtime y hash actuales del archivo (se reutiliza hasta guardar())"""
+        if ruta_archivo not in self._huellas:
+            st = os.stat(ruta_archivo)
+            self._huellas[ruta_archivo] = {
+                'tamano': st.st_size,
+                'mtime_ns': st.st_mtime_ns,
+                'hash': hash_archivo(ruta_archivo)
+            }
+        return self._huellas[ruta_archivo]
+
+    def vigente(self, ruta_archivo: str) -> bool:
+        """True si los registros guardados siguen valiendo para el archivo"""
+        entrada = self.entradas.get(ruta_archivo)
+        if entrada is None or not (self.carpeta_registros / entrada['blob']).exists():
+            return False
+
+        try:
+            st = os.stat(ruta_archivo)
+        except OSError:
+            return False
+
+        if st.st_size != entrada['tamano']:
+            return False
+        if st.st_mtime_ns == entrada['mtime_ns']:
+            return True
+
+        # mtime distinto: solo cuenta como cambio si cambió el contenido
+        if self.huella(ruta_archivo)['hash'] != entrada['hash']:
+            return False
+        entrada['mtime_ns'] = st.st_mtime_ns
+        return True
+
+    def cargar(self, ruta_archivo: str, contar: bool = True
+               ) -> Optional[Tuple[List[Dict], Dict[str, Any], Optional[Dict]]]:
+        """
+        Registros, estadísticas y resumen de montaje guardados (None si no se
+        pueden leer). Con contar=False no cuenta como reutilizado (se reubica
+        en otra ruta, ver EnhancedEndpointAnalyzer.reubicar_resultado)
+        """
+        entrada = self.entradas.get(ruta_archivo)
+        if entrada is None:
+            return None
+        try:
+            with open(self.carpeta_registros / entrada['blob'], 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if contar and ruta_archivo not in self._guardadas:
+            self.resumen['reutilizados'] += 1
+        parciales = datos['estadisticas']
+        parciales['tecnologias_detectadas'] = set(parciales.get('tecnologias_detectadas', []))
+        return desempaquetar_registros(datos['registros']), parciales, entrada.get('montaje')
+
+    def rutas_por_contenido(self) -> Dict[str, List[str]]:
+        """Hash de contenido -> rutas con resultado guardado (aunque el archivo ya no exista)"""
+        indice: Dict[str, List[str]] = {}
+        for ruta_archivo, entrada in self.entradas.items():
+            indice.setdefault(entrada['hash'], []).append(ruta_archivo)
+        return indice
+
+    def resumen_montaje(self, ruta_archivo: str) -> Optional[Dict[str, Any]]:
+        """Resumen de montaje guardado en el manifiesto (sin leer los registros)"""
+        entrada = self.entradas.get(ruta_archivo)
+        return entrada.get('montaje') if entrada else None
+
+    def actualizar_prefijos(self, prefijos: Dict[Tuple[str, str], str]) -> List[str]:
+        """
+        Guarda los prefixes de montaje resueltos y devuelve los módulos cuyo
+        prefix cambió respecto a la ejecución anterior
+        """
+        nuevos = {f"{modulo}:{router}": prefijo for (modulo, router), prefijo in prefijos.items()}
+        cambiados = {
+            clave.split(':')[0]
+            for clave in set(nuevos) | set(self.prefijos)
+            if nuevos.get(clave) != self.prefijos.get(clave)
+        }
+        self.prefijos = nuevos
+        return sorted(cambiados)
+
+    def guardar(self, ruta_archivo: str, registros: List[Dict], parciales: Dict[str, Any],
+                resumen_montaje: Optional[Dict[str, Any]] = None, reubicado: bool = False):
+        """Guarda el resultado de analizar un archivo (reubicado: copiado de otro con el mismo contenido)"""
+        # La huella tomada antes de analizar se consume aquí: en un proceso
+        # largo (modo watch) el archivo puede volver a cambiar después
+        huella = self.huella(ruta_archivo)
+        self._huellas.pop(ruta_archivo, None)
+        blob = hashlib.sha256(f"{ruta_archivo}\0{huella['hash']}".encode('utf-8')).hexdigest()[:32] + '.json'
+
+        anterior = self.entradas.get(ruta_archivo)
+        if anterior and anterior['blob'] != blob:
+            self._borrar_blob(anterior['blob'])
+
+        estadisticas = parciales_serializables(parciales)
+
+        self.carpeta_registros.mkdir(parents=True, exist_ok=True)
+        with open(self.carpeta_registros / blob, 'w', encoding='utf-8') as f:
+            json.dump({'registros': empaquetar_registros(registros), 'estadisticas': estadisticas},
+                      f, ensure_ascii=False)
+
+        self.entradas[ruta_archivo] = dict(huella, blob=blob, montaje=resumen_montaje)
+        self._guardadas.add(ruta_archivo)
+        self.resumen['reubicados' if reubicado else 'analizados'] += 1
+
+    def podar(self, rutas_actuales: List[str]):
+        """Elimina las entradas de archivos que ya no existen o no se procesan"""
+        actuales = set(rutas_actuales)
+        for ruta_archivo in [r for r in self.entradas if r not in actuales]:
+            self._borrar_blob(self.entradas.pop(ruta_archivo)['blob'])
+            self.resumen['eliminados'] += 1
+
+    def _borrar_blob(self, blob: str):
+        try:
+            os.remove(self.carpeta_registros / blob)
+        except OSError:
+            pass
+
+    def escribir(self):
+        """Escribe el manifiesto de forma atómica"""
+        self.carpeta.mkdir(parents=True, exist_ok=True)
+        temporal = self.ruta_manifiesto.with_suffix('.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': self.version,
+                'archivos': self.entradas,
+                'prefijos_montaje': self.prefijos
+            }, f, ensure_ascii=False)
+        os.replace(temporal, self.ruta_manifiesto)
+
+
+def modulo_relativo(ruta_archivo: str, ruta_proyecto: str) -> str:
+    """Nombre de módulo Python de un archivo (app/routers/admin.py -> app.routers.admin)"""
+    partes = list(Path(os.path.relpath(ruta_archivo, ruta_proyecto)).with_suffix('').parts)
+    if partes and partes[-1] == '__init__':
+        partes.pop()
+    return '.'.join(p for p in partes if p not in ('', '.'))
+
+
+def nombre_punteado(node: ast.AST) -> str:
+    """'admin.router' para Name/Attribute; '' para cualquier otra expresión"""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        base = nombre_punteado(node.value)
+        return f"{base}.{node.attr}" if base else ''
+    return ''
+
+
+def texto_constante(node: Optional[ast.AST]) -> Optional[str]:
+    """Valor de un literal de texto; None para cualquier otra expresión"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def hash_simbolo(node: ast.AST) -> str:
+    """
+    Hash del AST normalizado de una clase o función: ast.dump sin posiciones
+    ni formato (comentarios, espacios), así un símbolo idéntico conserva el
+    hash aunque se mueva dentro del archivo, a otro módulo o se renombre el
+    archivo
+    """
+    return hash_texto(ast.dump(node).encode('utf-8'))
+
+
+def decorador_endpoint(dec: ast.AST) -> Optional[Tuple[str, str, str]]:
+    """
+    (router, método HTTP, ruta) si el decorador declara un endpoint:
+    @router.get("/path") en FastAPI o @app.route("/path", methods=[...]) en Flask
+    """
+    if not (isinstance(dec, ast.Call) and isinstance(dec.func, ast.Attribute)
+            and isinstance(dec.func.value, ast.Name)):
+        return None
+    
+    argumentos = {k.arg: k.value for k in dec.keywords if k.arg}
+    atributo = dec.func.attr.lower()
+    if atributo in METODOS_HTTP.split('|'):
+        metodo = atributo.upper()
+        ruta = texto_constante(dec.args[0] if dec.args else argumentos.get('path'))
+    elif atributo == 'route':
+        metodos = argumentos.get('methods')
+        if not isinstance(metodos, (ast.List, ast.Tuple)) or not metodos.elts:
+            return None
+        metodo = texto_constante(metodos.elts[0])
+        if metodo is None:
+            return None
+        metodo = metodo.upper()
+        ruta = texto_constante(dec.args[0] if dec.args else argumentos.get('rule'))
+    else:
+        return None
+    
+    if ruta is None:
+        return None
+    return dec.func.value.id, metodo, ruta
+
+
+def unir_rutas(prefijo: str, ruta: str) -> str:
+    """Une un prefix de montaje con la ruta de un endpoint"""
+    return prefijo.rstrip('/') + '/' + ruta.lstrip('/')
+
+
+class GrafoMontajes:
+    """
+    Grafo de montaje de routers entre archivos.
+    Cada archivo aporta un resumen (módulo, routers declarados, nombres
+    importados y llamadas include_router); con él se resuelve qué router de
+    qué módulo queda montado bajo qué prefix, siguiendo re-exportaciones
+    (p.ej. app/routers/__init__.py) y montajes anidados.
+    """
+
+    MAX_SALTOS = 10
+
+    def __init__(self, resumenes: List[Dict[str, Any]], cargar_paquete=None):
+        self.modulos: Dict[str, Dict[str, Any]] = {}
+        for resumen in resumenes:
+            if resumen:
+                self.modulos.setdefault(resumen['modulo'], resumen)
+        # Resúmenes de paquetes (__init__.py) que no se procesan como archivos
+        self._cargar_paquete = cargar_paquete
+        # (módulo, router) -> ((módulo padre, router padre), prefix, módulo que monta)
+        self.padres: Dict[Tuple[str, str], Tuple[Tuple[str, str], str, str]] = {}
+        self._construir()
+
+    def _resumen(self, modulo: str) -> Optional[Dict[str, Any]]:
+        if modulo not in self.modulos and self._cargar_paquete is not None:
+            self.modulos[modulo] = self._cargar_paquete(modulo)
+        return self.modulos.get(modulo)
+
+    def resolver(self, modulo: str, nombre: str, saltos: int = 0) -> Optional[Tuple[str, str]]:
+        """Router (módulo, variable) al que se refiere 'nombre' dentro de 'modulo'"""
+        resumen = self._resumen(modulo)
+        if not resumen or not nombre or saltos > self.MAX_SALTOS:
+            return None
+
+        cabeza, _, resto = nombre.partition('.')
+        if not resto and cabeza in resumen['routers']:
+            return (modulo, cabeza)
+
+        origen = resumen['importados'].get(cabeza)
+        if not origen or not origen[0]:
+            return None
+        modulo_origen, nombre_origen = origen
+
+        if nombre_origen is None:
+            # import paquete.modulo -> paquete.modulo.router
+            return self.resolver(modulo_origen, resto, saltos + 1) if resto else None
+
+        # from modulo import nombre: puede ser un router re-exportado o un submódulo
+        objetivo = f"{nombre_origen}.{resto}" if resto else nombre_origen
+        resuelto = self.resolver(modulo_origen, objetivo, saltos + 1)
+        if resuelto is None and resto:
+            resuelto = self.resolver(f"{modulo_origen}.{nombre_origen}", resto, saltos + 1)
+        return resuelto
+
+    def _construir(self):
+        for modulo, resumen in list(self.modulos.items()):
+            for include in resumen.get('includes', []):
+                hijo = self.resolver(modulo, include['router'])
+                padre = self.resolver(modulo, include['padre'])
+                if hijo is None or padre is None or hijo == padre:
+                    continue
+                # Con varios montajes del mismo router se queda el primero
+                self.padres.setdefault(hijo, (padre, include['prefix'], modulo))
+
+    def prefijo(self, router: Tuple[str, str]) -> str:
+        """
+        Prefix que aportan los montajes de OTROS archivos a un router.
+        El montaje en el propio archivo vía app/main.include_router ya lo
+        aplica detectar_router_y_prefix.
+        """
+        partes = []
+        visitados = {router}
+        actual = router
+        while actual in self.padres:
+            padre, prefix, modulo_montaje = self.padres[actual]
+            if not (modulo_montaje == actual[0] and padre[1] in ('app', 'main')):
+                partes.append(prefix)
+            if padre in visitados:
+                break
+            visitados.add(padre)
+            actual = padre
+        return ''.join(p.rstrip('/') for p in reversed(partes) if p)
+
+    def prefijos_externos(self) -> Dict[Tuple[str, str], str]:
+        """(módulo, router) -> prefix, solo para routers con prefix externo"""
+        prefijos = {}
+        for router in self.padres:
+            prefijo = self.prefijo(router)
+            if prefijo:
+                prefijos[router] = prefijo
+        return prefijos
+
+
+# ==========================================
+# 🗂️ ÍNDICE DE FUENTES
+# ==========================================
+
+def hash_texto(datos) -> str:
+    """Hash corto (16 hex) de un texto codificado; identifica archivos y fragmentos"""
+    return hashlib.sha256(datos).hexdigest()[:16]
+
+
+class FuenteArchivo:
+    """
+    Texto del archivo en proceso codificado una sola vez en utf-8: su id (hash
+    del contenido) y el rango en bytes de cualquier rango de líneas. Los
+    offsets son sobre el texto que ve el analyzer (saltos de línea ya
+    normalizados), que es el que se guarda en el snapshot.
+    """
+
+    __slots__ = ('ruta', 'contenido', 'datos', 'archivo_id', '_inicios')
+
+    def __init__(self, ruta: Path, contenido: str):
+        self.ruta = ruta
+        self.contenido = contenido
+        self.datos = contenido.encode('utf-8')
+        self.archivo_id = hash_texto(self.datos)
+        self._inicios: Optional[List[int]] = None
+
+    def inicios_lineas(self) -> List[int]:
+        """Offset en bytes del inicio de cada línea (más uno tras la última)"""
+        if self._inicios is None:
+            inicios = [0]
+            for linea in self.datos.split(b'\n'):
+                inicios.append(inicios[-1] + len(linea) + 1)
+            self._inicios = inicios
+        return self._inicios
+
+    def rango(self, inicio: int, fin: int) -> Tuple[int, int, str]:
+        """(offset, longitud, hash) de los bytes [inicio, fin)"""
+        fin = min(fin, len(self.datos))
+        if fin <= inicio:
+            return 0, 0, ''
+        return inicio, fin - inicio, hash_texto(memoryview(self.datos)[inicio:fin])
+
+    def rango_lineas(self, linea_inicio: int, linea_fin: int) -> Tuple[int, int, str]:
+        """(offset, longitud, hash) de las líneas linea_inicio..linea_fin (1-based, inclusivas)"""
+        inicios = self.inicios_lineas()
+        inicio = max(0, linea_inicio - 1)
+        fin = min(len(inicios) - 1, linea_fin)
+        if fin <= inicio:
+            return 0, 0, ''
+        return self.rango(inicios[inicio], inicios[fin])
+
+    def rango_caracteres(self, caracteres: int) -> Tuple[int, int, str]:
+        """(offset, longitud, hash) de los primeros caracteres del archivo"""
+        return self.rango(0, len(self.contenido[:caracteres].encode('utf-8')))
+
+
+class SnapshotFuentes:
+    """
+    Snapshot de las fuentes referenciadas por los registros: el texto de cada
+    archivo distinto (por archivo_id) una sola vez, concatenado, más un
+    índice JSON archivo_id -> offset/longitud en el snapshot. Con él los
+    registros pueden omitir codigo_limpio: el código se lee bajo demanda con
+    LectorFuentes a partir de archivo_id, offset_codigo y longitud_codigo.
+    """
+
+    def __init__(self, leer, archivo_snapshot: str = ARCHIVO_SNAPSHOT_FUENTES,
+                 archivo_indice: str = ARCHIVO_INDICE_FUENTES, avisar: Callable[[str], None] = print):
+        # leer(ruta) -> texto del archivo tal como lo lee el analyzer
+        self.leer = leer
+        self.avisar = avisar
+        self.archivo_snapshot = archivo_snapshot
+        self.archivo_indice = archivo_indice
+        self.archivos: Dict[str, Dict[str, Any]] = {}
+        # archivo_id que no se pudieron guardar (el archivo cambió desde su análisis)
+        self.descartados = set()
+        self.bytes_escritos = 0
+        self._snapshot = None
+
+    def abrir(self):
+        for archivo in (self.archivo_snapshot, self.archivo_indice):
+            os.makedirs(os.path.dirname(archivo) or '.', exist_ok=True)
+        self._snapshot = open(self.archivo_snapshot + '.tmp', 'wb')
+        return self
+
+    def guardar(self, archivo_id: str, ruta: str) -> bool:
+        """Añade el archivo al snapshot si no estaba; False si su contenido ya no coincide"""
+        archivo = self.archivos.get(archivo_id)
+        if archivo is not None:
+            if ruta not in archivo['rutas']:
+                archivo['rutas'].append(ruta)
+            return True
+        if not archivo_id or archivo_id in self.descartados:
+            return False
+        
+        try:
+            datos = self.leer(ruta).encode('utf-8')
+        except OSError:
+            datos = b''
+        if hash_texto(datos) != archivo_id:
+            self.avisar(f"⚠️  {ruta} cambió desde su análisis: su código queda en codigo_limpio")
+            self.descartados.add(archivo_id)
+            return False
+        
+        self.archivos[archivo_id] = {'offset': self.bytes_escritos, 'longitud': len(datos), 'rutas': [ruta]}
+        self._snapshot.write(datos)
+        self.bytes_escritos += len(datos)
+        return True
+
+    def referenciar(self, registro: Dict) -> Dict:
+        """El registro sin codigo_limpio si su código se puede leer del snapshot"""
+        if not registro['longitud_codigo'] or not self.guardar(registro['archivo_id'], registro['ruta']):
+            return registro
+        registro = Registro(registro)
+        registro['codigo_limpio'] = ''
+        return registro
+
+    def cerrar(self):
+        self._snapshot.close()
+        with open(self.archivo_indice + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({
+                'version_analyzer': VERSION_ANALYZER,
+                'snapshot': os.path.basename(self.archivo_snapshot),
+                'archivos': self.archivos
+            }, f, ensure_ascii=False)
+        os.replace(self.archivo_snapshot + '.tmp', self.archivo_snapshot)
+        os.replace(self.archivo_indice + '.tmp', self.archivo_indice)
+
+
+class LectorFuentes:
+    """
+    Lectura de código desde el snapshot de fuentes mapeado en memoria: cada
+    fragmento se decodifica solo cuando se pide, sin cargar el snapshot
+    """
+
+    def __init__(self, archivo_snapshot: str = ARCHIVO_SNAPSHOT_FUENTES,
+                 archivo_indice: str = ARCHIVO_INDICE_FUENTES):
+        with open(archivo_indice, 'r', encoding='utf-8') as f:
+            self.archivos: Dict[str, Dict[str, Any]] = json.load(f)['archivos']
+        self._archivo = open(archivo_snapshot, 'rb')
+        if os.fstat(self._archivo.fileno()).st_size:
+            self._mapa = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._mapa = b''
+
+    @classmethod
+    def abrir_si_existe(cls, archivo_snapshot: str = ARCHIVO_SNAPSHOT_FUENTES,
+                        archivo_indice: str = ARCHIVO_INDICE_FUENTES) -> Optional['LectorFuentes']:
+        if os.path.exists(archivo_snapshot) and os.path.exists(archivo_indice):
+            return cls(archivo_snapshot, archivo_indice)
+        return None
+
+    def codigo(self, archivo_id: str, offset: int, longitud: int, limite: Optional[int] = None) -> str:
+        """Código del rango [offset, offset + longitud) del archivo ('' si no está)"""
+        archivo = self.archivos.get(archivo_id)
+        if archivo is None or longitud <= 0 or offset < 0 or offset + longitud > archivo['longitud']:
+            return ''
+        inicio = archivo['offset'] + offset
+        codigo = self._mapa[inicio:inicio + longitud].decode('utf-8', 'ignore')
+        if limite is not None and len(codigo) > limite:
+            codigo = codigo[:limite] + '\n... (truncado)'
+        return codigo
+
+    def codigo_de(self, registro: Dict, limite: Optional[int] = None) -> str:
+        """codigo_limpio del registro, o su código leído del snapshot si lo omite"""
+        codigo = registro.get('codigo_limpio')
+        if isinstance(codigo, str) and codigo:
+            return codigo
+        try:
+            offset = int(registro.get('offset_codigo') or 0)
+            longitud = int(registro.get('longitud_codigo') or 0)
+        except (TypeError, ValueError):
+            return ''
+        return self.codigo(str(registro.get('archivo_id') or ''), offset, longitud, limite)
+
+    def cerrar(self):
+        if isinstance(self._mapa, mmap.mmap):
+            self._mapa.close()
+        self._archivo.close()
+
+
+# ==========================================
+# 🧩 ESCANEO POR SHARDS
+# ==========================================
+
+def shard_de(ruta_archivo: str, total_shards: int) -> int:
+    """
+    Shard (0..total_shards-1) de un archivo: hash estable de su ruta
+    normalizada, igual en cualquier máquina con el mismo checkout
+    """
+    ruta = Path(os.path.normpath(ruta_archivo)).as_posix()
+    return int(hashlib.sha256(ruta.encode('utf-8')).hexdigest()[:16], 16) % total_shards
+
+
+def parsear_shard(texto: str) -> Tuple[int, int]:
+    """'i/N' -> (i, N), con 0 <= i < N (tipo de argparse para --shard)"""
+    try:
+        indice, total = (int(parte) for parte in texto.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard inválido '{texto}': se espera i/N, p.ej. 0/4")
+    if total < 1 or not 0 <= indice < total:
+        raise argparse.ArgumentTypeError(f"shard inválido '{texto}': se requiere 0 <= i < N")
+    return indice, total
+
+
+def huella_listado(archivos: List[str]) -> str:
+    """Hash del listado completo de archivos: todos los shards deben partir del mismo"""
+    return hashlib.sha256('\n'.join(archivos).encode('utf-8')).hexdigest()[:16]
+
+
+def parciales_serializables(parciales: Dict[str, Any]) -> Dict[str, Any]:
+    """Estadísticas de un archivo listas para JSON (set -> lista ordenada)"""
+    estadisticas = dict(parciales)
+    estadisticas['tecnologias_detectadas'] = sorted(estadisticas.get('tecnologias_detectadas', []))
+    return estadisticas
+
+
+class ShardAnalisis:
+    """
+    Salida de un escaneo --shard i/N, en JSON lines: una cabecera con el
+    shard, el listado del que parte y los resúmenes de montaje de sus
+    archivos, y después una línea por archivo (posición en el listado
+    global, registros empaquetados y estadísticas) en orden de posición.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        with open(ruta, 'r', encoding='utf-8') as f:
+            try:
+                self.cabecera = json.loads(f.readline())
+            except ValueError:
+                raise ValueError(f"{ruta} no es la salida de un shard")
+        if 'shard' not in self.cabecera:
+            raise ValueError(f"{ruta} no es la salida de un shard")
+
+    @staticmethod
+    def ruta_salida(indice: int, total: int) -> str:
+        return os.path.join(CARPETA_SHARDS, f"shard_{indice}_de_{total}.jsonl")
+
+    @staticmethod
+    def escribir(ruta: str, cabecera: Dict[str, Any], entradas):
+        """Escribe la cabecera y las entradas (posición, ruta, registros, parciales)"""
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(json.dumps(cabecera, ensure_ascii=False) + '\n')
+            for posicion, ruta_archivo, registros, parciales in entradas:
+                f.write(json.dumps({
+                    'posicion': posicion,
+                    'ruta': ruta_archivo,
+                    'registros': empaquetar_registros(registros),
+                    'estadisticas': parciales_serializables(parciales)
+                }, ensure_ascii=False) + '\n')
+        os.replace(ruta + '.tmp', ruta)
+
+    def entradas(self):
+        """(posición, registros, parciales) de cada archivo, en orden"""
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            f.readline()
+            for linea in f:
+                entrada = json.loads(linea)
+                parciales = entrada['estadisticas']
+                parciales['tecnologias_detectadas'] = set(parciales.get('tecnologias_detectadas', []))
+                yield entrada['posicion'], desempaquetar_registros(entrada['registros']), parciales
+
+    @staticmethod
+    def validar(shards: List['ShardAnalisis'], version: Optional[str] = None) -> int:
+        """
+        Comprueba que los shards forman un escaneo completo (y, con version,
+        que los generó ese analyzer con los mismos límites y extractores);
+        devuelve el total de archivos
+        """
+        if not shards:
+            raise ValueError("No se indicó ningún shard")
+        primera = shards[0].cabecera
+        for shard in shards:
+            for clave in ('total_shards', 'listado', 'version'):
+                if shard.cabecera.get(clave) != primera.get(clave):
+                    raise ValueError(f"{shard.ruta} no es del mismo escaneo que {shards[0].ruta} ({clave})")
+        if version is not None and primera.get('version') != version:
+            raise ValueError(f"Los shards son de otra versión del analyzer o con otros límites "
+                             f"({primera.get('version')}, se esperaba {version})")
+        
+        total = primera['total_shards']
+        presentes = sorted(shard.cabecera['shard'] for shard in shards)
+        if presentes != list(range(total)):
+            faltan = sorted(set(range(total)) - set(presentes))
+            raise ValueError(f"Shards incompletos o repetidos: hay {presentes} de {total}"
+                             + (f", faltan {faltan}" if faltan else ""))
+        return primera['total_archivos']
+
+
+class EscritorRegistros:
+    """
+    Escribe los registros en CSV y JSON a medida que se producen, sin
+    acumularlos en memoria. En el JSON los registros van primero y al final
+    las estadísticas y metadatos, que solo se conocen al terminar. Se escribe
+    sobre archivos temporales que reemplazan a los finales al cerrar.
+    Con archivo_parquet se escribe además un Parquet tipado (requiere pyarrow)
+    en row groups de TAMANO_LOTE_PARQUET registros. Con snapshot las fuentes
+    se guardan aparte y los registros se escriben sin codigo_limpio.
+    """
+
+    def __init__(self, archivo_csv: str = ARCHIVO_SALIDA_CSV, archivo_json: str = ARCHIVO_SALIDA_JSON,
+                 archivo_parquet: Optional[str] = None, compresion: str = 'zstd',
+                 snapshot: Optional[SnapshotFuentes] = None, progreso: Optional['ReportadorProgreso'] = None):
+        self.archivo_csv = archivo_csv
+        self.archivo_json = archivo_json
+        self.archivo_parquet = archivo_parquet
+        self.compresion = compresion
+        self.snapshot = snapshot
+        self.progreso = progreso
+        self.total = 0
+        self._csv = None
+        self._json = None
+        self._writer = None
+        self._parquet = None
+        self._columnas: Dict[str, List] = {}
+
+    def abrir(self):
+        for archivo in (self.archivo_csv, self.archivo_json, self.archivo_parquet):
+            if archivo:
+                os.makedirs(os.path.dirname(archivo) or '.', exist_ok=True)
+        
+        if self.archivo_parquet:
+            if not cargar_pyarrow():
+                self._avisar("⚠️  pyarrow no está instalado: se omite la salida Parquet")
+                self.archivo_parquet = None
+            else:
+                self._parquet = pq.ParquetWriter(
+                    self.archivo_parquet + '.tmp', esquema_parquet(),
+                    compression=self.compresion
+                )
+                self._columnas = {campo: [] for campo in CAMPOS_CSV}
+
+        if self.snapshot is not None:
+            self.snapshot.abrir()
+
+        self._csv = open(self.archivo_csv + '.tmp', 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._csv, fieldnames=CAMPOS_CSV)
+        self._writer.writeheader()
+
+        self._json = open(self.archivo_json + '.tmp', 'w', encoding='utf-8')
+        self._json.write('{\n  "registros": [')
+        return self
+
+    def escribir(self, registros: List[Dict]):
+        """Escribe los registros de un archivo"""
+        if self.snapshot is not None:
+            registros = [self.snapshot.referenciar(registro) for registro in registros]
+        self._writer.writerows(registros)
+        for registro in registros:
+            self._json.write(',\n' if self.total else '\n')
+            self._json.write(textwrap.indent(json.dumps(dict(registro), indent=2, ensure_ascii=False), '    '))
+            self.total += 1
+        
+        if self._parquet is not None:
+            for campo, valores in self._columnas.items():
+                valores.extend(registro[campo] for registro in registros)
+            if len(self._columnas['tipo']) >= TAMANO_LOTE_PARQUET:
+                self._volcar_parquet()
+
+    def _volcar_parquet(self):
+        """Escribe las columnas acumuladas como un row group"""
+        if self._columnas['tipo']:
+            self._parquet.write_table(pa.table(self._columnas, schema=self._parquet.schema))
+            for valores in self._columnas.values():
+                valores.clear()
+
+    def cerrar(self, estadisticas: Dict[str, Any], metadatos: Dict[str, Any]):
+        """Completa el JSON y mueve ambos archivos a su ubicación final"""
+        self._json.write('\n  ]' if self.total else ']')
+        for clave, valor in (('estadisticas', estadisticas), ('metadatos', metadatos)):
+            bloque = json.dumps(valor, indent=2, ensure_ascii=False)
+            self._json.write(f',\n  "{clave}": ' + bloque.replace('\n', '\n  '))
+        self._json.write('\n}\n')
+
+        self._csv.close()
+        self._json.close()
+        os.replace(self.archivo_csv + '.tmp', self.archivo_csv)
+        os.replace(self.archivo_json + '.tmp', self.archivo_json)
+
+        self._avisar(f"\n📊 CSV generado: {self.archivo_csv}")
+        self._avisar(f"   Total registros: {self.total}")
+        self._avisar(f"📋 JSON generado: {self.archivo_json}")
+        
+        if self._parquet is not None:
+            self._volcar_parquet()
+            self._parquet.close()
+            os.replace(self.archivo_parquet + '.tmp', self.archivo_parquet)
+            self._avisar(f"🧱 Parquet generado: {self.archivo_parquet} (compresión: {self.compresion})")
+        else:
+            # Un Parquet de una ejecución anterior ya no corresponde al CSV
+            # (csv_to_embeddings lo leería en su lugar)
+            obsoleto = os.path.splitext(self.archivo_csv)[0] + '.parquet'
+            if os.path.exists(obsoleto):
+                os.remove(obsoleto)
+                self._avisar(f"🧹 Parquet anterior eliminado: {obsoleto}")
+        
+        if self.snapshot is not None:
+            self.snapshot.cerrar()
+            self._avisar(f"🗂️  Snapshot de fuentes: {self.snapshot.archivo_snapshot} "
+                         f"({len(self.snapshot.archivos)} archivos, "
+                         f"{self.snapshot.bytes_escritos / 1024 / 1024:.1f} MB)")
+
+    def _avisar(self, mensaje: str):
+        if self.progreso is None:
+            print(mensaje)
+        else:
+            self.progreso.avisar(mensaje, NIVEL_RESUMEN)
+
+
+class PerfilAnalisis:
+    """
+    Tiempos del análisis (modo --perfil): segundos acumulados por fase y
+    segundos de cada archivo analizado. Con workers las fases por archivo se
+    miden en cada proceso y se suman aquí, así que pueden superar al total.
+    Cada extractor es una fase, y además acumula archivos y registros para
+    saber su coste por archivo.
+    """
+
+    # Orden en el que se muestran las fases (las de otros extractores, al final)
+    FASES = [
+        'lectura', 'parseo_ast', 'metadatos', 'endpoints', 'clases', 'funciones',
+        'configuraciones', 'dependencias', 'cache', 'montajes', 'salida'
+    ]
+
+    def __init__(self):
+        self.fases: Dict[str, float] = {}
+        self.archivos: Dict[str, float] = {}
+        # extractor -> {'segundos', 'archivos', 'registros'}
+        self.extractores: Dict[str, Dict[str, Any]] = {}
+        self.total = 0.0
+        self._ultima_marca = time.perf_counter()
+
+    def marcar(self, fase: str) -> float:
+        """Suma a la fase el tiempo transcurrido desde la marca anterior (y lo devuelve)"""
+        ahora = time.perf_counter()
+        segundos = ahora - self._ultima_marca
+        self.fases[fase] = self.fases.get(fase, 0.0) + segundos
+        self._ultima_marca = ahora
+        return segundos
+
+    def contar_extractor(self, nombre: str, segundos: float, registros: int, archivos: int = 1):
+        coste = self.extractores.setdefault(nombre, {'segundos': 0.0, 'archivos': 0, 'registros': 0})
+        coste['segundos'] += segundos
+        coste['archivos'] += archivos
+        coste['registros'] += registros
+
+    def fases_ordenadas(self) -> List[str]:
+        return [f for f in self.FASES if f in self.fases] + sorted(f for f in self.fases if f not in self.FASES)
+
+    def reiniciar_marca(self):
+        self._ultima_marca = time.perf_counter()
+
+    @contextlib.contextmanager
+    def fase(self, fase: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[fase] = self.fases.get(fase, 0.0) + time.perf_counter() - inicio
+
+    def fusionar(self, ruta_archivo: str, parcial: Dict[str, Any]):
+        """Añade el perfil de un archivo (calculado aquí o en un worker)"""
+        self.archivos[ruta_archivo] = parcial['segundos']
+        for fase, segundos in parcial['fases'].items():
+            self.fases[fase] = self.fases.get(fase, 0.0) + segundos
+        for nombre, coste in parcial.get('extractores', {}).items():
+            self.contar_extractor(nombre, coste['segundos'], coste['registros'], coste['archivos'])
+
+    def mas_lentos(self, top: int) -> List[Tuple[str, float]]:
+        return sorted(self.archivos.items(), key=lambda x: x[1], reverse=True)[:top]
+
+    def como_dict(self, top: int = 10) -> Dict[str, Any]:
+        """Bloque 'perfil' de las estadísticas"""
+        return {
+            'total_segundos': round(self.total, 4),
+            'fases_segundos': {
+                fase: round(self.fases[fase], 4) for fase in self.fases_ordenadas()
+            },
+            'extractores': {
+                nombre: {
+                    'segundos': round(coste['segundos'], 4),
+                    'archivos': coste['archivos'],
+                    'registros': coste['registros'],
+                    'ms_por_archivo': round(1000 * coste['segundos'] / coste['archivos'], 4) if coste['archivos'] else 0.0
+                }
+                for nombre, coste in self.extractores.items()
+            },
+            'archivos_analizados': len(self.archivos),
+            'segundos_por_archivo_promedio': round(
+                sum(self.archivos.values()) / len(self.archivos), 4
+            ) if self.archivos else 0.0,
+            'archivos_mas_lentos': [
+                {'ruta': ruta, 'segundos': round(segundos, 4)}
+                for ruta, segundos in self.mas_lentos(top)
+            ]
+        }
+
+    def mostrar(self, top: int = 10):
+        """Tabla de fases y archivos más lentos"""
+        print("\n" + "="*80)
+        print("⏱️  PERFIL DEL ANÁLISIS")
+        print("="*80)
+        print(f"\n   Tiempo total del escaneo: {self.total:.3f} s")
+        
+        suma = sum(self.fases.values()) or 1.0
+        print(f"\n   {'Fase':<18} {'Segundos':>10} {'%':>7}")
+        print(f"   {'-'*18} {'-'*10} {'-'*7}")
+        for fase in self.fases_ordenadas():
+            print(f"   {fase:<18} {self.fases[fase]:>10.3f} {100 * self.fases[fase] / suma:>6.1f}%")
+        
+        if self.extractores:
+            print(f"\n   {'Extractor':<18} {'Segundos':>10} {'Archivos':>9} {'Registros':>10} {'ms/archivo':>11}")
+            print(f"   {'-'*18} {'-'*10} {'-'*9} {'-'*10} {'-'*11}")
+            for nombre, coste in self.extractores.items():
+                por_archivo = 1000 * coste['segundos'] / coste['archivos'] if coste['archivos'] else 0.0
+                print(f"   {nombre:<18} {coste['segundos']:>10.3f} {coste['archivos']:>9} "
+                      f"{coste['registros']:>10} {por_archivo:>11.3f}")
+        
+        if self.archivos:
+            print(f"\n   Archivos analizados: {len(self.archivos)} "
+                  f"(promedio {sum(self.archivos.values()) / len(self.archivos) * 1000:.1f} ms)")
+            print(f"\n   {'Archivo más lento':<60} {'Segundos':>10}")
+            print(f"   {'-'*60} {'-'*10}")
+            for ruta, segundos in self.mas_lentos(top):
+                if len(ruta) > 58:
+                    ruta = '...' + ruta[-55:]
+                print(f"   {ruta:<60} {segundos:>10.3f}")
+
+
+# ==========================================
+# 🚧 FILTRO DE ARCHIVOS GRANDES Y GENERADOS
+# ==========================================
+
+MOTIVOS_FILTRO = {
+    'tamano': "supera el límite de tamaño",
+    'lineas': "supera el límite de líneas",
+    'generado': "código generado",
+    'lineas_largas': "líneas demasiado largas, generado o minificado"
+}
+
+
+class LimitesArchivo:
+    """
+    Límites del filtro previo a parsear un archivo. Los que no pasan se
+    analizan en superficie (un registro FILE, sin AST) o se omiten, así el
+    tiempo de escaneo no depende de stubs de protobuf o clientes generados.
+    """
+
+    def __init__(self, max_bytes: int = LIMITE_BYTES_ARCHIVO, max_lineas: int = LIMITE_LINEAS_ARCHIVO,
+                 max_longitud_linea: int = LIMITE_LONGITUD_LINEA, detectar_generados: bool = True,
+                 omitir: bool = False):
+        self.max_bytes = max_bytes
+        self.max_lineas = max_lineas
+        self.max_longitud_linea = max_longitud_linea
+        self.detectar_generados = detectar_generados
+        # False: registro FILE superficial; True: el archivo no genera registros
+        self.omitir = omitir
+        self._patron_linea_larga = (
+            re.compile(rb'^[^\n]{%d}' % (max_longitud_linea + 1), re.MULTILINE) if max_longitud_linea else None
+        )
+
+    def __getstate__(self):
+        # El patrón compilado se reconstruye en cada worker
+        return (self.max_bytes, self.max_lineas, self.max_longitud_linea,
+                self.detectar_generados, self.omitir)
+
+    def __setstate__(self, estado):
+        self.__init__(*estado)
+
+    def huella(self) -> str:
+        """Parte de la versión de la cache: con otros límites cambia el análisis"""
+        return '{}-{}-{}-{}-{}'.format(*self.__getstate__())
+
+    def inspeccionar(self, datos, tamano: int) -> Optional[str]:
+        """
+        Motivo de MOTIVOS_FILTRO por el que el archivo no se analiza a fondo,
+        o None. datos es el contenido en bytes o un mmap del archivo: la
+        cabecera y las búsquedas se hacen sobre el buffer, sin decodificarlo.
+        """
+        if self.max_bytes and tamano > self.max_bytes:
+            return 'tamano'
+        # Con menos bytes que el límite de líneas no puede superarlo
+        if self.max_lineas and tamano > self.max_lineas and contar_lineas(datos) > self.max_lineas:
+            return 'lineas'
+        if self.detectar_generados:
+            cabecera = bytes(datos[:BYTES_CABECERA_GENERADO]).lower()
+            if any(marca in cabecera for marca in MARCAS_GENERADO):
+                return 'generado'
+            if self._patron_linea_larga is not None and tamano > self.max_longitud_linea \
+                    and self._patron_linea_larga.search(datos):
+                return 'lineas_largas'
+        return None
+
+
+def vista_previa(contenido: str) -> str:
+    """Inicio del archivo para el codigo_limpio de los registros FILE"""
+    return contenido[:CARACTERES_VISTA_PREVIA].strip() + ('...' if len(contenido) > CARACTERES_VISTA_PREVIA else '')
+
+
+def contar_lineas(datos, bloque: int = 1024 * 1024) -> int:
+    """Líneas de un buffer (bytes o mmap), por bloques"""
+    total = 0
+    for inicio in range(0, len(datos), bloque):
+        total += datos[inicio:inicio + bloque].count(b'\n')
+    return total + 1
+
+
+# ==========================================
+# 📣 PROGRESO
+# ==========================================
+
+class ReportadorProgreso:
+    """
+    Salida del análisis por consola según el nivel (NIVELES_PROGRESO), con
+    una barra de progreso que se redibuja como mucho cada INTERVALO_BARRA
+    segundos (una línea cada INTERVALO_BARRA_LOG si la salida no es una
+    terminal) y, con archivo_eventos, un evento JSONL por archivo analizado.
+    """
+
+    def __init__(self, nivel: int = NIVEL_RESUMEN, archivo_eventos: Optional[str] = None):
+        self.nivel = nivel
+        self.archivo_eventos = archivo_eventos
+        self._eventos = None
+        if archivo_eventos:
+            os.makedirs(os.path.dirname(archivo_eventos) or '.', exist_ok=True)
+            # Por líneas: el log se puede seguir (tail -f) mientras avanza el análisis
+            self._eventos = open(archivo_eventos, 'a', encoding='utf-8', buffering=1)
+        # La barra va a stderr: stdout queda para los mensajes
+        self._terminal = sys.stderr.isatty()
+        self._intervalo = INTERVALO_BARRA if self._terminal else INTERVALO_BARRA_LOG
+        self.total = 0
+        self.hechos = 0
+        self._inicio = 0.0
+        self._ultimo_dibujo = 0.0
+        self._barra_visible = False
+
+    def muestra(self, nivel: int) -> bool:
+        return self.nivel >= nivel
+
+    def avisar(self, mensaje: str, nivel: int = NIVEL_RESUMEN):
+        if self.nivel >= nivel:
+            self._borrar_barra()
+            print(mensaje)
+
+    # --- Barra de progreso (solo en nivel resumen: en detallado ya hay una línea por archivo)
+
+    def iniciar(self, total: int):
+        self.total = total
+        self.hechos = 0
+        self._inicio = self._ultimo_dibujo = time.perf_counter()
+
+    def avanzar(self, cantidad: int = 1):
+        self.hechos += cantidad
+        if self.nivel != NIVEL_RESUMEN or not self.total:
+            return
+        ahora = time.perf_counter()
+        if ahora - self._ultimo_dibujo >= self._intervalo:
+            self._ultimo_dibujo = ahora
+            self._dibujar(ahora)
+
+    def terminar(self):
+        """Deja la barra completa en su línea"""
+        if self.nivel == NIVEL_RESUMEN and self.total:
+            self._dibujar(time.perf_counter())
+            if self._barra_visible:
+                sys.stderr.write('\n')
+                self._barra_visible = False
+        self.total = 0
+
+    def _dibujar(self, ahora: float):
+        proporcion = self.hechos / self.total
+        segundos = ahora - self._inicio
+        velocidad = self.hechos / segundos if segundos > 0 else 0.0
+        llenos = int(ANCHO_BARRA * proporcion)
+        texto = (f"⏳ [{'#' * llenos}{'-' * (ANCHO_BARRA - llenos)}] {self.hechos}/{self.total} "
+                 f"archivos ({100 * proporcion:.0f}%) {velocidad:.1f} archivos/s")
+        if self._terminal:
+            sys.stderr.write('\r' + texto)
+            self._barra_visible = True
+        else:
+            sys.stderr.write(texto + '\n')
+        sys.stderr.flush()
+
+    def _borrar_barra(self):
+        if self._barra_visible:
+            sys.stderr.write('\r' + ' ' * (ANCHO_BARRA + 60) + '\r')
+            sys.stderr.flush()
+            self._barra_visible = False
+
+    # --- Eventos JSONL
+
+    def evento(self, tipo: str, **datos):
+        if self._eventos is None:
+            return
+        self._eventos.write(json.dumps({'ts': round(time.time(), 3), 'evento': tipo, **datos},
+                                       ensure_ascii=False) + '\n')
+
+    def archivo(self, ruta_archivo: str, registros: List[Dict], parciales: Dict[str, Any]):
+        """Evento de un archivo: registros por categoría y si falló o se filtró"""
+        if self._eventos is None:
+            return
+        categorias: Dict[str, int] = {}
+        for registro in registros:
+            categorias[registro['categoria']] = categorias.get(registro['categoria'], 0) + 1
+        # La ruta como la guardan los registros (app/main.py, no ./app/main.py)
+        datos = {'ruta': str(Path(ruta_archivo)), 'registros': len(registros), 'categorias': categorias}
+        filtrado = parciales.get('archivos_filtrados')
+        if parciales.get('archivos_con_errores'):
+            datos['estado'] = 'error'
+        elif filtrado:
+            datos['estado'] = 'filtrado'
+            datos['motivo'] = next(iter(filtrado))
+        else:
+            datos['estado'] = 'ok'
+        self.evento('archivo', **datos)
+
+    def cerrar(self):
+        self._borrar_barra()
+        if self._eventos is not None:
+            self._eventos.close()
+            self._eventos = None
+
+
+# ==========================================
+# 🧩 REGISTRO DE EXTRACTORES
+# ==========================================
+
+class ArchivoEnAnalisis:
+    """Lo que procesar_archivo calcula una vez por archivo y comparten los extractores"""
+
+    __slots__ = ('ruta', 'contenido', 'analisis', 'tipo', 'tecnologias', 'imports', 'complejidad',
+                 'include_routers', 'endpoints')
+
+    def __init__(self, ruta: Path, contenido: str, analisis: Optional['AnalisisAST'], tipo: str,
+                 tecnologias: List[str], imports: List[str], complejidad: int, include_routers: List):
+        self.ruta = ruta
+        self.contenido = contenido
+        self.analisis = analisis
+        self.tipo = tipo
+        self.tecnologias = tecnologias
+        self.imports = imports
+        self.complejidad = complejidad
+        self.include_routers = include_routers
+        # Endpoints del archivo (los deja el extractor 'endpoints'; las
+        # funciones que ya son endpoints no se repiten como FUNCTION)
+        self.endpoints: List[Dict] = []
+
+
+# nombre -> extractor(analyzer, archivo) -> registros. Se ejecutan en el
+# orden de registro; los de fuera del módulo se añaden con registrar_extractor
+EXTRACTORES: Dict[str, Callable[['EnhancedEndpointAnalyzer', ArchivoEnAnalisis], List[Dict]]] = {}
+
+
+def registrar_extractor(nombre: str):
+    """Decorador que añade un extractor al registro (activo por defecto)"""
+    def registrar(extractor):
+        EXTRACTORES[nombre] = extractor
+        return extractor
+    return registrar
+
+
+def seleccionar_extractores(activos: Optional[List[str]] = None,
+                            desactivados: Optional[List[str]] = None) -> List[str]:
+    """Nombres de los extractores a ejecutar, en el orden del registro"""
+    desconocidos = [n for n in (activos or []) + (desactivados or []) if n not in EXTRACTORES]
+    if desconocidos:
+        raise ValueError(f"Extractores desconocidos: {', '.join(desconocidos)} "
+                         f"(disponibles: {', '.join(EXTRACTORES)})")
+    return [
+        nombre for nombre in EXTRACTORES
+        if (activos is None or nombre in activos) and nombre not in (desactivados or [])
+    ]
+
+
 class EnhancedEndpointAnalyzer:
-    def __init__(self, ruta_proyecto: str = "."):
+    def __init__(self, ruta_proyecto: str = ".", usar_mmap: bool = True, perfilar: bool = False,
+                 limites: Optional[LimitesArchivo] = None, extractores: Optional[List[str]] = None,
+                 progreso: Optional[ReportadorProgreso] = None):
         self.ruta_proyecto = ruta_proyecto
-        self.estadisticas = {
+        self.usar_mmap = usar_mmap
+        # Mensajes, barra y eventos (con NIVEL_SILENCIOSO no se escribe nada por consola)
+        self.progreso = progreso or ReportadorProgreso()
+        self.limites = limites or LimitesArchivo()
+        # Extractores a ejecutar por archivo (por defecto todos los registrados)
+        self.extractores = seleccionar_extractores(extractores)
+        # Tiempos por fase y por archivo (solo con perfilar=True)
+        self.perfil: Optional[PerfilAnalisis] = PerfilAnalisis() if perfilar else None
+        self.perfil_top = 10
+        self.estadisticas = self.estadisticas_vacias()
+        self.registros = []
+        # Resumen de los registros emitidos (para no depender de self.registros
+        # cuando se escriben en streaming)
+        self.resumen_registros = {
+            'total': 0,
+            'categorias': {},
+            'ejemplos': {'ENDPOINT': [], 'CLASS': [], 'FUNCTION': []}
+        }
+        self.routers_padre = {}
+        # Tabla de routers del archivo en proceso: (contenido, TablaRouters)
+        self._tabla_routers: Optional[Tuple[str, TablaRouters]] = None
+        # Campos comunes a los registros del archivo en proceso
+        self._contexto_archivo: Optional[ContextoArchivo] = None
+        # Archivo en proceso: (ruta, contenido) y sus líneas, que se generan
+        # una sola vez al primer extraer_codigo_elemento
+        self._archivo_actual: Optional[Tuple[Path, str]] = None
+        self._lineas_actuales: Optional[List[str]] = None
+        # Texto codificado del archivo en proceso, para el índice de fuentes
+        self._fuente_actual: Optional[FuenteArchivo] = None
+        # Resumen de montaje del último archivo procesado (ver GrafoMontajes)
+        self._resumen_montaje: Optional[Dict[str, Any]] = None
+        
+    def version_analisis(self) -> str:
+        """Versión de la cache y de los shards: la del código, los límites del filtro y los extractores"""
+        return f"{version_cache()}+{self.limites.huella()}+{','.join(self.extractores)}"
+    
+    @staticmethod
+    def estadisticas_vacias() -> Dict[str, Any]:
+        """Bloque de estadísticas inicial"""
+        return {
             'total_archivos': 0,
             'archivos_procesados': 0,
             'archivos_con_errores': 0,
@@ -60,32 +1693,259 @@ class EnhancedEndpointAnalyzer:
             'clases_encontradas': 0,
             'funciones_encontradas': 0,
             'routers_detectados': 0,
-            'routers_incluidos': 0
+            'routers_incluidos': 0,
+            # Archivos no analizados a fondo, por motivo (ver LimitesArchivo)
+            'archivos_filtrados': {}
         }
-        self.registros = []
-        self.routers_padre = {}
+    
+    def fusionar_estadisticas(self, parciales: Dict[str, Any]):
+        """
+        Suma las estadísticas de un archivo (o de otro analyzer) a las globales.
+        Fusionar en el orden de los archivos da el mismo resultado que el escaneo serie.
+        """
+        for clave, valor in parciales.items():
+            actual = self.estadisticas.get(clave)
+            if isinstance(actual, set):
+                actual.update(valor)
+            elif isinstance(actual, dict):
+                for k, v in valor.items():
+                    actual[k] = actual.get(k, 0) + v
+            elif isinstance(actual, (int, float)):
+                self.estadisticas[clave] = actual + valor
+            else:
+                self.estadisticas[clave] = valor
+    
+    def emitir_registros(self, registros: List[Dict], sink: Optional[EscritorRegistros] = None):
+        """Entrega los registros de un archivo al sink (o a self.registros) y actualiza el resumen"""
+        if sink is not None:
+            sink.escribir(registros)
+        else:
+            self.registros.extend(registros)
+        
+        resumen = self.resumen_registros
+        resumen['total'] += len(registros)
+        for registro in registros:
+            categoria = registro['categoria']
+            resumen['categorias'][categoria] = resumen['categorias'].get(categoria, 0) + 1
+            ejemplos = resumen['ejemplos'].get(categoria)
+            if ejemplos is not None and len(ejemplos) < 10:
+                ejemplos.append(registro)
+    
+    def analizar_archivo_aislado(self, ruta_archivo: str, contenido: Optional[str] = None
+                                 ) -> Tuple[List[Dict], Dict[str, Any], Optional[Dict]]:
+        """
+        Procesa un archivo y devuelve sus registros junto con SOLO las
+        estadísticas que aporta ese archivo (sin tocar las globales) y su
+        resumen de montaje de routers. Con contenido se analiza ese texto
+        (p.ej. otra revisión del archivo) en lugar de leerlo del disco.
+        """
+        globales = self.estadisticas
+        self.estadisticas = self.estadisticas_vacias()
+        self._resumen_montaje = None
+        perfil_global = self.perfil
+        if perfil_global is not None:
+            # Perfil propio del archivo; viaja en las estadísticas parciales
+            # (también desde los workers) bajo la clave 'perfil'
+            self.perfil = PerfilAnalisis()
+        try:
+            registros = self.procesar_archivo(ruta_archivo, contenido)
+            if perfil_global is not None:
+                self.estadisticas['perfil'] = {
+                    'segundos': sum(self.perfil.fases.values()),
+                    'fases': self.perfil.fases,
+                    'extractores': self.perfil.extractores
+                }
+            return registros, self.estadisticas, self._resumen_montaje
+        finally:
+            self.estadisticas = globales
+            self.perfil = perfil_global
+    
+    def avisar(self, mensaje: str, nivel: int = NIVEL_DETALLADO):
+        """Mensaje del análisis (por defecto, solo en el nivel detallado)"""
+        self.progreso.avisar(mensaje, nivel)
+    
+    def _marcar(self, fase: str):
+        """Cierra una fase del archivo en proceso (sin coste si no se perfila)"""
+        if self.perfil is not None:
+            self.perfil.marcar(fase)
+    
+    def _marcar_extractor(self, nombre: str, registros: int):
+        """Cierra la fase de un extractor y acumula su coste en el archivo (solo si se perfila)"""
+        if self.perfil is not None:
+            self.perfil.contar_extractor(nombre, self.perfil.marcar(nombre), registros)
+    
+    def _fase(self, fase: str):
+        """Contexto que mide una fase del escaneo (nullcontext si no se perfila)"""
+        return self.perfil.fase(fase) if self.perfil is not None else contextlib.nullcontext()
+    
+    def extraer_resumen_montaje(self, ruta_archivo: str, contenido: str,
+                                analisis: Optional[AnalisisAST]) -> Dict[str, Any]:
+        """Routers declarados, nombres importados e include_router del archivo"""
+        resumen = {
+            'modulo': '',
+            'routers': sorted({r['nombre'] for r in self.obtener_tabla_routers(contenido).routers}),
+            'importados': {},
+            # Imports relativos tal como están escritos: se resuelven según la
+            # ruta del archivo (ver ubicar_resumen)
+            'relativos': {},
+            'includes': []
+        }
+        if analisis is not None:
+            for local, (origen, nombre, nivel) in analisis.nombres_importados.items():
+                if nivel:
+                    resumen['relativos'][local] = [origen, nombre, nivel]
+                else:
+                    resumen['importados'][local] = [origen, nombre]
+        self.ubicar_resumen(resumen, ruta_archivo)
+        if analisis is None:
+            return resumen
         
-    def extraer_endpoints_completos(self, contenido: str, nombre_archivo: str = "") -> List[Dict]:
+        for llamada in analisis.includes_router:
+            if not llamada.args:
+                continue
+            prefix = ''
+            for kw in llamada.keywords:
+                if kw.arg == 'prefix' and isinstance(kw.value, ast.Constant) and isinstance(kw.value.value, str):
+                    prefix = kw.value.value
+            resumen['includes'].append({
+                'padre': nombre_punteado(llamada.func.value),
+                'router': nombre_punteado(llamada.args[0]),
+                'prefix': prefix,
+                'linea': llamada.lineno
+            })
+        
+        return resumen
+    
+    def ubicar_resumen(self, resumen: Dict[str, Any], ruta_archivo: str):
+        """Módulo del resumen e imports relativos resueltos desde el paquete de ruta_archivo"""
+        modulo = modulo_relativo(ruta_archivo, self.ruta_proyecto)
+        resumen['modulo'] = modulo
+        # Base para imports relativos: el paquete del módulo
+        es_paquete = Path(ruta_archivo).name == '__init__.py'
+        paquete = modulo.split('.') if es_paquete else modulo.split('.')[:-1]
+        for local, (origen, nombre, nivel) in resumen['relativos'].items():
+            base = paquete[:len(paquete) - (nivel - 1)] if nivel > 1 else paquete
+            resumen['importados'][local] = ['.'.join(base + ([origen] if origen else [])), nombre]
+    
+    def resumen_montaje_de(self, ruta_archivo: str, contenido: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Solo el resumen de montaje del archivo (el mismo de analizar_archivo_aislado)"""
+        if contenido is None:
+            contenido = self.leer_contenido(ruta_archivo)
+        if not contenido.strip():
+            return None
+        return self.extraer_resumen_montaje(ruta_archivo, contenido, self.analizar_ast(contenido))
+    
+    def resumen_paquete(self, modulo: str) -> Optional[Dict[str, Any]]:
+        """Resumen de un __init__.py (no se procesa como archivo, pero re-exporta routers)"""
+        ruta_init = os.path.join(self.ruta_proyecto, *modulo.split('.'), '__init__.py')
+        if not os.path.isfile(ruta_init):
+            return None
+        try:
+            contenido = self.leer_contenido(ruta_init)
+            analisis = AnalisisAST(ast.parse(contenido))
+        except (OSError, SyntaxError, ValueError, RecursionError):
+            return None
+        return self.extraer_resumen_montaje(ruta_init, contenido, analisis)
+    
+    def aplicar_montajes(self, registros: List[Dict], prefijos: Dict[Tuple[str, str], str]):
+        """Antepone a los endpoints el prefix con el que otros archivos montan su router"""
+        if not prefijos:
+            return
+        modulos = {}
+        for registro in registros:
+            if registro['categoria'] != 'ENDPOINT':
+                continue
+            ruta = registro['ruta']
+            if ruta not in modulos:
+                modulos[ruta] = modulo_relativo(ruta, self.ruta_proyecto)
+            prefijo = prefijos.get((modulos[ruta], registro['router_padre']))
+            if not prefijo:
+                continue
+            registro['endpoint'] = unir_rutas(prefijo, registro['endpoint'])
+            registro['descripcion'] = f"{registro['metodo_http']} {registro['endpoint']}"
+            if registro['summary']:
+                registro['descripcion'] += f" - {registro['summary']}"
+    
+    def analizar_ast(self, contenido: str) -> Optional[AnalisisAST]:
+        """Parsea el archivo una única vez; None si el AST no es válido"""
+        try:
+            return AnalisisAST(ast.parse(contenido))
+        except (SyntaxError, ValueError, RecursionError) as e:
+            self.avisar(f"    ⚠️  Error parseando AST, se usa fallback regex: {e}")
+            return None
+    
+    def extraer_endpoints_completos(self, contenido: str, nombre_archivo: str = "",
+                                    analisis: Optional[AnalisisAST] = None) -> List[Dict]:
         """
-        Extrae endpoints línea por línea de forma DINÁMICA
+        Extrae endpoints de forma DINÁMICA
         Captura TODOS los formatos de decoradores de endpoints
+        Con AST disponible se leen directamente del árbol; si el archivo no
+        parsea se usa el fallback línea por línea con regex
+        """
+        self.avisar(f"  📄 Analizando: {nombre_archivo}")
+        
+        if not PATRON_PREFILTRO_ENDPOINT.search(contenido):
+            return []
+        
+        if analisis is not None:
+            endpoints = self.extraer_endpoints_ast(contenido, analisis)
+        else:
+            endpoints = self.extraer_endpoints_regex(contenido)
+        
+        for endpoint in endpoints:
+            # Actualizar estadísticas
+            metodo_http = endpoint['metodo']
+            self.estadisticas['endpoints_por_metodo'][metodo_http] = \
+                self.estadisticas['endpoints_por_metodo'].get(metodo_http, 0) + 1
+        
+        if endpoints:
+            self.avisar(f"    ✅ Total endpoints encontrados: {len(endpoints)}")
+        
+        return endpoints
+    
+    def extraer_endpoints_ast(self, contenido: str, analisis: AnalisisAST) -> List[Dict]:
+        """
+        Endpoints desde el AST: decorator_list, argumentos con nombre del
+        decorador (response_model, status_code, tags, summary...) y end_lineno
+        de la función, sin ventanas de líneas ni decoradores cosidos a mano
         """
-        endpoints = []
         lineas = contenido.split('\n')
         
-        # Patrones para capturar diferentes formatos de endpoints
-        patrones_endpoints = [
-            # @router.get("/path")
-            r'@(\w+)\.(get|post|put|delete|patch|options|head|trace)\s*\(\s*["\']([^"\']+)["\']',
-            # @router.get("/path/{param}")
-            r'@(\w+)\.(get|post|put|delete|patch|options|head|trace)\s*\(\s*["\']([^"\'{}]+(?:\{[^}]+\})*[^"\']*)["\']',
-            # @app.route("/path", methods=["GET"])
-            r'@(\w+)\.route\s*\(\s*["\']([^"\']+)["\'][^)]*methods\s*=\s*\[\"([^\"]+)\"',
-        ]
+        candidatos = []
+        for node in analisis.funciones:
+            for posicion, dec in enumerate(node.decorator_list):
+                endpoint = decorador_endpoint(dec)
+                if endpoint:
+                    candidatos.append((dec.lineno, posicion, node, endpoint))
+        candidatos.sort(key=lambda c: c[0])
         
-        endpoints_procesados = set()
+        endpoints = []
+        for linea, posicion, node, (router_obj, metodo_http, ruta_endpoint) in candidatos:
+            decoradores = ['@' + ast.unparse(d) for d in node.decorator_list]
+            funcion_info = {
+                'nombre': node.name,
+                'parametros': ast.unparse(node.args),
+                'es_async': isinstance(node, ast.AsyncFunctionDef),
+                'linea_inicio': node.lineno,
+                'linea_fin': node.end_lineno,
+                'hash_simbolo': hash_simbolo(node),
+                'codigo_completo': '\n'.join(
+                    l.rstrip() for l in lineas[node.lineno - 1:node.end_lineno]
+                )
+            }
+            endpoints.append(self.construir_endpoint(
+                contenido, linea - 1, metodo_http, ruta_endpoint, funcion_info,
+                decoradores[posicion], decoradores[:posicion],
+                self.extraer_info_decorador_ast(node.decorator_list[posicion])
+            ))
         
-        print(f"  📄 Analizando: {nombre_archivo}")
+        return endpoints
+    
+    def extraer_endpoints_regex(self, contenido: str) -> List[Dict]:
+        """Fallback: endpoints línea por línea con regex (archivos que no parsean)"""
+        endpoints = []
+        endpoints_procesados = set()
+        lineas = contenido.split('\n')
         
         for i, linea in enumerate(lineas):
             linea_limpia = linea.strip()
@@ -93,32 +1953,20 @@ class EnhancedEndpointAnalyzer:
             if not linea_limpia.startswith('@'):
                 continue
             
-            # Probar todos los patrones
-            endpoint_match = None
-            metodo_http = None
-            ruta_endpoint = None
-            router_obj = None
-            
-            for patron in patrones_endpoints:
-                match = re.search(patron, linea_limpia, re.IGNORECASE)
-                if match:
-                    if 'route' in patron:
-                        # Flask: @app.route("/path", methods=["GET"])
-                        router_obj = match.group(1)
-                        ruta_endpoint = match.group(2)
-                        metodo_http = match.group(3).upper()
-                    else:
-                        # FastAPI: @router.get("/path")
-                        router_obj = match.group(1)
-                        metodo_http = match.group(2).upper()
-                        ruta_endpoint = match.group(3)
-                    
-                    endpoint_match = match
-                    break
-            
+            endpoint_match = PATRON_ENDPOINT.search(linea_limpia)
             if not endpoint_match:
                 continue
             
+            router_obj = endpoint_match.group(1)
+            if endpoint_match.group(2):
+                # FastAPI: @router.get("/path")
+                metodo_http = endpoint_match.group(2).upper()
+                ruta_endpoint = endpoint_match.group(3)
+            else:
+                # Flask: @app.route("/path", methods=["GET"])
+                ruta_endpoint = endpoint_match.group(4)
+                metodo_http = endpoint_match.group(5).upper()
+            
             # Clave única para evitar duplicados
             endpoint_key = f"{metodo_http}:{ruta_endpoint}:{i}"
             if endpoint_key in endpoints_procesados:
@@ -126,8 +1974,6 @@ class EnhancedEndpointAnalyzer:
             
             endpoints_procesados.add(endpoint_key)
             
-            print(f"    🎯 Línea {i+1}: {metodo_http:6} {ruta_endpoint}")
-            
             # Recolectar decoradores previos
             decoradores_previos = []
             j = i - 1
@@ -149,6 +1995,7 @@ class EnhancedEndpointAnalyzer:
                     'parametros': '',
                     'return_type': '',
                     'linea_inicio': i + 1,
+                    'linea_fin': i + 1,
                     'es_async': False,
                     'codigo_completo': linea_limpia
                 }
@@ -163,66 +2010,68 @@ class EnhancedEndpointAnalyzer:
                 if k < len(lineas):
                     decorador_completo += ' ' + lineas[k].strip()
             
-            # Extraer información del decorador
-            info_decorador = self.extraer_info_decorador_mejorado(decorador_completo)
-            
-            # Analizar parámetros
-            parametros_info = self.extraer_parametros_detallados(funcion_info['parametros'])
-            
-            # Detectar router y prefix
-            router_info = self.detectar_router_y_prefix(contenido, i)
-            
-            # Construir ruta completa
-            ruta_completa = ruta_endpoint
-            if router_info['prefix']:
-                # Combinar prefix con ruta
-                prefix = router_info['prefix'].rstrip('/')
-                ruta_limpia = ruta_endpoint.lstrip('/')
-                if ruta_limpia and not ruta_limpia.startswith(prefix):
-                    ruta_completa = f"{prefix}/{ruta_limpia}"
-            
-            # Detectar middlewares
-            middlewares = self.detectar_middlewares(decoradores_previos)
-            
-            # Crear registro del endpoint
-            endpoint_data = {
-                'metodo': metodo_http,
-                'ruta': ruta_completa,
-                'ruta_original': ruta_endpoint,
-                'funcion': funcion_info['nombre'],
-                'parametros': funcion_info['parametros'],
-                'parametros_query': parametros_info['query'],
-                'parametros_path': parametros_info['path'],
-                'parametros_body': parametros_info['body'],
-                'tipos_parametros': parametros_info['tipos'],
-                'decorador': decorador_completo,
-                'todos_decoradores': decoradores_previos + [decorador_completo],
-                'linea': i + 1,
-                'summary': info_decorador['summary'],
-                'description': info_decorador['description'],
-                'tags': info_decorador['tags'],
-                'response_model': info_decorador['response_model'],
-                'status_code': info_decorador['status_code'],
-                'responses': info_decorador['responses'],
-                'router_padre': router_info['router_name'],
-                'router_prefix': router_info['prefix'],
-                'router_tags': router_info['tags'],
-                'middlewares': middlewares,
-                'es_async': funcion_info['es_async'],
-                'codigo_completo': funcion_info['codigo_completo']
-            }
-            
-            endpoints.append(endpoint_data)
-            
-            # Actualizar estadísticas
-            self.estadisticas['endpoints_por_metodo'][metodo_http] = \
-                self.estadisticas['endpoints_por_metodo'].get(metodo_http, 0) + 1
-        
-        if endpoints:
-            print(f"    ✅ Total endpoints encontrados: {len(endpoints)}")
+            endpoints.append(self.construir_endpoint(
+                contenido, i, metodo_http, ruta_endpoint, funcion_info,
+                decorador_completo, decoradores_previos,
+                self.extraer_info_decorador_mejorado(decorador_completo)
+            ))
         
         return endpoints
     
+    def construir_endpoint(self, contenido: str, i: int, metodo_http: str, ruta_endpoint: str,
+                           funcion_info: Dict[str, Any], decorador_completo: str,
+                           decoradores_previos: List[str], info_decorador: Dict[str, Any]) -> Dict[str, Any]:
+        """Datos del endpoint declarado en la línea i (0-based) del decorador"""
+        self.avisar(f"    🎯 Línea {i+1}: {metodo_http:6} {ruta_endpoint}")
+        
+        # Analizar parámetros
+        parametros_info = self.extraer_parametros_detallados(funcion_info['parametros'])
+        
+        # Detectar router y prefix
+        router_info = self.detectar_router_y_prefix(contenido, i)
+        
+        # Construir ruta completa
+        ruta_completa = ruta_endpoint
+        if router_info['prefix']:
+            # Combinar prefix con ruta
+            prefix = router_info['prefix'].rstrip('/')
+            ruta_limpia = ruta_endpoint.lstrip('/')
+            if ruta_limpia and not ruta_limpia.startswith(prefix):
+                ruta_completa = f"{prefix}/{ruta_limpia}"
+        
+        # Detectar middlewares
+        middlewares = self.detectar_middlewares(decoradores_previos)
+        
+        return {
+            'metodo': metodo_http,
+            'ruta': ruta_completa,
+            'ruta_original': ruta_endpoint,
+            'funcion': funcion_info['nombre'],
+            'parametros': funcion_info['parametros'],
+            'parametros_query': parametros_info['query'],
+            'parametros_path': parametros_info['path'],
+            'parametros_body': parametros_info['body'],
+            'tipos_parametros': parametros_info['tipos'],
+            'decorador': decorador_completo,
+            'todos_decoradores': decoradores_previos + [decorador_completo],
+            'linea': i + 1,
+            'summary': info_decorador['summary'],
+            'description': info_decorador['description'],
+            'tags': info_decorador['tags'],
+            'response_model': info_decorador['response_model'],
+            'status_code': info_decorador['status_code'],
+            'responses': info_decorador['responses'],
+            'router_padre': router_info['router_name'],
+            'router_prefix': router_info['prefix'],
+            'router_tags': router_info['tags'],
+            'middlewares': middlewares,
+            'es_async': funcion_info['es_async'],
+            'codigo_completo': funcion_info['codigo_completo'],
+            'lineas_codigo': (funcion_info['linea_inicio'], funcion_info['linea_fin']),
+            # Solo desde el AST (el fallback por regex no lo tiene)
+            'hash_simbolo': funcion_info.get('hash_simbolo', '')
+        }
+    
     def buscar_funcion_completa(self, lineas: List[str], linea_decorador: int) -> Optional[Dict]:
         """Busca la función completa después de un decorador"""
         for i in range(linea_decorador, min(linea_decorador + 20, len(lineas))):
@@ -265,6 +2114,7 @@ class EnhancedEndpointAnalyzer:
                     'parametros': parametros,
                     'return_type': return_type if return_type else '',
                     'linea_inicio': i + 1,
+                    'linea_fin': i + len(codigo_completo),
                     'es_async': es_async,
                     'codigo_completo': '\n'.join(codigo_completo)
                 }
@@ -310,26 +2160,75 @@ class EnhancedEndpointAnalyzer:
         if response_match:
             info['response_model'] = response_match.group(1).strip()
         
-        # Status code
-        status_match = re.search(r'status_code\s*=\s*(?:status\.)?HTTP_(\d+)', decorador, re.IGNORECASE)
-        if status_match:
-            info['status_code'] = status_match.group(1)
-        else:
-            status_match = re.search(r'status_code\s*=\s*(\d+)', decorador)
+        # Status code
+        status_match = re.search(r'status_code\s*=\s*(?:status\.)?HTTP_(\d+)', decorador, re.IGNORECASE)
+        if status_match:
+            info['status_code'] = status_match.group(1)
+        else:
+            status_match = re.search(r'status_code\s*=\s*(\d+)', decorador)
+            if status_match:
+                info['status_code'] = status_match.group(1)
+        
+        # Responses
+        responses_match = re.search(r'responses\s*=\s*\{([^}]+)\}', decorador, re.IGNORECASE)
+        if responses_match:
+            info['responses'] = [responses_match.group(1).strip()]
+        
+        # Deprecated
+        if 'deprecated' in decorador.lower():
+            info['deprecated'] = True
+        
+        return info
+    
+    def extraer_info_decorador_ast(self, dec: ast.Call) -> Dict[str, Any]:
+        """Misma información que extraer_info_decorador_mejorado, leída de los argumentos del decorador"""
+        argumentos = {k.arg: k.value for k in dec.keywords if k.arg}
+        info = {
+            'ruta': (texto_constante(dec.args[0]) or '') if dec.args else '',
+            'summary': texto_constante(argumentos.get('summary')) or '',
+            'description': texto_constante(argumentos.get('description')) or '',
+            'tags': [],
+            'response_model': '',
+            'status_code': '',
+            'responses': [],
+            'deprecated': False
+        }
+        
+        tags = argumentos.get('tags')
+        if isinstance(tags, (ast.List, ast.Tuple, ast.Set)):
+            for tag in tags.elts:
+                texto = texto_constante(tag)
+                info['tags'].append(texto if texto is not None else ast.unparse(tag))
+        
+        if 'response_model' in argumentos:
+            info['response_model'] = ast.unparse(argumentos['response_model'])
+        
+        # status_code=201 o status_code=status.HTTP_201_CREATED
+        status_code = argumentos.get('status_code')
+        if isinstance(status_code, ast.Constant) and isinstance(status_code.value, int):
+            info['status_code'] = str(status_code.value)
+        elif status_code is not None:
+            status_match = PATRON_HTTP_STATUS.search(ast.unparse(status_code))
             if status_match:
                 info['status_code'] = status_match.group(1)
         
-        # Responses
-        responses_match = re.search(r'responses\s*=\s*\{([^}]+)\}', decorador, re.IGNORECASE)
-        if responses_match:
-            info['responses'] = [responses_match.group(1).strip()]
+        responses = argumentos.get('responses')
+        if isinstance(responses, ast.Dict):
+            info['responses'] = [ast.unparse(responses)[1:-1].strip()]
+        elif responses is not None:
+            info['responses'] = [ast.unparse(responses)]
         
-        # Deprecated
-        if 'deprecated' in decorador.lower():
-            info['deprecated'] = True
+        deprecated = argumentos.get('deprecated')
+        info['deprecated'] = isinstance(deprecated, ast.Constant) and deprecated.value is True
         
         return info
     
+    def obtener_tabla_routers(self, contenido: str) -> TablaRouters:
+        """Tabla de routers del archivo (se construye una sola vez por contenido)"""
+        if self._tabla_routers is None or self._tabla_routers[0] is not contenido:
+            self._tabla_routers = (contenido, TablaRouters(contenido))
+        return self._tabla_routers[1]
+    
     def detectar_router_y_prefix(self, contenido: str, linea_actual: int) -> Dict[str, Any]:
         """Detecta el router padre y su configuración"""
         router_info = {
@@ -338,56 +2237,21 @@ class EnhancedEndpointAnalyzer:
             'tags': []
         }
         
-        lineas = contenido.split('\n')
-        contenido_previo = '\n'.join(lineas[:linea_actual])
-        
-        # Buscar declaraciones de router
-        patron_router = r'(\w+)\s*=\s*(?:APIRouter|FastAPI|Blueprint)\s*\(([^)]*)\)'
-        
-        routers = []
-        for match in re.finditer(patron_router, contenido_previo):
-            nombre_router = match.group(1)
-            parametros = match.group(2)
-            linea_router = contenido_previo[:match.start()].count('\n')
-            
-            # Extraer prefix
-            prefix = ''
-            prefix_match = re.search(r'prefix\s*=\s*["\']([^"\']+)["\']', parametros)
-            if prefix_match:
-                prefix = prefix_match.group(1)
-            
-            # Extraer tags
-            tags = []
-            tags_match = re.search(r'tags\s*=\s*\[([^\]]+)\]', parametros)
-            if tags_match:
-                tags_str = tags_match.group(1)
-                tags = [tag.strip().strip('"\'') for tag in tags_str.split(',')]
-            
-            routers.append({
-                'nombre': nombre_router,
-                'prefix': prefix,
-                'tags': tags,
-                'linea': linea_router
-            })
+        tabla = self.obtener_tabla_routers(contenido)
         
         # Usar el router más cercano
-        if routers:
-            router_cercano = max(routers, key=lambda r: r['linea'])
+        router_cercano = tabla.router_en_linea(linea_actual)
+        if router_cercano:
             router_info['router_name'] = router_cercano['nombre']
             router_info['prefix'] = router_cercano['prefix']
-            router_info['tags'] = router_cercano['tags']
+            router_info['tags'] = list(router_cercano['tags'])
         
-        # Buscar include_router para prefixes adicionales
-        patron_include = r'(?:app|main)\.include_router\s*\(\s*(\w+)\s*,\s*prefix\s*=\s*["\']([^"\']+)["\']'
-        for match in re.finditer(patron_include, contenido):
-            router_ref = match.group(1)
-            prefix_include = match.group(2)
-            
-            if router_info['router_name'] == router_ref:
-                if router_info['prefix']:
-                    router_info['prefix'] = prefix_include.rstrip('/') + '/' + router_info['prefix'].lstrip('/')
-                else:
-                    router_info['prefix'] = prefix_include
+        # Aplicar include_router del mismo archivo como prefixes adicionales
+        for prefix_include in tabla.prefijos_include.get(router_info['router_name'], []):
+            if router_info['prefix']:
+                router_info['prefix'] = prefix_include.rstrip('/') + '/' + router_info['prefix'].lstrip('/')
+            else:
+                router_info['prefix'] = prefix_include
         
         return router_info
     
@@ -456,7 +2320,8 @@ class EnhancedEndpointAnalyzer:
     # 🔍 SEGUNDA PASADA: EXTRACCIÓN AVANZADA
     # ==========================================
     
-    def extraer_clases_avanzado(self, contenido: str, tipo_archivo: str, tecnologias: List[str]) -> List[Dict]:
+    def extraer_clases_avanzado(self, contenido: str, tipo_archivo: str, tecnologias: List[str],
+                                analisis: Optional[AnalisisAST] = None) -> List[Dict]:
         """
         Extrae TODAS las clases con análisis profundo:
         - Modelos SQLAlchemy/ORM
@@ -464,13 +2329,15 @@ class EnhancedEndpointAnalyzer:
         - Excepciones personalizadas
         - Clases de servicio
         - Factories, Builders, etc.
+        Sin AST (error de sintaxis) se usa el fallback por regex
         """
         clases = []
         
+        if analisis is None:
+            return self.extraer_clases_regex_avanzado(contenido)
+        
         try:
-            tree = ast.parse(contenido)
-            
-            for node in ast.walk(tree):
+            for node in analisis.clases:
                 if isinstance(node, ast.ClassDef):
                     # Extraer información completa
                     clase_info = {
@@ -484,7 +2351,8 @@ class EnhancedEndpointAnalyzer:
                         'validadores': [],
                         'relaciones': [],
                         'docstring': ast.get_docstring(node) or '',
-                        'tipo_clase': 'class'
+                        'tipo_clase': 'class',
+                        'hash_simbolo': hash_simbolo(node)
                     }
                     
                     # Extraer decoradores
@@ -572,7 +2440,7 @@ class EnhancedEndpointAnalyzer:
                     clases.append(clase_info)
                     
         except Exception as e:
-            print(f"    ⚠️  Error parseando clases con AST: {e}")
+            self.avisar(f"    ⚠️  Error parseando clases con AST: {e}")
             # Fallback a regex si falla AST
             clases = self.extraer_clases_regex_avanzado(contenido)
         
@@ -615,7 +2483,8 @@ class EnhancedEndpointAnalyzer:
         
         return clases
     
-    def extraer_funciones_avanzado(self, contenido: str, tipo_archivo: str) -> List[Dict]:
+    def extraer_funciones_avanzado(self, contenido: str, tipo_archivo: str,
+                                   analisis: Optional[AnalisisAST] = None) -> List[Dict]:
         """
         Extrae TODAS las funciones con análisis profundo:
         - Servicios y lógica de negocio
@@ -623,23 +2492,18 @@ class EnhancedEndpointAnalyzer:
         - Validadores y transformadores
         - Factories y builders
         - Middlewares y decoradores
+        Sin AST (error de sintaxis) se usa el fallback por regex
         """
         funciones = []
         
+        if analisis is None:
+            return self.extraer_funciones_regex_avanzado(contenido)
+        
         try:
-            tree = ast.parse(contenido)
-            
-            for node in ast.walk(tree):
+            for node in analisis.funciones:
                 if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
                     # Saltar métodos de clase (ya capturados en clases)
-                    es_metodo = False
-                    for parent in ast.walk(tree):
-                        if isinstance(parent, ast.ClassDef):
-                            if node in parent.body:
-                                es_metodo = True
-                                break
-                    
-                    if es_metodo:
+                    if analisis.clase_del_metodo(node) is not None:
                         continue
                     
                     # Extraer información completa
@@ -653,7 +2517,8 @@ class EnhancedEndpointAnalyzer:
                         'return_type': '',
                         'docstring': ast.get_docstring(node) or '',
                         'complejidad_local': 0,
-                        'tipo_funcion': 'function'
+                        'tipo_funcion': 'function',
+                        'hash_simbolo': hash_simbolo(node)
                     }
                     
                     # Extraer decoradores
@@ -711,7 +2576,7 @@ class EnhancedEndpointAnalyzer:
                     funciones.append(funcion_info)
                     
         except Exception as e:
-            print(f"    ⚠️  Error parseando funciones con AST: {e}")
+            self.avisar(f"    ⚠️  Error parseando funciones con AST: {e}")
             funciones = self.extraer_funciones_regex_avanzado(contenido)
         
         return funciones
@@ -771,7 +2636,8 @@ class EnhancedEndpointAnalyzer:
                 complejidad += len(subnode.values) - 1
         return complejidad
     
-    def extraer_configuraciones(self, contenido: str, tipo_archivo: str) -> List[Dict]:
+    def extraer_configuraciones(self, contenido: str, tipo_archivo: str,
+                                analisis: Optional[AnalisisAST] = None) -> List[Dict]:
         """
         Extrae configuraciones, constantes y variables globales:
         - Settings y configuraciones
@@ -781,11 +2647,12 @@ class EnhancedEndpointAnalyzer:
         """
         configuraciones = []
         
+        if analisis is None:
+            return configuraciones
+        
         # Buscar asignaciones de nivel módulo
         try:
-            tree = ast.parse(contenido)
-            
-            for node in tree.body:
+            for node in analisis.tree.body:
                 if isinstance(node, ast.Assign):
                     for target in node.targets:
                         if isinstance(target, ast.Name):
@@ -812,20 +2679,33 @@ class EnhancedEndpointAnalyzer:
                         })
                         
         except Exception as e:
-            print(f"    ⚠️  Error extrayendo configuraciones: {e}")
+            self.avisar(f"    ⚠️  Error extrayendo configuraciones: {e}")
         
         return configuraciones
     
-    def extraer_dependencias_inyeccion(self, contenido: str) -> List[Dict]:
+    def extraer_dependencias_inyeccion(self, contenido: str,
+                                       analisis: Optional[AnalisisAST] = None) -> List[Dict]:
         """
         Extrae funciones de inyección de dependencias:
         - Funciones con Depends()
         - Factories de dependencias
         - Context managers
+        Con AST se toman las funciones generadoras (con yield propio)
         """
         dependencias = []
         
-        # Buscar funciones que devuelven dependencias
+        if analisis is not None:
+            for node in analisis.generadores:
+                dependencias.append({
+                    'nombre': node.name,
+                    'return_type': ast.unparse(node.returns) if node.returns and hasattr(ast, 'unparse') else '',
+                    'tipo': 'DEPENDENCY_INJECTION',
+                    'linea': node.lineno,
+                    'es_generator': True
+                })
+            return dependencias
+        
+        # Fallback: buscar funciones que devuelven dependencias
         patron_depends = r'def\s+(\w+)\s*\([^)]*\)(?:\s*->\s*([^:]+))?:\s*["\']?["\']?[^"]*yield'
         
         for match in re.finditer(patron_depends, contenido, re.DOTALL):
@@ -847,8 +2727,92 @@ class EnhancedEndpointAnalyzer:
     # 📝 CREACIÓN DE REGISTROS
     # ==========================================
     
+    def contexto_archivo(self, ruta: Path, tecnologias: List[str], imports: List[str],
+                         include_routers: Optional[List] = None) -> ContextoArchivo:
+        """Contexto compartido por los registros del archivo (se reutiliza mientras no cambie)"""
+        contexto = self._contexto_archivo
+        if contexto is None or not contexto.corresponde(ruta, tecnologias, imports, include_routers):
+            fuente = self.fuente_de(ruta)
+            contexto = ContextoArchivo(ruta, tecnologias, imports, include_routers or [],
+                                       fuente.archivo_id if fuente else '')
+            self._contexto_archivo = contexto
+        return contexto
+    
+    def fuente_de(self, ruta: Path) -> Optional[FuenteArchivo]:
+        """Texto codificado del archivo en proceso (None para otros archivos)"""
+        fuente = self._fuente_actual
+        return fuente if fuente is not None and fuente.ruta == ruta else None
+    
+    def indice_codigo(self, ruta: Path, linea_inicio: int, linea_fin: int) -> Tuple[int, int, str]:
+        """(offset, longitud, hash) en bytes de unas líneas del archivo en proceso"""
+        fuente = self.fuente_de(ruta)
+        if fuente is None:
+            return 0, 0, ''
+        return fuente.rango_lineas(linea_inicio, linea_fin)
+    
+    def crear_registro_endpoint(self, endpoint: Dict, ruta: Path, tecnologias: List[str],
+                                imports: List[str], complejidad: int, include_routers: List) -> Registro:
+        """Crea un registro completo para un endpoint"""
+        contexto = self.contexto_archivo(ruta, tecnologias, imports, include_routers)
+        
+        descripcion = f"{endpoint['metodo']} {endpoint['ruta']}"
+        if endpoint['summary']:
+            descripcion += f" - {endpoint['summary']}"
+        
+        # Extraer dependencias
+        dependencias = []
+        for dec in endpoint['todos_decoradores']:
+            if 'Depends(' in dec:
+                dep_match = PATRON_DEPENDS.search(dec)
+                if dep_match:
+                    dependencias.append(dep_match.group(1).strip())
+        
+        offset, longitud, hash_fragmento = self.indice_codigo(ruta, *endpoint['lineas_codigo'])
+        return Registro({
+            'tipo': 'route',
+            'ruta': contexto.ruta,
+            'nombre_archivo': contexto.nombre_archivo,
+            'elemento': endpoint['funcion'],
+            'categoria': 'ENDPOINT',
+            'endpoint': endpoint['ruta'],  # ✅ CRÍTICO
+            'metodo_http': endpoint['metodo'],  # ✅ CRÍTICO
+            'descripcion': descripcion,
+            'summary': endpoint['summary'],
+            'description': endpoint['description'],
+            'tags': ', '.join(endpoint['tags'] + endpoint.get('router_tags', [])),
+            'response_model': endpoint['response_model'],
+            'status_code': endpoint['status_code'],
+            'decoradores': ' | '.join(endpoint['todos_decoradores']),
+            'parametros': endpoint['parametros'],
+            'parametros_query': ', '.join(endpoint['parametros_query']),
+            'parametros_path': ', '.join(endpoint['parametros_path']),
+            'parametros_body': ', '.join(endpoint['parametros_body']),
+            'tipos_parametros': json.dumps(endpoint['tipos_parametros']) if endpoint['tipos_parametros'] else '',
+            'codigo_limpio': endpoint['codigo_completo'],
+            'dependencias': ', '.join(dependencias),
+            'tecnologias': contexto.tecnologias,
+            'linea_inicio': endpoint['linea'],
+            'numero_lineas': len(endpoint['codigo_completo'].split('\n')),
+            'complejidad': complejidad,
+            'imports': contexto.imports,
+            'router_padre': endpoint['router_padre'],
+            'middlewares': ', '.join(endpoint['middlewares']),
+            'event_handlers': '',
+            'include_routers': contexto.include_routers,
+            'responses': ', '.join(endpoint['responses']),
+            'ejemplos': '',
+            'validaciones': '',
+            'es_async': endpoint['es_async'],
+            'es_decorador': False,
+            'archivo_id': contexto.archivo_id,
+            'offset_codigo': offset,
+            'longitud_codigo': longitud,
+            'hash_codigo': hash_fragmento,
+            'hash_simbolo': endpoint['hash_simbolo']
+        })
+    
     def crear_registro_clase(self, clase: Dict, ruta: Path, tipo: str, tecnologias: List[str], 
-                            imports: List[str], complejidad: int, include_routers: List) -> Dict:
+                            imports: List[str], complejidad: int, include_routers: List) -> Registro:
         """Crea un registro completo para una clase"""
         
         # Construir descripción rica
@@ -873,14 +2837,17 @@ class EnhancedEndpointAnalyzer:
         
         # Extraer código de la clase
         codigo = self.extraer_codigo_elemento(ruta, clase['linea_inicio'], clase['linea_fin'])
+        offset, longitud, hash_fragmento = self.indice_codigo(ruta, clase['linea_inicio'], clase['linea_fin'])
         
         # Tipos de parámetros (atributos con tipos)
         tipos_attrs = {attr['nombre']: attr['tipo'] for attr in clase['atributos'] if attr['tipo']}
         
-        return {
+        contexto = self.contexto_archivo(ruta, tecnologias, imports, include_routers)
+        
+        return Registro({
             'tipo': clase['tipo_clase'],
-            'ruta': str(ruta),
-            'nombre_archivo': ruta.name,
+            'ruta': contexto.ruta,
+            'nombre_archivo': contexto.nombre_archivo,
             'elemento': clase['nombre'],
             'categoria': 'CLASS',
             'endpoint': '',
@@ -899,24 +2866,29 @@ class EnhancedEndpointAnalyzer:
             'tipos_parametros': json.dumps(tipos_attrs) if tipos_attrs else '',
             'codigo_limpio': codigo,
             'dependencias': ', '.join([attr['tipo'] for attr in clase['relaciones']][:5]),
-            'tecnologias': ', '.join(tecnologias),
+            'tecnologias': contexto.tecnologias,
             'linea_inicio': clase['linea_inicio'],
             'numero_lineas': clase['numero_lineas'],
             'complejidad': complejidad,
-            'imports': ', '.join(imports[:10]),
+            'imports': contexto.imports,
             'router_padre': '',
             'middlewares': '',
             'event_handlers': '',
-            'include_routers': json.dumps(include_routers),
+            'include_routers': contexto.include_routers,
             'responses': '',
             'ejemplos': '',
             'validaciones': ', '.join([v['nombre'] for v in clase['validadores']]),
             'es_async': False,
-            'es_decorador': False
-        }
+            'es_decorador': False,
+            'archivo_id': contexto.archivo_id,
+            'offset_codigo': offset,
+            'longitud_codigo': longitud,
+            'hash_codigo': hash_fragmento,
+            'hash_simbolo': clase.get('hash_simbolo', '')
+        })
     
     def crear_registro_funcion(self, funcion: Dict, ruta: Path, tipo: str, tecnologias: List[str],
-                              imports: List[str], complejidad: int, include_routers: List) -> Dict:
+                              imports: List[str], complejidad: int, include_routers: List) -> Registro:
         """Crea un registro completo para una función"""
         
         # Construir descripción
@@ -935,14 +2907,17 @@ class EnhancedEndpointAnalyzer:
         
         # Código de la función
         codigo = self.extraer_codigo_elemento(ruta, funcion['linea_inicio'], funcion['linea_fin'])
+        offset, longitud, hash_fragmento = self.indice_codigo(ruta, funcion['linea_inicio'], funcion['linea_fin'])
         
         # Tipos de parámetros
         tipos_params = {p['nombre']: p['tipo'] for p in funcion['parametros'] if p['tipo']}
         
-        return {
+        contexto = self.contexto_archivo(ruta, tecnologias, imports, include_routers)
+        
+        return Registro({
             'tipo': funcion['tipo_funcion'],
-            'ruta': str(ruta),
-            'nombre_archivo': ruta.name,
+            'ruta': contexto.ruta,
+            'nombre_archivo': contexto.nombre_archivo,
             'elemento': funcion['nombre'],
             'categoria': 'FUNCTION',
             'endpoint': '',
@@ -961,34 +2936,42 @@ class EnhancedEndpointAnalyzer:
             'tipos_parametros': json.dumps(tipos_params) if tipos_params else '',
             'codigo_limpio': codigo,
             'dependencias': '',
-            'tecnologias': ', '.join(tecnologias),
+            'tecnologias': contexto.tecnologias,
             'linea_inicio': funcion['linea_inicio'],
             'numero_lineas': funcion['numero_lineas'],
             'complejidad': funcion['complejidad_local'],
-            'imports': ', '.join(imports[:10]),
+            'imports': contexto.imports,
             'router_padre': '',
             'middlewares': '',
             'event_handlers': '',
-            'include_routers': json.dumps(include_routers),
+            'include_routers': contexto.include_routers,
             'responses': '',
             'ejemplos': '',
             'validaciones': '',
             'es_async': funcion['es_async'],
-            'es_decorador': any('decorator' in d.lower() for d in funcion['decoradores'])
-        }
+            'es_decorador': any('decorator' in d.lower() for d in funcion['decoradores']),
+            'archivo_id': contexto.archivo_id,
+            'offset_codigo': offset,
+            'longitud_codigo': longitud,
+            'hash_codigo': hash_fragmento,
+            'hash_simbolo': funcion.get('hash_simbolo', '')
+        })
     
     def crear_registro_configuracion(self, config: Dict, ruta: Path, tipo: str, 
-                                    tecnologias: List[str], imports: List[str], complejidad: int) -> Dict:
+                                    tecnologias: List[str], imports: List[str], complejidad: int) -> Registro:
         """Crea un registro para una configuración"""
         
         descripcion = f"{config['tipo']}: {config['nombre']}"
         if config['valor'] and config['valor'] != 'Configuration Class':
             descripcion += f" = {config['valor'][:50]}"
         
-        return {
+        offset, longitud, hash_fragmento = self.indice_codigo(ruta, config['linea'], config['linea'])
+        contexto = self.contexto_archivo(ruta, tecnologias, imports)
+        
+        return Registro({
             'tipo': 'config',
-            'ruta': str(ruta),
-            'nombre_archivo': ruta.name,
+            'ruta': contexto.ruta,
+            'nombre_archivo': contexto.nombre_archivo,
             'elemento': config['nombre'],
             'categoria': config['tipo'],
             'endpoint': '',
@@ -1007,11 +2990,11 @@ class EnhancedEndpointAnalyzer:
             'tipos_parametros': '',
             'codigo_limpio': f"{config['nombre']} = {config['valor']}",
             'dependencias': '',
-            'tecnologias': ', '.join(tecnologias),
+            'tecnologias': contexto.tecnologias,
             'linea_inicio': config['linea'],
             'numero_lineas': 1,
             'complejidad': 1,
-            'imports': ', '.join(imports[:10]),
+            'imports': contexto.imports,
             'router_padre': '',
             'middlewares': '',
             'event_handlers': '',
@@ -1020,21 +3003,29 @@ class EnhancedEndpointAnalyzer:
             'ejemplos': '',
             'validaciones': '',
             'es_async': False,
-            'es_decorador': False
-        }
+            'es_decorador': False,
+            'archivo_id': contexto.archivo_id,
+            'offset_codigo': offset,
+            'longitud_codigo': longitud,
+            'hash_codigo': hash_fragmento,
+            'hash_simbolo': ''
+        })
     
     def crear_registro_dependencia(self, dep: Dict, ruta: Path, tipo: str,
-                                   tecnologias: List[str], imports: List[str], complejidad: int) -> Dict:
+                                   tecnologias: List[str], imports: List[str], complejidad: int) -> Registro:
         """Crea un registro para una dependencia de inyección"""
         
         descripcion = f"Dependency: {dep['nombre']}"
         if dep['return_type']:
             descripcion += f" -> {dep['return_type']}"
         
-        return {
+        offset, longitud, hash_fragmento = self.indice_codigo(ruta, dep['linea'], dep['linea'])
+        contexto = self.contexto_archivo(ruta, tecnologias, imports)
+        
+        return Registro({
             'tipo': 'dependency',
-            'ruta': str(ruta),
-            'nombre_archivo': ruta.name,
+            'ruta': contexto.ruta,
+            'nombre_archivo': contexto.nombre_archivo,
             'elemento': dep['nombre'],
             'categoria': dep['tipo'],
             'endpoint': '',
@@ -1053,11 +3044,11 @@ class EnhancedEndpointAnalyzer:
             'tipos_parametros': '',
             'codigo_limpio': f"def {dep['nombre']}(): yield ...",
             'dependencias': '',
-            'tecnologias': ', '.join(tecnologias),
+            'tecnologias': contexto.tecnologias,
             'linea_inicio': dep['linea'],
             'numero_lineas': 5,
             'complejidad': 1,
-            'imports': ', '.join(imports[:10]),
+            'imports': contexto.imports,
             'router_padre': '',
             'middlewares': '',
             'event_handlers': '',
@@ -1066,20 +3057,30 @@ class EnhancedEndpointAnalyzer:
             'ejemplos': '',
             'validaciones': '',
             'es_async': False,
-            'es_decorador': False
-        }
+            'es_decorador': False,
+            'archivo_id': contexto.archivo_id,
+            'offset_codigo': offset,
+            'longitud_codigo': longitud,
+            'hash_codigo': hash_fragmento,
+            'hash_simbolo': ''
+        })
     
     def crear_registro_archivo_basico(self, contenido: str, ruta: Path, tipo: str,
-                                      tecnologias: List[str], imports: List[str], complejidad: int) -> Dict:
+                                      tecnologias: List[str], imports: List[str], complejidad: int) -> Registro:
         """Crea un registro básico cuando no se encuentra contenido específico"""
         
-        num_lineas = len(contenido.split('\n'))
-        preview = contenido[:500].strip() + ('...' if len(contenido) > 500 else '')
+        num_lineas = contenido.count('\n') + 1
+        preview = vista_previa(contenido)
+        # En el índice, el rango de la vista previa
+        fuente = self.fuente_de(ruta)
+        offset, longitud, hash_fragmento = fuente.rango_caracteres(CARACTERES_VISTA_PREVIA) if fuente else (0, 0, '')
         
-        return {
+        contexto = self.contexto_archivo(ruta, tecnologias, imports)
+        
+        return Registro({
             'tipo': tipo,
-            'ruta': str(ruta),
-            'nombre_archivo': ruta.name,
+            'ruta': contexto.ruta,
+            'nombre_archivo': contexto.nombre_archivo,
             'elemento': ruta.stem,
             'categoria': 'FILE',
             'endpoint': '',
@@ -1098,11 +3099,11 @@ class EnhancedEndpointAnalyzer:
             'tipos_parametros': '',
             'codigo_limpio': preview,
             'dependencias': '',
-            'tecnologias': ', '.join(tecnologias),
+            'tecnologias': contexto.tecnologias,
             'linea_inicio': 1,
             'numero_lineas': num_lineas,
             'complejidad': complejidad,
-            'imports': ', '.join(imports[:10]),
+            'imports': contexto.imports,
             'router_padre': '',
             'middlewares': '',
             'event_handlers': '',
@@ -1111,14 +3112,135 @@ class EnhancedEndpointAnalyzer:
             'ejemplos': '',
             'validaciones': '',
             'es_async': False,
-            'es_decorador': False
-        }
+            'es_decorador': False,
+            'archivo_id': contexto.archivo_id,
+            'offset_codigo': offset,
+            'longitud_codigo': longitud,
+            'hash_codigo': hash_fragmento,
+            'hash_simbolo': ''
+        })
+    
+    def filtrar_archivo(self, ruta_archivo: str) -> Optional[str]:
+        """
+        Motivo por el que el archivo del disco no se analiza a fondo (ver
+        LimitesArchivo), o None. Se inspecciona con mmap: solo se leen las
+        páginas que tocan las búsquedas, nunca el archivo entero en memoria.
+        """
+        tamano = os.path.getsize(ruta_archivo)
+        if not tamano:
+            return None
+        with open(ruta_archivo, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            return self.limites.inspeccionar(mapa, tamano)
+    
+    def analisis_superficial(self, ruta_archivo: str, motivo: str,
+                             contenido: Optional[str] = None) -> List[Dict]:
+        """Registros de un archivo filtrado: uno FILE sin parsear, o ninguno si se omiten"""
+        self.estadisticas['archivos_filtrados'][motivo] = \
+            self.estadisticas['archivos_filtrados'].get(motivo, 0) + 1
+        self.avisar(f"  ⏭️  {Path(ruta_archivo).name}: {MOTIVOS_FILTRO[motivo]}"
+                    f"{' (omitido)' if self.limites.omitir else ' (análisis superficial)'}")
+        if self.limites.omitir:
+            return []
+        
+        if contenido is not None:
+            inicio = contenido[:CARACTERES_VISTA_PREVIA + 1]
+            num_lineas = contenido.count('\n') + 1
+            tamano = len(contenido.encode('utf-8'))
+        else:
+            with open(ruta_archivo, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                # Hasta 4 bytes por carácter en utf-8
+                inicio = mapa[:4 * (CARACTERES_VISTA_PREVIA + 1)].decode('utf-8', 'ignore')
+                inicio = inicio.replace('\r\n', '\n').replace('\r', '\n')[:CARACTERES_VISTA_PREVIA + 1]
+                num_lineas = contar_lineas(mapa)
+                tamano = len(mapa)
+        
+        tipo = self.detectar_tipo_archivo_inteligente(ruta_archivo, inicio)
+        self.estadisticas['total_archivos'] += 1
+        self.estadisticas['tipos_distribucion'][tipo] = \
+            self.estadisticas['tipos_distribucion'].get(tipo, 0) + 1
+        self.estadisticas['archivos_procesados'] += 1
+        return [self.crear_registro_archivo_filtrado(inicio, Path(ruta_archivo), tipo, motivo, num_lineas, tamano)]
+    
+    def crear_registro_archivo_filtrado(self, inicio: str, ruta: Path, tipo: str, motivo: str,
+                                        num_lineas: int, tamano: int) -> Registro:
+        """Registro FILE de un archivo que no se parsea (ver analisis_superficial)"""
+        return Registro({
+            'tipo': tipo,
+            'ruta': str(ruta),
+            'nombre_archivo': ruta.name,
+            'elemento': ruta.stem,
+            'categoria': 'FILE',
+            'endpoint': '',
+            'metodo_http': '',
+            'descripcion': f"Archivo Python: {ruta.name}",
+            'summary': f"Módulo con {num_lineas} líneas, sin análisis detallado: {MOTIVOS_FILTRO[motivo]}",
+            'description': f"Tamaño: {tamano} bytes",
+            'tags': f"{tipo}, {motivo}",
+            'response_model': '',
+            'status_code': '',
+            'decoradores': '',
+            'parametros': '',
+            'parametros_query': '',
+            'parametros_path': '',
+            'parametros_body': '',
+            'tipos_parametros': '',
+            'codigo_limpio': vista_previa(inicio),
+            'dependencias': '',
+            'tecnologias': '',
+            'linea_inicio': 1,
+            'numero_lineas': num_lineas,
+            'complejidad': 0,
+            'imports': '',
+            'router_padre': '',
+            'middlewares': '',
+            'event_handlers': '',
+            'include_routers': '',
+            'responses': '',
+            'ejemplos': '',
+            'validaciones': '',
+            'es_async': False,
+            'es_decorador': False,
+            # Sin índice de fuentes: el archivo no entra en el snapshot
+            'archivo_id': '',
+            'offset_codigo': 0,
+            'longitud_codigo': 0,
+            'hash_codigo': '',
+            'hash_simbolo': ''
+        })
+    
+    def leer_contenido(self, ruta_archivo: str) -> str:
+        """
+        Lee el archivo como texto (utf-8, saltos de línea normalizados).
+        Los archivos grandes se mapean en memoria y se decodifican
+        directamente desde el mapa, sin copia intermedia en bytes.
+        """
+        if self.usar_mmap and os.path.getsize(ruta_archivo) >= UMBRAL_MMAP_BYTES:
+            with open(ruta_archivo, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                contenido = str(memoryview(mapa), 'utf-8', 'ignore')
+            if '\r' in contenido:
+                contenido = contenido.replace('\r\n', '\n').replace('\r', '\n')
+            return contenido
+        
+        with open(ruta_archivo, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+    
+    def _lineas_de(self, ruta: Path) -> List[str]:
+        """Líneas del archivo en proceso desde memoria; otros archivos se leen de disco"""
+        if self._archivo_actual is not None and self._archivo_actual[0] == ruta:
+            if self._lineas_actuales is None:
+                self._lineas_actuales = io.StringIO(self._archivo_actual[1]).readlines()
+            return self._lineas_actuales
+        
+        with open(ruta, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.readlines()
     
     def extraer_codigo_elemento(self, ruta: Path, linea_inicio: int, linea_fin: int) -> str:
         """Extrae el código de un elemento específico del archivo"""
         try:
-            with open(ruta, 'r', encoding='utf-8', errors='ignore') as f:
-                lineas = f.readlines()
+            lineas = self._lineas_de(ruta)
             
             inicio = max(0, linea_inicio - 1)
             fin = min(len(lineas), linea_fin)
@@ -1135,17 +3257,21 @@ class EnhancedEndpointAnalyzer:
     
     def detectar_tipo_archivo_inteligente(self, ruta_archivo: str, contenido: str) -> str:
         """Detecta el tipo de archivo"""
-        ruta = Path(ruta_archivo)
-        nombre = ruta.name.lower()
-        partes_ruta = [p.lower() for p in ruta.parts]
-        
         # Detectar por contenido
         if any(x in contenido for x in ['@router.', '@app.', '@bp.']):
             return 'route'
         if 'APIRouter' in contenido or 'api_router' in contenido:
             return 'router'
         
-        # Detectar por ubicación
+        return self.tipo_por_ubicacion(ruta_archivo)
+    
+    @staticmethod
+    def tipo_por_ubicacion(ruta_archivo: str) -> str:
+        """Tipo de un archivo cuyo contenido no lo determina, según su ruta"""
+        ruta = Path(ruta_archivo)
+        nombre = ruta.name.lower()
+        partes_ruta = [p.lower() for p in ruta.parts]
+        
         if any('route' in parte for parte in partes_ruta):
             return 'route'
         elif any('model' in parte for parte in partes_ruta):
@@ -1157,22 +3283,11 @@ class EnhancedEndpointAnalyzer:
         
         return 'util'
     
-    def extraer_imports(self, contenido: str) -> List[str]:
-        """Extrae imports del código"""
-        imports = []
-        try:
-            tree = ast.parse(contenido)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        imports.append(alias.name)
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        imports.append(node.module)
-        except:
-            import_lines = re.findall(r'^(?:from|import)\s+(\w+(?:\.\w+)*)', contenido, re.MULTILINE)
-            imports.extend(import_lines)
-        return imports
+    def extraer_imports(self, contenido: str, analisis: Optional[AnalisisAST] = None) -> List[str]:
+        """Extrae imports del código (del AST ya recorrido o por regex)"""
+        if analisis is not None:
+            return list(analisis.imports)
+        return re.findall(r'^(?:from|import)\s+(\w+(?:\.\w+)*)', contenido, re.MULTILINE)
     
     def detectar_tecnologias(self, contenido: str, imports: List[str]) -> List[str]:
         """Detecta tecnologías usadas"""
@@ -1192,25 +3307,22 @@ class EnhancedEndpointAnalyzer:
         if 'jwt' in contenido_lower:
             tecnologias.append('jwt')
         
-        return list(set(tecnologias))
+        # Orden fijo (sin set) para que la salida sea determinista
+        return tecnologias
     
     def calcular_complejidad_ciclomatica(self, contenido: str) -> int:
         """Calcula complejidad ciclomática básica"""
-        complejidad = 1
-        complejidad += len(re.findall(r'\bif\s+', contenido))
-        complejidad += len(re.findall(r'\belif\s+', contenido))
-        complejidad += len(re.findall(r'\bfor\s+', contenido))
-        complejidad += len(re.findall(r'\bwhile\s+', contenido))
-        complejidad += len(re.findall(r'\btry\s*:', contenido))
-        complejidad += len(re.findall(r'\bexcept\s+', contenido))
-        return complejidad
+        # Una sola pasada: if, elif, for, while, try: y except
+        return 1 + len(PATRON_COMPLEJIDAD.findall(contenido))
     
     def detectar_include_routers(self, contenido: str) -> List[Dict]:
         """Detecta llamadas a include_router"""
         include_routers = []
-        patron = r'\.(include_router|include)\s*\(([^)]+)\)'
         
-        for match in re.finditer(patron, contenido):
+        if 'include' not in contenido:
+            return include_routers
+        
+        for match in PATRON_INCLUDE_ROUTER.finditer(contenido):
             parametros = match.group(2)
             
             router_match = re.search(r'(\w+)(?:,|\))', parametros)
@@ -1228,23 +3340,44 @@ class EnhancedEndpointAnalyzer:
         
         return include_routers
     
-    def procesar_archivo(self, ruta_archivo: str) -> List[Dict]:
+    def procesar_archivo(self, ruta_archivo: str, contenido: Optional[str] = None) -> List[Dict]:
         """
         Procesa un archivo Python completo con DOBLE ANÁLISIS:
         1. PRIMERA PASADA: Captura endpoints (YA FUNCIONA ✅)
         2. SEGUNDA PASADA: Captura TODO lo demás (modelos, schemas, funciones, etc.)
+        Cada pasada es un extractor del registro (se activan con --extractores)
         """
         registros = []
+        if self.perfil is not None:
+            self.perfil.reiniciar_marca()
         
         try:
-            with open(ruta_archivo, 'r', encoding='utf-8', errors='ignore') as f:
-                contenido = f.read()
+            # Filtro previo: tamaño, líneas y código generado, sin parsear
+            if contenido is None:
+                motivo = self.filtrar_archivo(ruta_archivo)
+            else:
+                datos = contenido.encode('utf-8')
+                motivo = self.limites.inspeccionar(datos, len(datos))
+            if motivo is not None:
+                registros = self.analisis_superficial(ruta_archivo, motivo, contenido)
+                self._marcar('lectura')
+                return registros
+            
+            if contenido is None:
+                contenido = self.leer_contenido(ruta_archivo)
+            self._marcar('lectura')
             
             if not contenido.strip():
                 return registros
             
             ruta = Path(ruta_archivo)
-            imports = self.extraer_imports(contenido)
+            self._archivo_actual = (ruta, contenido)
+            self._lineas_actuales = None
+            self._fuente_actual = FuenteArchivo(ruta, contenido)
+            # Un único parseo del AST compartido por todos los extractores
+            analisis = self.analizar_ast(contenido)
+            self._marcar('parseo_ast')
+            imports = self.extraer_imports(contenido, analisis)
             tipo = self.detectar_tipo_archivo_inteligente(ruta_archivo, contenido)
             tecnologias = self.detectar_tecnologias(contenido, imports)
             complejidad = self.calcular_complejidad_ciclomatica(contenido)
@@ -1254,96 +3387,20 @@ class EnhancedEndpointAnalyzer:
                 self.estadisticas['tipos_distribucion'].get(tipo, 0) + 1
             self.estadisticas['tecnologias_detectadas'].update(tecnologias)
             
-            # Detectar include_routers
+            # Detectar include_routers y declaraciones de routers
             include_routers = self.detectar_include_routers(contenido)
+            self.estadisticas['routers_detectados'] += len(self.obtener_tabla_routers(contenido).routers)
+            self._resumen_montaje = self.extraer_resumen_montaje(ruta_archivo, contenido, analisis)
+            self._marcar('metadatos')
             
-            # ==========================================
-            # 🎯 PRIMERA PASADA: ENDPOINTS (YA FUNCIONA)
-            # ==========================================
-            endpoints = self.extraer_endpoints_completos(contenido, ruta.name)
-            
-            if endpoints:
-                for endpoint in endpoints:
-                    descripcion = f"{endpoint['metodo']} {endpoint['ruta']}"
-                    if endpoint['summary']:
-                        descripcion += f" - {endpoint['summary']}"
-                    
-                    # Extraer dependencias
-                    dependencias = []
-                    for dec in endpoint['todos_decoradores']:
-                        if 'Depends(' in dec:
-                            dep_match = re.search(r'Depends\(([^)]+)\)', dec)
-                            if dep_match:
-                                dependencias.append(dep_match.group(1).strip())
-                    
-                    registros.append({
-                        'tipo': 'route',
-                        'ruta': str(ruta),
-                        'nombre_archivo': ruta.name,
-                        'elemento': endpoint['funcion'],
-                        'categoria': 'ENDPOINT',
-                        'endpoint': endpoint['ruta'],  # ✅ CRÍTICO
-                        'metodo_http': endpoint['metodo'],  # ✅ CRÍTICO
-                        'descripcion': descripcion,
-                        'summary': endpoint['summary'],
-                        'description': endpoint['description'],
-                        'tags': ', '.join(endpoint['tags'] + endpoint.get('router_tags', [])),
-                        'response_model': endpoint['response_model'],
-                        'status_code': endpoint['status_code'],
-                        'decoradores': ' | '.join(endpoint['todos_decoradores']),
-                        'parametros': endpoint['parametros'],
-                        'parametros_query': ', '.join(endpoint['parametros_query']),
-                        'parametros_path': ', '.join(endpoint['parametros_path']),
-                        'parametros_body': ', '.join(endpoint['parametros_body']),
-                        'tipos_parametros': json.dumps(endpoint['tipos_parametros']) if endpoint['tipos_parametros'] else '',
-                        'codigo_limpio': endpoint['codigo_completo'],
-                        'dependencias': ', '.join(dependencias),
-                        'tecnologias': ', '.join(tecnologias),
-                        'linea_inicio': endpoint['linea'],
-                        'numero_lineas': len(endpoint['codigo_completo'].split('\n')),
-                        'complejidad': complejidad,
-                        'imports': ', '.join(imports[:10]),
-                        'router_padre': endpoint['router_padre'],
-                        'middlewares': ', '.join(endpoint['middlewares']),
-                        'event_handlers': '',
-                        'include_routers': json.dumps(include_routers),
-                        'responses': ', '.join(endpoint['responses']),
-                        'ejemplos': '',
-                        'validaciones': '',
-                        'es_async': endpoint['es_async'],
-                        'es_decorador': False
-                    })
-                
-                self.estadisticas['endpoints_encontrados'] += len(endpoints)
-            
-            # ==========================================
-            # 🔍 SEGUNDA PASADA: TODO LO DEMÁS
-            # ==========================================
-            # Extraer CLASES (Modelos, Schemas, Excepciones, etc.)
-            clases = self.extraer_clases_avanzado(contenido, tipo, tecnologias)
-            for clase in clases:
-                self.estadisticas['clases_encontradas'] += 1
-                registros.append(self.crear_registro_clase(clase, ruta, tipo, tecnologias, imports, complejidad, include_routers))
-            
-            # Extraer FUNCIONES (Servicios, Utils, Helpers, etc.)
-            funciones = self.extraer_funciones_avanzado(contenido, tipo)
-            # Filtrar funciones que ya están como endpoints
-            funciones_nombres_endpoints = {ep['funcion'] for ep in endpoints}
-            funciones_filtradas = [f for f in funciones if f['nombre'] not in funciones_nombres_endpoints]
-            
-            for funcion in funciones_filtradas:
-                self.estadisticas['funciones_encontradas'] += 1
-                registros.append(self.crear_registro_funcion(funcion, ruta, tipo, tecnologias, imports, complejidad, include_routers))
-            
-            # Extraer CONFIGURACIONES (Variables, Constantes, Settings)
-            configuraciones = self.extraer_configuraciones(contenido, tipo)
-            for config in configuraciones:
-                registros.append(self.crear_registro_configuracion(config, ruta, tipo, tecnologias, imports, complejidad))
-            
-            # Extraer DEPENDENCIAS (Dependency Injection, Factories)
-            dependencias_di = self.extraer_dependencias_inyeccion(contenido)
-            for dep in dependencias_di:
-                registros.append(self.crear_registro_dependencia(dep, ruta, tipo, tecnologias, imports, complejidad))
+            # Extractores activos (ver EXTRACTORES), en el orden del registro:
+            # endpoints, clases, funciones, configuraciones, dependencias...
+            archivo = ArchivoEnAnalisis(ruta, contenido, analisis, tipo, tecnologias, imports,
+                                        complejidad, include_routers)
+            for nombre in self.extractores:
+                extraidos = EXTRACTORES[nombre](self, archivo)
+                registros.extend(extraidos)
+                self._marcar_extractor(nombre, len(extraidos))
             
             # Si NO se encontró nada, crear registro básico del archivo
             if not registros:
@@ -1352,9 +3409,17 @@ class EnhancedEndpointAnalyzer:
             self.estadisticas['archivos_procesados'] += 1
             
         except Exception as e:
-            print(f"✗ Error procesando {ruta_archivo}: {e}")
+            self.avisar(f"✗ Error procesando {ruta_archivo}: {e}", NIVEL_RESUMEN)
             self.estadisticas['archivos_con_errores'] += 1
-            traceback.print_exc()
+            if self.progreso.muestra(NIVEL_DETALLADO):
+                traceback.print_exc()
+        finally:
+            # Liberar el buffer del archivo (y su tabla de routers)
+            self._archivo_actual = None
+            self._fuente_actual = None
+            self._contexto_archivo = None
+            self._lineas_actuales = None
+            self._tabla_routers = None
         
         return registros
     
@@ -1382,11 +3447,12 @@ class EnhancedEndpointAnalyzer:
         
         return True
     
-    def escanear_proyecto(self):
-        """Escanea todo el proyecto"""
+    def listar_archivos(self) -> List[str]:
+        """Lista los archivos a procesar en el orden del recorrido"""
         carpeta_raiz = self.encontrar_carpeta_raiz()
-        print(f"\n📁 Escaneando desde: {carpeta_raiz}\n")
+        self.avisar(f"\n📁 Escaneando desde: {carpeta_raiz}\n", NIVEL_RESUMEN)
         
+        rutas = []
         for raiz, dirs, archivos in os.walk(carpeta_raiz):
             dirs[:] = [d for d in dirs if d not in CARPETAS_EXCLUIR and not d.startswith('.')]
             
@@ -1394,44 +3460,407 @@ class EnhancedEndpointAnalyzer:
                 ruta_completa = os.path.join(raiz, archivo)
                 
                 if self.deberia_procesar_archivo(ruta_completa):
-                    registros = self.procesar_archivo(ruta_completa)
-                    self.registros.extend(registros)
+                    rutas.append(ruta_completa)
+        
+        return rutas
+    
+    def analizar_archivos(self, rutas: List[str], workers: int = 1):
+        """
+        Genera (registros, estadísticas parciales) de cada archivo, en orden.
+        Con workers > 1 reparte los archivos en un pool de procesos (el
+        trabajo es CPU: AST y regex).
+        """
+        if workers <= 1 or len(rutas) < 2:
+            for ruta_archivo in rutas:
+                yield self.analizar_archivo_aislado(ruta_archivo)
+            return
+        
+        self.avisar(f"⚙️  Procesando {len(rutas)} archivos con {workers} workers\n", NIVEL_RESUMEN)
+        chunksize = max(1, len(rutas) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_inicializar_worker,
+                                 initargs=(self.ruta_proyecto, self.usar_mmap,
+                                           self.perfil is not None, self.limites,
+                                           self.extractores, self.progreso.nivel)) as executor:
+            # map conserva el orden de entrada
+            try:
+                yield from executor.map(_procesar_en_worker, rutas, chunksize=chunksize)
+            except GeneratorExit:
+                # Se dejó de iterar (iterar_proyecto): no esperar al resto
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+    
+    def escanear_proyecto(self, workers: int = 1, cache: Optional[CacheAnalisis] = None,
+                          sink: Optional[EscritorRegistros] = None):
+        """
+        Escanea todo el proyecto.
+        Registros y estadísticas se fusionan en el orden de los archivos, así
+        el resultado es el mismo en serie, en paralelo o desde la cache.
+        Con cache solo se analizan los archivos nuevos o modificados y los
+        registros esperan en disco (no en memoria) hasta emitirse; sin cache
+        los prefixes se resuelven antes y cada archivo se emite al analizarlo,
+        sin pasar por disco. Con sink se escriben archivo a archivo en lugar
+        de acumularse en self.registros.
+        """
+        inicio = time.perf_counter()
+        archivos = self.listar_archivos()
+        if cache is None:
+            with self._fase('montajes'):
+                prefijos = self.prefijos_montaje(archivos)
+            resultados = self._resultados_en_orden(archivos, workers)
+        else:
+            self._analizar_pendientes(archivos, workers, cache)
+            cache.podar(archivos)
+            # Montajes entre archivos: los resúmenes de los archivos sin cambios
+            # salen del manifiesto, así que no hace falta volver a analizarlos
+            with self._fase('montajes'):
+                resumenes = [cache.resumen_montaje(r) for r in archivos]
+                prefijos = GrafoMontajes(resumenes, self.resumen_paquete).prefijos_externos()
+            resultados = ((r, self._resultado_de(r, {}, cache)) for r in archivos)
+        
+        for ruta_archivo, (registros, parciales, _) in resultados:
+            with self._fase('montajes'):
+                self.aplicar_montajes(registros, prefijos)
+            with self._fase('salida'):
+                self.emitir_registros(registros, sink)
+                self.progreso.archivo(ruta_archivo, registros, parciales)
+            self.fusionar_estadisticas(parciales)
+        
+        if self.perfil is not None:
+            self.perfil.total += time.perf_counter() - inicio
+        
+        if cache is not None:
+            afectados = cache.actualizar_prefijos(prefijos)
+            cache.escribir()
+            self._mostrar_cache(cache)
+            if afectados:
+                self.avisar(f"🔀 Montajes modificados, endpoints recalculados en: {', '.join(afectados)}",
+                            NIVEL_RESUMEN)
+    
+    def iterar_proyecto(self, workers: int = 1, montajes: bool = True) -> Iterator[Registro]:
+        """
+        Registros del proyecto archivo a archivo, sin acumularlos ni escribir
+        nada en disco (mismos registros y en el mismo orden que
+        escanear_proyecto). Los prefixes de montaje se resuelven antes, solo
+        con los archivos que llaman a include_router; con montajes=False los
+        endpoints quedan con la ruta declarada en su archivo. Las
+        estadísticas se fusionan en self.estadisticas a medida que avanza.
+        """
+        archivos = self.listar_archivos()
+        prefijos = self.prefijos_montaje(archivos) if montajes else {}
+        for ruta_archivo, (registros, parciales, _) in self._resultados_en_orden(archivos, workers):
+            self.aplicar_montajes(registros, prefijos)
+            self.fusionar_estadisticas(parciales)
+            self.progreso.archivo(ruta_archivo, registros, parciales)
+            yield from registros
+    
+    def _resultados_en_orden(self, archivos: List[str], workers: int) -> Iterator[Tuple[str, Tuple]]:
+        """
+        (ruta, resultado) de cada archivo en el orden del listado, sin
+        montajes aplicados ni cache. Cada contenido se analiza una vez; su
+        resultado espera en memoria solo hasta reubicarlo en la última de sus
+        copias.
+        """
+        copias = self._agrupar_copias(archivos, None)
+        repetidos = len(archivos) - len(copias)
+        if repetidos:
+            self.avisar(f"♊ {repetidos} archivos con contenido repetido: se reutilizó el análisis", NIVEL_RESUMEN)
+        origen = {copia: primera for primera, resto in copias.items() for copia in resto}
+        pendientes = {primera: len(resto) for primera, resto in copias.items() if resto}
+        guardados = {}
+        analizados = self.analizar_archivos(list(copias), workers)
+        self.progreso.iniciar(len(archivos))
+        
+        try:
+            for ruta_archivo in archivos:
+                primera = origen.get(ruta_archivo)
+                if primera is None:
+                    resultado = next(analizados)
+                    self._fusionar_perfil(ruta_archivo, resultado)
+                    if ruta_archivo in pendientes:
+                        # Las copias parten del resultado sin montajes aplicados
+                        guardados[ruta_archivo] = resultado
+                        resultado = self.reubicar_resultado(resultado, ruta_archivo)
+                else:
+                    resultado = self.reubicar_resultado(guardados[primera], ruta_archivo)
+                    pendientes[primera] -= 1
+                    if not pendientes[primera]:
+                        del guardados[primera]
+                
+                yield ruta_archivo, resultado
+                self.progreso.avanzar()
+        finally:
+            # Si se deja de iterar antes de tiempo, se cierra el pool de workers
+            analizados.close()
+            self.progreso.terminar()
     
-    def generar_csv(self):
-        """Genera el archivo CSV con todos los campos"""
-        os.makedirs(os.path.dirname(ARCHIVO_SALIDA_CSV), exist_ok=True)
+    def prefijos_montaje(self, archivos: List[str]) -> Dict[Tuple[str, str], str]:
+        """
+        Prefixes de montaje de los archivos sin analizarlos: solo se resumen
+        los que montan routers y, bajo demanda, los módulos que se
+        necesitan al resolver nombres (los filtrados no aportan resumen)
+        """
+        por_modulo = {modulo_relativo(r, self.ruta_proyecto): r for r in archivos}
+        resumenes: Dict[str, Optional[Dict[str, Any]]] = {}
         
-        with open(ARCHIVO_SALIDA_CSV, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=CAMPOS_CSV)
-            writer.writeheader()
-            writer.writerows(self.registros)
+        def resumen(ruta_archivo: str) -> Optional[Dict[str, Any]]:
+            if ruta_archivo not in resumenes:
+                try:
+                    filtrado = self.filtrar_archivo(ruta_archivo) is not None
+                    resumenes[ruta_archivo] = None if filtrado else self.resumen_montaje_de(ruta_archivo)
+                except OSError:
+                    resumenes[ruta_archivo] = None
+            return resumenes[ruta_archivo]
         
-        print(f"\n📊 CSV generado: {ARCHIVO_SALIDA_CSV}")
-        print(f"   Total registros: {len(self.registros)}")
+        def cargar(modulo: str) -> Optional[Dict[str, Any]]:
+            ruta_archivo = por_modulo.get(modulo)
+            return self.resumen_paquete(modulo) if ruta_archivo is None else resumen(ruta_archivo)
+        
+        montan = []
+        for ruta_archivo in archivos:
+            try:
+                with open(ruta_archivo, 'rb') as f:
+                    if MARCA_MONTAJE in f.read():
+                        montan.append(ruta_archivo)
+            except OSError:
+                continue
+        return GrafoMontajes([resumen(r) for r in montan], cargar).prefijos_externos()
     
-    def generar_json(self):
-        """Genera el archivo JSON con estadísticas completas"""
-        os.makedirs(os.path.dirname(ARCHIVO_SALIDA_JSON), exist_ok=True)
+    def _analizar_pendientes(self, archivos: List[str], workers: int,
+                             cache: Optional[CacheAnalisis]) -> Dict[str, Tuple]:
+        """
+        Analiza los archivos sin entrada vigente en la cache. Cada contenido
+        se analiza una sola vez y el resultado se reubica en las demás rutas
+        con el mismo contenido; si la cache ya lo tiene en otra ruta (archivo
+        copiado, movido o renombrado) no se analiza. Con cache los resultados
+        se guardan en ella; sin cache se devuelven por ruta.
+        """
+        with self._fase('cache'):
+            pendientes = archivos if cache is None else [r for r in archivos if not cache.vigente(r)]
+            copias = self._agrupar_copias(pendientes, cache)
+            previos = self._contenidos_en_cache(copias, pendientes, cache) if cache is not None else {}
         
-        # Convertir set a lista
-        stats = self.estadisticas.copy()
-        stats['tecnologias_detectadas'] = list(stats['tecnologias_detectadas'])
-        
-        datos_completos = {
-            'estadisticas': stats,
-            'registros': self.registros,
-            'metadatos': {
-                'fecha_analisis': datetime.now().isoformat(),
-                'version_analyzer': '4.0.0',
-                'ruta_proyecto': self.ruta_proyecto,
-                'total_registros': len(self.registros)
-            }
-        }
+        nuevos = {}
+        self.progreso.iniciar(len(pendientes))
+        
+        def entregar(ruta_archivo: str, resultado: Tuple, reubicado: bool = False):
+            if cache is not None:
+                with self._fase('cache'):
+                    cache.guardar(ruta_archivo, *resultado, reubicado=reubicado)
+            else:
+                nuevos[ruta_archivo] = resultado
+            self.progreso.avanzar()
+        
+        for ruta_archivo, resultado in previos.items():
+            for destino in [ruta_archivo] + copias[ruta_archivo]:
+                entregar(destino, self.reubicar_resultado(resultado, destino), reubicado=True)
+        
+        unicos = [r for r in copias if r not in previos]
+        for ruta_archivo, resultado in zip(unicos, self.analizar_archivos(unicos, workers)):
+            self._fusionar_perfil(ruta_archivo, resultado)
+            entregar(ruta_archivo, resultado)
+            for copia in copias[ruta_archivo]:
+                entregar(copia, self.reubicar_resultado(resultado, copia), reubicado=True)
+        self.progreso.terminar()
+        
+        reubicados = len(pendientes) - len(unicos)
+        if reubicados:
+            self.avisar(f"♊ {reubicados} archivos con contenido repetido: se reutilizó el análisis "
+                        f"({len(previos)} contenidos ya estaban en la cache)", NIVEL_RESUMEN)
+        return nuevos
+    
+    def clave_contenido(self, ruta_archivo: str, cache: Optional[CacheAnalisis] = None
+                        ) -> Optional[Tuple[str, str]]:
+        """
+        Archivos con la misma clave tienen el mismo análisis salvo la ruta:
+        mismo contenido y mismo tipo por ubicación (que cuenta cuando el
+        contenido no decide el tipo). None si no se puede leer.
+        """
+        try:
+            hash_contenido = cache.huella(ruta_archivo)['hash'] if cache is not None else hash_archivo(ruta_archivo)
+        except OSError:
+            return None
+        return hash_contenido, self.tipo_por_ubicacion(ruta_archivo)
+    
+    def _agrupar_copias(self, rutas: List[str], cache: Optional[CacheAnalisis]) -> Dict[str, List[str]]:
+        """Primera ruta de cada contenido -> las demás rutas con ese contenido, en orden"""
+        primeras: Dict[Tuple[str, str], str] = {}
+        copias: Dict[str, List[str]] = {}
+        for ruta_archivo in rutas:
+            clave = self.clave_contenido(ruta_archivo, cache)
+            if clave is not None and clave in primeras:
+                copias[primeras[clave]].append(ruta_archivo)
+                continue
+            if clave is not None:
+                primeras[clave] = ruta_archivo
+            copias[ruta_archivo] = []
+        return copias
+    
+    def _contenidos_en_cache(self, copias: Dict[str, List[str]], pendientes: List[str],
+                             cache: CacheAnalisis) -> Dict[str, Tuple]:
+        """
+        Contenidos pendientes que la cache ya tiene analizados en otra ruta que
+        no está pendiente: primera ruta del contenido -> resultado guardado
+        """
+        por_contenido = cache.rutas_por_contenido()
+        en_pendientes = set(pendientes)
+        previos = {}
+        for ruta_archivo in copias:
+            clave = self.clave_contenido(ruta_archivo, cache)
+            if clave is None:
+                continue
+            for ruta_previa in por_contenido.get(clave[0], ()):
+                if ruta_previa in en_pendientes or self.tipo_por_ubicacion(ruta_previa) != clave[1]:
+                    continue
+                resultado = cache.cargar(ruta_previa, contar=False)
+                if resultado is not None:
+                    previos[ruta_archivo] = resultado
+                    break
+        return previos
+    
+    def reubicar_resultado(self, resultado: Tuple[List[Dict], Dict[str, Any], Optional[Dict]],
+                           ruta_destino: str) -> Tuple[List[Dict], Dict[str, Any], Optional[Dict]]:
+        """
+        Resultado del análisis de un archivo trasladado a otra ruta con el
+        mismo contenido: cambian los campos de ubicación de los registros y el
+        módulo (e imports relativos) del resumen de montaje
+        """
+        registros, parciales, resumen = resultado
+        destino = Path(ruta_destino)
+        ruta, nombre_archivo = str(destino), destino.name
+        reubicados = []
+        for registro in registros:
+            copia = Registro(registro)
+            copia.ruta = ruta
+            copia.nombre_archivo = nombre_archivo
+            if copia.categoria == 'FILE':
+                # Campos que crear_registro_archivo_basico toma del nombre
+                copia.elemento = destino.stem
+                copia.descripcion = f"Archivo Python: {destino.name}"
+            reubicados.append(copia)
+        if resumen is not None:
+            resumen = copy.deepcopy(resumen)
+            self.ubicar_resumen(resumen, ruta_destino)
+        return reubicados, copy.deepcopy(parciales), resumen
+    
+    def _resultado_de(self, ruta_archivo: str, nuevos: Dict[str, Tuple],
+                      cache: Optional[CacheAnalisis]) -> Tuple[List[Dict], Dict[str, Any], Optional[Dict]]:
+        """Resultado de un archivo ya analizado (en memoria o en la cache)"""
+        resultado = nuevos.get(ruta_archivo)
+        if resultado is None:
+            with self._fase('cache'):
+                resultado = cache.cargar(ruta_archivo)
+        if resultado is None:
+            # Entrada de cache ilegible: se analiza de nuevo
+            resultado = self.analizar_archivo_aislado(ruta_archivo)
+            self._fusionar_perfil(ruta_archivo, resultado)
+            cache.guardar(ruta_archivo, *resultado)
+        return resultado
+    
+    def _mostrar_cache(self, cache: CacheAnalisis):
+        self.avisar(f"\n♻️  Cache: {cache.resumen['reutilizados']} reutilizados, "
+                    f"{cache.resumen['analizados']} analizados, "
+                    f"{cache.resumen['reubicados']} reubicados, "
+                    f"{cache.resumen['eliminados']} eliminados", NIVEL_RESUMEN)
+        self.progreso.evento('cache', **cache.resumen)
+    
+    def escanear_shard(self, indice: int, total_shards: int, workers: int = 1,
+                       cache: Optional[CacheAnalisis] = None, ruta_salida: Optional[str] = None) -> str:
+        """
+        Analiza solo los archivos del shard indice/total_shards y escribe su
+        salida (ver ShardAnalisis); los montajes entre archivos se resuelven
+        al combinar los shards con fusionar_shards. Devuelve la ruta escrita.
+        """
+        inicio = time.perf_counter()
+        archivos = self.listar_archivos()
+        propios = [(posicion, ruta_archivo) for posicion, ruta_archivo in enumerate(archivos)
+                   if shard_de(ruta_archivo, total_shards) == indice]
+        rutas = [ruta_archivo for _, ruta_archivo in propios]
+        self.avisar(f"🧩 Shard {indice}/{total_shards}: {len(rutas)} de {len(archivos)} archivos", NIVEL_RESUMEN)
+        
+        nuevos = self._analizar_pendientes(rutas, workers, cache)
+        if cache is not None:
+            # Se poda con el listado completo: las entradas de otros shards siguen valiendo
+            cache.podar(archivos)
         
-        with open(ARCHIVO_SALIDA_JSON, 'w', encoding='utf-8') as f:
-            json.dump(datos_completos, f, indent=2, ensure_ascii=False)
+        montajes = []
+        for posicion, ruta_archivo in propios:
+            resumen = nuevos[ruta_archivo][2] if ruta_archivo in nuevos else cache.resumen_montaje(ruta_archivo)
+            montajes.append([posicion, resumen])
         
-        print(f"📋 JSON generado: {ARCHIVO_SALIDA_JSON}")
+        def entradas():
+            for posicion, ruta_archivo in propios:
+                registros, parciales, _ = self._resultado_de(ruta_archivo, nuevos, cache)
+                self.fusionar_estadisticas(parciales)
+                self.resumen_registros['total'] += len(registros)
+                self.progreso.archivo(ruta_archivo, registros, parciales)
+                yield posicion, ruta_archivo, registros, parciales
+        
+        ruta_salida = ruta_salida or ShardAnalisis.ruta_salida(indice, total_shards)
+        with self._fase('salida'):
+            ShardAnalisis.escribir(ruta_salida, {
+                'shard': indice,
+                'total_shards': total_shards,
+                'version': self.version_analisis(),
+                'listado': huella_listado(archivos),
+                'total_archivos': len(archivos),
+                'montajes': montajes
+            }, entradas())
+        
+        if self.perfil is not None:
+            self.perfil.total += time.perf_counter() - inicio
+        
+        if cache is not None:
+            cache.escribir()
+            self._mostrar_cache(cache)
+        return ruta_salida
+    
+    def fusionar_shards(self, shards: List['ShardAnalisis'], sink: Optional[EscritorRegistros] = None):
+        """
+        Combina las salidas de todos los shards de un escaneo: resuelve los
+        montajes con los resúmenes de todos los archivos y emite registros y
+        estadísticas en el orden del listado global, así el resultado es el
+        mismo que el de un escaneo sin shards
+        """
+        total_archivos = ShardAnalisis.validar(shards, self.version_analisis())
+        
+        with self._fase('montajes'):
+            resumenes = [None] * total_archivos
+            for shard in shards:
+                for posicion, resumen in shard.cabecera['montajes']:
+                    resumenes[posicion] = resumen
+            prefijos = GrafoMontajes(resumenes, self.resumen_paquete).prefijos_externos()
+        
+        # Cada shard está en orden de posición: basta una mezcla ordenada
+        for _, registros, parciales in heapq.merge(*(shard.entradas() for shard in shards),
+                                                   key=lambda entrada: entrada[0]):
+            with self._fase('montajes'):
+                self.aplicar_montajes(registros, prefijos)
+            with self._fase('salida'):
+                self.emitir_registros(registros, sink)
+            self.fusionar_estadisticas(parciales)
+    
+    def _fusionar_perfil(self, ruta_archivo: str, resultado: Tuple[List[Dict], Dict[str, Any], Optional[Dict]]):
+        """Saca el perfil del archivo de sus estadísticas parciales (no se guarda en la cache)"""
+        perfil_archivo = resultado[1].pop('perfil', None)
+        if self.perfil is not None and perfil_archivo is not None:
+            self.perfil.fusionar(ruta_archivo, perfil_archivo)
+    
+    def estadisticas_serializables(self) -> Dict[str, Any]:
+        """Estadísticas listas para JSON (set -> lista ordenada)"""
+        stats = self.estadisticas.copy()
+        stats['tecnologias_detectadas'] = sorted(stats['tecnologias_detectadas'])
+        if self.perfil is not None:
+            stats['perfil'] = self.perfil.como_dict(self.perfil_top)
+        return stats
+    
+    def metadatos_salida(self, total_registros: int) -> Dict[str, Any]:
+        return {
+            'fecha_analisis': datetime.now().isoformat(),
+            'version_analyzer': VERSION_ANALYZER,
+            'ruta_proyecto': self.ruta_proyecto,
+            'total_registros': total_registros
+        }
     
     def mostrar_estadisticas(self):
         """Muestra estadísticas detalladas del análisis - VERSIÓN COMPLETA"""
@@ -1443,6 +3872,8 @@ class EnhancedEndpointAnalyzer:
         print(f"   Total encontrados: {self.estadisticas['total_archivos']}")
         print(f"   Procesados: {self.estadisticas['archivos_procesados']}")
         print(f"   Con errores: {self.estadisticas['archivos_con_errores']}")
+        for motivo, count in sorted(self.estadisticas['archivos_filtrados'].items()):
+            print(f"   Sin análisis detallado ({MOTIVOS_FILTRO[motivo]}): {count}")
         
         print(f"\n🎯 Endpoints (PRIMERA PASADA):")
         print(f"   Total encontrados: {self.estadisticas['endpoints_encontrados']}")
@@ -1456,11 +3887,9 @@ class EnhancedEndpointAnalyzer:
         print(f"   Clases encontradas: {self.estadisticas['clases_encontradas']}")
         print(f"   Funciones encontradas: {self.estadisticas['funciones_encontradas']}")
         
-        # Contar por categoría
-        categorias = {}
-        for registro in self.registros:
-            cat = registro['categoria']
-            categorias[cat] = categorias.get(cat, 0) + 1
+        # Conteos y ejemplos acumulados al emitir los registros
+        categorias = self.resumen_registros['categorias']
+        ejemplos = self.resumen_registros['ejemplos']
         
         print(f"\n📊 Distribución por categoría:")
         for cat, count in sorted(categorias.items(), key=lambda x: x[1], reverse=True):
@@ -1480,14 +3909,15 @@ class EnhancedEndpointAnalyzer:
         print(f"   Incluidos: {self.estadisticas['routers_incluidos']}")
         
         # Mostrar ejemplos de endpoints
-        endpoints_encontrados = [r for r in self.registros if r['categoria'] == 'ENDPOINT']
+        endpoints_encontrados = ejemplos['ENDPOINT']
+        total_endpoints = categorias.get('ENDPOINT', 0)
         
         if endpoints_encontrados:
             print(f"\n🔍 Ejemplos de endpoints capturados:")
             print(f"   {'Método':<8} {'Endpoint':<45} {'Response Model':<25}")
             print(f"   {'-'*8} {'-'*45} {'-'*25}")
             
-            for i, endpoint in enumerate(endpoints_encontrados[:10]):
+            for i, endpoint in enumerate(endpoints_encontrados):
                 metodo = endpoint['metodo_http']
                 ruta = endpoint['endpoint']
                 modelo = endpoint['response_model'] or '-'
@@ -1499,18 +3929,19 @@ class EnhancedEndpointAnalyzer:
                 
                 print(f"   {metodo:<8} {ruta:<45} {modelo:<25}")
             
-            if len(endpoints_encontrados) > 10:
-                print(f"   ... y {len(endpoints_encontrados) - 10} endpoints más")
+            if total_endpoints > 10:
+                print(f"   ... y {total_endpoints - 10} endpoints más")
         
         # Mostrar ejemplos de clases
-        clases_encontradas = [r for r in self.registros if r['categoria'] == 'CLASS']
+        clases_encontradas = ejemplos['CLASS']
+        total_clases = categorias.get('CLASS', 0)
         
         if clases_encontradas:
             print(f"\n🏗️  Ejemplos de clases encontradas:")
             print(f"   {'Nombre':<30} {'Tipo':<15} {'Archivo':<25}")
             print(f"   {'-'*30} {'-'*15} {'-'*25}")
             
-            for i, clase in enumerate(clases_encontradas[:10]):
+            for i, clase in enumerate(clases_encontradas):
                 nombre = clase['elemento']
                 tipo_clase = clase['tipo']
                 archivo = clase['nombre_archivo']
@@ -1522,18 +3953,19 @@ class EnhancedEndpointAnalyzer:
                 
                 print(f"   {nombre:<30} {tipo_clase:<15} {archivo:<25}")
             
-            if len(clases_encontradas) > 10:
-                print(f"   ... y {len(clases_encontradas) - 10} clases más")
+            if total_clases > 10:
+                print(f"   ... y {total_clases - 10} clases más")
         
         # Mostrar ejemplos de funciones
-        funciones_encontradas = [r for r in self.registros if r['categoria'] == 'FUNCTION']
+        funciones_encontradas = ejemplos['FUNCTION']
+        total_funciones = categorias.get('FUNCTION', 0)
         
         if funciones_encontradas:
             print(f"\n⚡ Ejemplos de funciones encontradas:")
             print(f"   {'Nombre':<30} {'Tipo':<15} {'Async':<6}")
             print(f"   {'-'*30} {'-'*15} {'-'*6}")
             
-            for i, funcion in enumerate(funciones_encontradas[:10]):
+            for i, funcion in enumerate(funciones_encontradas):
                 nombre = funcion['elemento']
                 tipo_func = funcion['tipo']
                 es_async = '✓' if funcion['es_async'] else '-'
@@ -1543,58 +3975,292 @@ class EnhancedEndpointAnalyzer:
                 
                 print(f"   {nombre:<30} {tipo_func:<15} {es_async:<6}")
             
-            if len(funciones_encontradas) > 10:
-                print(f"   ... y {len(funciones_encontradas) - 10} funciones más")
+            if total_funciones > 10:
+                print(f"   ... y {total_funciones - 10} funciones más")
         
-        print(f"\n📊 TOTAL DE REGISTROS GENERADOS: {len(self.registros)}")
+        print(f"\n📊 TOTAL DE REGISTROS GENERADOS: {self.resumen_registros['total']}")
         print("="*80)
 
 
-def main():
+# ==========================================
+# 🧩 EXTRACTORES INCLUIDOS
+# ==========================================
+
+@registrar_extractor('endpoints')
+def extractor_endpoints(analyzer: EnhancedEndpointAnalyzer, archivo: ArchivoEnAnalisis) -> List[Dict]:
+    """PRIMERA PASADA: endpoints (FastAPI, Flask, Django)"""
+    archivo.endpoints = analyzer.extraer_endpoints_completos(archivo.contenido, archivo.ruta.name, archivo.analisis)
+    registros = [
+        analyzer.crear_registro_endpoint(endpoint, archivo.ruta, archivo.tecnologias, archivo.imports,
+                                         archivo.complejidad, archivo.include_routers)
+        for endpoint in archivo.endpoints
+    ]
+    analyzer.estadisticas['endpoints_encontrados'] += len(registros)
+    return registros
+
+
+@registrar_extractor('clases')
+def extractor_clases(analyzer: EnhancedEndpointAnalyzer, archivo: ArchivoEnAnalisis) -> List[Dict]:
+    """Clases: modelos, schemas, excepciones..."""
+    clases = analyzer.extraer_clases_avanzado(archivo.contenido, archivo.tipo, archivo.tecnologias, archivo.analisis)
+    registros = [
+        analyzer.crear_registro_clase(clase, archivo.ruta, archivo.tipo, archivo.tecnologias, archivo.imports,
+                                      archivo.complejidad, archivo.include_routers)
+        for clase in clases
+    ]
+    analyzer.estadisticas['clases_encontradas'] += len(registros)
+    return registros
+
+
+@registrar_extractor('funciones')
+def extractor_funciones(analyzer: EnhancedEndpointAnalyzer, archivo: ArchivoEnAnalisis) -> List[Dict]:
+    """Funciones: servicios, utils, helpers... (sin las que ya son endpoints)"""
+    funciones = analyzer.extraer_funciones_avanzado(archivo.contenido, archivo.tipo, archivo.analisis)
+    nombres_endpoints = {ep['funcion'] for ep in archivo.endpoints}
+    registros = [
+        analyzer.crear_registro_funcion(funcion, archivo.ruta, archivo.tipo, archivo.tecnologias, archivo.imports,
+                                        archivo.complejidad, archivo.include_routers)
+        for funcion in funciones if funcion['nombre'] not in nombres_endpoints
+    ]
+    analyzer.estadisticas['funciones_encontradas'] += len(registros)
+    return registros
+
+
+@registrar_extractor('configuraciones')
+def extractor_configuraciones(analyzer: EnhancedEndpointAnalyzer, archivo: ArchivoEnAnalisis) -> List[Dict]:
+    """Configuraciones: variables, constantes, settings"""
+    return [
+        analyzer.crear_registro_configuracion(config, archivo.ruta, archivo.tipo, archivo.tecnologias,
+                                              archivo.imports, archivo.complejidad)
+        for config in analyzer.extraer_configuraciones(archivo.contenido, archivo.tipo, archivo.analisis)
+    ]
+
+
+@registrar_extractor('dependencias')
+def extractor_dependencias(analyzer: EnhancedEndpointAnalyzer, archivo: ArchivoEnAnalisis) -> List[Dict]:
+    """Dependencias: inyección de dependencias, factories"""
+    return [
+        analyzer.crear_registro_dependencia(dep, archivo.ruta, archivo.tipo, archivo.tecnologias,
+                                            archivo.imports, archivo.complejidad)
+        for dep in analyzer.extraer_dependencias_inyeccion(archivo.contenido, archivo.analisis)
+    ]
+
+
+# Analyzer de cada proceso del pool (se crea una vez por worker)
+_ANALYZER_WORKER: Optional[EnhancedEndpointAnalyzer] = None
+
+
+def _inicializar_worker(ruta_proyecto: str, usar_mmap: bool, perfilar: bool = False,
+                        limites: Optional[LimitesArchivo] = None, extractores: Optional[List[str]] = None,
+                        nivel: int = NIVEL_DETALLADO):
+    global _ANALYZER_WORKER
+    _ANALYZER_WORKER = EnhancedEndpointAnalyzer(ruta_proyecto, usar_mmap=usar_mmap, perfilar=perfilar,
+                                                limites=limites, extractores=extractores,
+                                                progreso=ReportadorProgreso(nivel))
+
+
+def _procesar_en_worker(ruta_archivo: str) -> Tuple[List[Dict], Dict[str, Any], Optional[Dict]]:
+    return _ANALYZER_WORKER.analizar_archivo_aislado(ruta_archivo)
+
+
+def parsear_lista(valor: str) -> List[str]:
+    """Lista separada por comas (--extractores endpoints,clases)"""
+    return [nombre.strip() for nombre in valor.split(',') if nombre.strip()]
+
+
+def parsear_argumentos(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Enhanced Code Analyzer")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Procesos para analizar archivos en paralelo (1 = serie)")
+    parser.add_argument('--completo', action='store_true',
+                        help="Ignora la cache y vuelve a analizar todos los archivos")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="No lee ni escribe la cache de análisis incremental")
+    parser.add_argument('--parquet', action='store_true',
+                        help=f"Genera también {ARCHIVO_SALIDA_PARQUET} (requiere pyarrow)")
+    parser.add_argument('--compresion', choices=['zstd', 'snappy', 'none'], default='zstd',
+                        help="Compresión de la salida Parquet")
+    parser.add_argument('--snapshot-fuentes', action='store_true',
+                        help=f"Guarda las fuentes en {ARCHIVO_SNAPSHOT_FUENTES} y omite codigo_limpio "
+                             "en los registros (se lee del snapshot con el índice de fuentes)")
+    parser.add_argument('--git-base', default=None, metavar='REF',
+                        help="Analiza solo los archivos cambiados respecto a REF (git local) y genera "
+                             "el delta del análisis; sin repositorio git hace el escaneo completo")
+    parser.add_argument('--shard', type=parsear_shard, default=None, metavar='i/N',
+                        help=f"Analiza solo el shard i de N (0 <= i < N) y deja su salida en {CARPETA_SHARDS}")
+    parser.add_argument('--merge', nargs='+', default=None, metavar='SHARD',
+                        help="Combina las salidas de todos los shards de un escaneo en el dataset final")
+    filtro = parser.add_argument_group("filtro de archivos grandes y generados (0 = sin límite)")
+    filtro.add_argument('--limite-bytes', type=int, default=LIMITE_BYTES_ARCHIVO,
+                        help="Tamaño máximo de un archivo a analizar a fondo")
+    filtro.add_argument('--limite-lineas', type=int, default=LIMITE_LINEAS_ARCHIVO,
+                        help="Líneas máximas de un archivo a analizar a fondo")
+    filtro.add_argument('--limite-longitud-linea', type=int, default=LIMITE_LONGITUD_LINEA,
+                        help="Una línea más larga marca el archivo como generado o minificado")
+    filtro.add_argument('--incluir-generados', action='store_true',
+                        help="Analiza también los archivos con marcas de código generado o líneas muy largas")
+    filtro.add_argument('--omitir-filtrados', action='store_true',
+                        help="Los archivos filtrados no generan registros (por defecto, un registro FILE)")
+    pasadas = parser.add_argument_group("extractores por archivo")
+    pasadas.add_argument('--extractores', type=parsear_lista, default=None, metavar='LISTA',
+                         help=f"Solo estos extractores, separados por comas ({', '.join(EXTRACTORES)})")
+    pasadas.add_argument('--sin-extractores', type=parsear_lista, default=None, metavar='LISTA',
+                         help="Desactiva estos extractores, separados por comas")
+    parser.add_argument('--nivel', choices=list(NIVELES_PROGRESO), default='resumen',
+                        help="Mensajes por consola: silencioso, resumen (barra de progreso y estadísticas) "
+                             "o detallado (además, cada archivo y endpoint)")
+    parser.add_argument('--eventos', nargs='?', const=ARCHIVO_EVENTOS, default=None, metavar='ARCHIVO',
+                        help=f"Añade un evento JSONL por archivo analizado (por defecto en {ARCHIVO_EVENTOS})")
+    parser.add_argument('--perfil', action='store_true',
+                        help="Mide el tiempo por fase y por archivo (se guarda en estadisticas.perfil)")
+    parser.add_argument('--perfil-top', type=int, default=10,
+                        help="Archivos más lentos a mostrar y guardar con --perfil")
+    parser.add_argument('--watch', action='store_true',
+                        help="Tras el análisis, sigue observando y emite deltas por cada archivo guardado")
+    parser.add_argument('--watch-socket', default=None,
+                        help="Socket Unix al que enviar también los deltas del modo watch")
+    parser.add_argument('--polling', action='store_true',
+                        help="En modo watch, usa polling en lugar de inotify")
+    args = parser.parse_args(argv)
+    if sum(opcion is not None for opcion in (args.shard, args.merge, args.git_base)) > 1:
+        parser.error("--shard, --merge y --git-base no se pueden combinar")
+    try:
+        args.extractores = seleccionar_extractores(args.extractores, args.sin_extractores)
+    except ValueError as error:
+        parser.error(str(error))
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
     """Función principal"""
-    print("="*80)
-    print("🚀 ENHANCED CODE ANALYZER - Versión 4.0.0 COMPLETA")
-    print("="*80)
-    print("📋 DOBLE ANÁLISIS:")
-    print("   1️⃣  PRIMERA PASADA: Endpoints (FastAPI, Flask, Django)")
-    print("   2️⃣  SEGUNDA PASADA: Modelos, Schemas, Funciones, Configuraciones")
-    print("="*80)
-    print("\n🎯 Genera documentación completa para:")
-    print("   • Agentes conversacionales (LLM embeddings)")
-    print("   • Documentación técnica automática")
-    print("   • Análisis de código y optimizaciones")
-    print("   • Mapeo completo del proyecto")
-    print("="*80)
-    
-    analyzer = EnhancedEndpointAnalyzer(RUTA_PROYECTO)
-    
-    print("\n🔍 Iniciando escaneo completo...")
-    analyzer.escanear_proyecto()
-    
-    print("\n💾 Generando archivos de salida...")
-    analyzer.generar_csv()
-    analyzer.generar_json()
-    
-    analyzer.mostrar_estadisticas()
-    
-    print("\n" + "="*80)
-    print("✅ ANÁLISIS COMPLETADO EXITOSAMENTE")
-    print("="*80)
-    print(f"\n📂 Archivos generados:")
-    print(f"   • {ARCHIVO_SALIDA_CSV}")
-    print(f"   • {ARCHIVO_SALIDA_JSON}")
-    print(f"\n📊 Resumen:")
-    print(f"   • Endpoints: {analyzer.estadisticas['endpoints_encontrados']}")
-    print(f"   • Clases: {analyzer.estadisticas['clases_encontradas']}")
-    print(f"   • Funciones: {analyzer.estadisticas['funciones_encontradas']}")
-    print(f"   • Total registros: {len(analyzer.registros)}")
-    print("="*80)
-    print("\n💡 Próximos pasos:")
-    print("   1. Usa el CSV para entrenar embeddings (RAG)")
-    print("   2. Analiza el JSON para métricas de código")
-    print("   3. Identifica oportunidades de refactorización")
-    print("   4. Genera documentación automática")
-    print("="*80 + "\n")
+    args = parsear_argumentos(argv)
+    progreso = ReportadorProgreso(NIVELES_PROGRESO[args.nivel], args.eventos)
+    try:
+        ejecutar(args, progreso)
+    finally:
+        progreso.cerrar()
+
+
+def ejecutar(args: argparse.Namespace, progreso: ReportadorProgreso):
+    """Escaneo, shard, merge o delta git según los argumentos"""
+    avisar = progreso.avisar
+    inicio = time.perf_counter()
+    progreso.evento('inicio', version=VERSION_ANALYZER, extractores=args.extractores)
+    
+    def evento_fin(analyzer: EnhancedEndpointAnalyzer):
+        progreso.evento('fin', archivos=analyzer.estadisticas['total_archivos'],
+                        registros=analyzer.resumen_registros['total'],
+                        errores=analyzer.estadisticas['archivos_con_errores'],
+                        segundos=round(time.perf_counter() - inicio, 3))
+    
+    avisar("="*80)
+    avisar(f"🚀 ENHANCED CODE ANALYZER - Versión {VERSION_ANALYZER} COMPLETA")
+    avisar("="*80)
+    avisar("📋 DOBLE ANÁLISIS:")
+    avisar("   1️⃣  PRIMERA PASADA: Endpoints (FastAPI, Flask, Django)")
+    avisar("   2️⃣  SEGUNDA PASADA: Modelos, Schemas, Funciones, Configuraciones")
+    avisar(f"   🧩 Extractores: {', '.join(args.extractores)}")
+    avisar("="*80)
+    avisar("\n🎯 Genera documentación completa para:")
+    avisar("   • Agentes conversacionales (LLM embeddings)")
+    avisar("   • Documentación técnica automática")
+    avisar("   • Análisis de código y optimizaciones")
+    avisar("   • Mapeo completo del proyecto")
+    avisar("="*80)
+    
+    limites = LimitesArchivo(
+        max_bytes=args.limite_bytes, max_lineas=args.limite_lineas,
+        max_longitud_linea=args.limite_longitud_linea,
+        detectar_generados=not args.incluir_generados, omitir=args.omitir_filtrados
+    )
+    analyzer = EnhancedEndpointAnalyzer(RUTA_PROYECTO, perfilar=args.perfil, limites=limites,
+                                        extractores=args.extractores, progreso=progreso)
+    analyzer.perfil_top = args.perfil_top
+    
+    if args.git_base:
+        from ia.git_analisis import ejecutar_git_delta
+        if ejecutar_git_delta(analyzer, args.git_base) is not None:
+            return
+    
+    shards = None
+    cache = None
+    if args.merge:
+        try:
+            shards = [ShardAnalisis(ruta) for ruta in args.merge]
+            ShardAnalisis.validar(shards, analyzer.version_analisis())
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"❌ No se pueden combinar los shards: {e}")
+        avisar(f"\n🧩 Combinando {len(shards)} shards...")
+    else:
+        avisar("\n🔍 Iniciando escaneo completo...")
+        if not args.sin_cache:
+            cache = CacheAnalisis(version=analyzer.version_analisis())
+            if args.completo:
+                cache.invalidar()
+    
+    if args.shard is not None:
+        indice, total_shards = args.shard
+        ruta_shard = analyzer.escanear_shard(indice, total_shards, workers=args.workers, cache=cache)
+        if analyzer.perfil is not None and progreso.muestra(NIVEL_RESUMEN):
+            analyzer.perfil.mostrar(analyzer.perfil_top)
+        avisar(f"\n🧩 Shard {indice}/{total_shards} generado: {ruta_shard}")
+        avisar(f"   Archivos: {analyzer.estadisticas['total_archivos']} | "
+               f"Registros: {analyzer.resumen_registros['total']}")
+        avisar(f"   Con todos los shards: python -m ia.files_to_csv --merge "
+               f"{CARPETA_SHARDS}/shard_*_de_{total_shards}.jsonl")
+        evento_fin(analyzer)
+        return
+    
+    avisar("\n💾 Generando archivos de salida en streaming...")
+    sink = EscritorRegistros(
+        archivo_parquet=ARCHIVO_SALIDA_PARQUET if args.parquet else None,
+        compresion=args.compresion,
+        snapshot=SnapshotFuentes(analyzer.leer_contenido, avisar=avisar) if args.snapshot_fuentes else None,
+        progreso=progreso
+    ).abrir()
+    if shards is not None:
+        analyzer.fusionar_shards(shards, sink)
+    else:
+        analyzer.escanear_proyecto(workers=args.workers, cache=cache, sink=sink)
+    sink.cerrar(analyzer.estadisticas_serializables(),
+                analyzer.metadatos_salida(sink.total))
+    evento_fin(analyzer)
+    
+    if progreso.muestra(NIVEL_RESUMEN):
+        analyzer.mostrar_estadisticas()
+    if analyzer.perfil is not None and progreso.muestra(NIVEL_RESUMEN):
+        analyzer.perfil.mostrar(analyzer.perfil_top)
+    
+    avisar("\n" + "="*80)
+    avisar("✅ ANÁLISIS COMPLETADO EXITOSAMENTE")
+    avisar("="*80)
+    avisar(f"\n📂 Archivos generados:")
+    avisar(f"   • {ARCHIVO_SALIDA_CSV}")
+    avisar(f"   • {ARCHIVO_SALIDA_JSON}")
+    if sink.archivo_parquet:
+        avisar(f"   • {sink.archivo_parquet}")
+    if sink.snapshot is not None:
+        avisar(f"   • {ARCHIVO_SNAPSHOT_FUENTES} (+ {ARCHIVO_INDICE_FUENTES})")
+    avisar(f"\n📊 Resumen:")
+    avisar(f"   • Endpoints: {analyzer.estadisticas['endpoints_encontrados']}")
+    avisar(f"   • Clases: {analyzer.estadisticas['clases_encontradas']}")
+    avisar(f"   • Funciones: {analyzer.estadisticas['funciones_encontradas']}")
+    avisar(f"   • Total registros: {analyzer.resumen_registros['total']}")
+    avisar("="*80)
+    avisar("\n💡 Próximos pasos:")
+    avisar("   1. Usa el CSV para entrenar embeddings (RAG)")
+    avisar("   2. Analiza el JSON para métricas de código")
+    avisar("   3. Identifica oportunidades de refactorización")
+    avisar("   4. Genera documentación automática")
+    avisar("="*80 + "\n")
+    
+    if args.watch:
+        from ia.watch_analisis import ejecutar_watch
+        ejecutar_watch(EnhancedEndpointAnalyzer(RUTA_PROYECTO, limites=limites, extractores=args.extractores,
+                                                progreso=progreso),
+                       cache,
+                       ruta_socket=args.watch_socket, forzar_polling=args.polling)
 
 
 if __name__ == "__main__":
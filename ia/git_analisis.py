@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Modo git del analyzer - Delta respecto a un commit base
+Usa el repositorio git local (sin red) para elegir qué archivos analizar:
+los que cambiaron respecto a REF (git diff --name-only) y los nuevos sin
+seguimiento (git ls-files --others). Cada uno se analiza en REF y en el
+árbol de trabajo y se genera el delta de registros (agregados, eliminados,
+modificados) con el mismo formato que el modo watch, así un pipeline de PR
+solo paga por los archivos cambiados. Sin repositorio git (o sin REF) se
+vuelve al escaneo completo.
+
+Uso:
+    python -m ia.files_to_csv --git-base origin/main
+    python -m ia.files_to_csv --git-base HEAD~1
+"""
+
+import os
+import json
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from ia.files_to_csv import (
+    EnhancedEndpointAnalyzer, GrafoMontajes, Registro, CARPETAS_EXCLUIR, MARCA_MONTAJE, VERSION_ANALYZER,
+    NIVEL_RESUMEN, calcular_delta, modulo_relativo
+)
+
+ARCHIVO_DELTA_GIT = "datasets/delta_git.json"
+
+
+# ==========================================
+# 🌿 REPOSITORIO GIT LOCAL
+# ==========================================
+
+def ejecutar_git(ruta: str, *argumentos: str) -> Optional[bytes]:
+    """Salida de un comando git en el repositorio de ruta; None si git falla o no está"""
+    try:
+        resultado = subprocess.run(
+            ['git', '-C', ruta, *argumentos],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False
+        )
+    except OSError:
+        return None
+    return resultado.stdout if resultado.returncode == 0 else None
+
+
+def normalizar_texto(datos: bytes) -> str:
+    """Bytes de un archivo como los lee el analyzer (utf-8, saltos de línea normalizados)"""
+    contenido = datos.decode('utf-8', 'ignore')
+    if '\r' in contenido:
+        contenido = contenido.replace('\r\n', '\n').replace('\r', '\n')
+    return contenido
+
+
+class RepositorioGit:
+    """Consultas de solo lectura al repositorio local"""
+
+    def __init__(self, raiz: str):
+        self.raiz = raiz
+
+    @classmethod
+    def detectar(cls, ruta: str) -> Optional['RepositorioGit']:
+        """Repositorio que contiene a ruta, o None si no hay (o git no está instalado)"""
+        salida = ejecutar_git(ruta, 'rev-parse', '--show-toplevel')
+        if salida is None:
+            return None
+        return cls(salida.decode('utf-8').strip())
+
+    def git(self, *argumentos: str) -> Optional[bytes]:
+        return ejecutar_git(self.raiz, *argumentos)
+
+    def resolver(self, ref: str) -> Optional[str]:
+        """Hash del commit al que apunta ref (None si no existe localmente)"""
+        salida = self.git('rev-parse', '--verify', '--quiet', f"{ref}^{{commit}}")
+        return salida.decode('utf-8').strip() if salida else None
+
+    def _rutas(self, *argumentos: str) -> List[str]:
+        salida = self.git(*argumentos) or b''
+        return [ruta.decode('utf-8') for ruta in salida.split(b'\0') if ruta]
+
+    def cambiados(self, commit: str) -> List[str]:
+        """Archivos seguidos que difieren entre commit y el árbol de trabajo (renombres = baja + alta)"""
+        return self._rutas('diff', '--name-only', '-z', '--no-renames', commit, '--')
+
+    def sin_seguimiento(self) -> List[str]:
+        """Archivos nuevos aún no añadidos (respetando .gitignore)"""
+        return self._rutas('ls-files', '--others', '--exclude-standard', '-z')
+
+    def contenido_en(self, commit: str, ruta_git: str) -> Optional[str]:
+        """Texto del archivo en commit, o None si no existía"""
+        datos = self.git('show', f"{commit}:{ruta_git}")
+        return normalizar_texto(datos) if datos is not None else None
+
+
+# ==========================================
+# 📝 DELTA RESPECTO A UN COMMIT
+# ==========================================
+
+class DeltaGit:
+    """
+    Delta del análisis entre un commit y el árbol de trabajo. Se analizan
+    los archivos cambiados en ambas versiones y, si cambia algún montaje de
+    routers, los archivos sin cambios cuyos endpoints cambian de prefix.
+    """
+
+    def __init__(self, analyzer: EnhancedEndpointAnalyzer, repo: RepositorioGit):
+        self.analyzer = analyzer
+        self.repo = repo
+        self.carpeta_raiz = analyzer.encontrar_carpeta_raiz()
+        # Resúmenes de montaje de los archivos sin cambios (iguales en ambas versiones)
+        self._resumenes_comunes: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def ruta_analyzer(self, ruta_git: str) -> Optional[str]:
+        """Ruta de un archivo del repositorio tal como la lista el analyzer (None si no se procesa)"""
+        absoluta = os.path.join(self.repo.raiz, ruta_git)
+        relativa = os.path.relpath(absoluta, os.path.realpath(self.carpeta_raiz))
+        partes = Path(relativa).parts
+        if not partes or partes[0] == '..':
+            return None
+        if any(parte in CARPETAS_EXCLUIR or parte.startswith('.') for parte in partes[:-1]):
+            return None
+        ruta = os.path.join(self.carpeta_raiz, relativa)
+        return ruta if self.analyzer.deberia_procesar_archivo(ruta) else None
+
+    def _resumen_comun(self, ruta_archivo: str) -> Optional[Dict[str, Any]]:
+        if ruta_archivo not in self._resumenes_comunes:
+            self._resumenes_comunes[ruta_archivo] = self.analyzer.resumen_montaje_de(ruta_archivo)
+        return self._resumenes_comunes[ruta_archivo]
+
+    def _prefijos(self, listado: List[str], resumenes: Dict[str, Optional[Dict]],
+                  montan: List[str]) -> Dict[Tuple[str, str], str]:
+        """
+        Prefixes de montaje de una versión: los resúmenes de los archivos
+        cambiados son los de esa versión; los demás son comunes y solo se
+        calculan si montan routers o si se necesitan al resolver un nombre
+        """
+        por_modulo = {modulo_relativo(r, self.analyzer.ruta_proyecto): r for r in listado}
+        iniciales = [
+            resumenes[r] if r in resumenes else self._resumen_comun(r)
+            for r in listado if r in resumenes or r in montan
+        ]
+
+        def cargar(modulo: str) -> Optional[Dict[str, Any]]:
+            ruta_archivo = por_modulo.get(modulo)
+            if ruta_archivo is None:
+                return self.analyzer.resumen_paquete(modulo)
+            if ruta_archivo in resumenes:
+                return resumenes[ruta_archivo]
+            return self._resumen_comun(ruta_archivo)
+
+        return GrafoMontajes(iniciales, cargar).prefijos_externos()
+
+    def calcular(self, commit: str) -> Dict[str, Any]:
+        # Archivos cambiados (en la forma de ruta del analyzer) -> ruta en git
+        cambiados: Dict[str, str] = {}
+        for ruta_git in self.repo.cambiados(commit) + self.repo.sin_seguimiento():
+            ruta_archivo = self.ruta_analyzer(ruta_git)
+            if ruta_archivo is not None:
+                cambiados.setdefault(ruta_archivo, ruta_git)
+        self.analyzer.avisar(f"🌿 {len(cambiados)} archivos cambiados respecto a {commit[:12]}", NIVEL_RESUMEN)
+
+        listado = self.analyzer.listar_archivos()
+        en_listado = set(listado)
+        # Los borrados desde el commit solo existen en la versión base
+        listado_base = listado + sorted(r for r in cambiados if r not in en_listado)
+
+        montan = []
+        for ruta_archivo in listado:
+            if ruta_archivo in cambiados:
+                continue
+            try:
+                with open(ruta_archivo, 'rb') as f:
+                    if MARCA_MONTAJE in f.read():
+                        montan.append(ruta_archivo)
+            except OSError:
+                continue
+
+        # Cada archivo cambiado, analizado en el commit y en el árbol de trabajo
+        anteriores: Dict[str, Tuple] = {}
+        actuales: Dict[str, Tuple] = {}
+        for ruta_archivo, ruta_git in sorted(cambiados.items()):
+            contenido_base = self.repo.contenido_en(commit, ruta_git)
+            if contenido_base is not None:
+                anteriores[ruta_archivo] = self.analyzer.analizar_archivo_aislado(ruta_archivo, contenido_base)
+            if ruta_archivo in en_listado:
+                actuales[ruta_archivo] = self.analyzer.analizar_archivo_aislado(ruta_archivo)
+
+        prefijos_base = self._prefijos(
+            listado_base, {r: anteriores[r][2] if r in anteriores else None for r in cambiados}, montan
+        )
+        prefijos_actual = self._prefijos(
+            listado, {r: actuales[r][2] if r in actuales else None for r in cambiados}, montan
+        )
+
+        # Archivos sin cambios cuyos endpoints cambian de prefix
+        modulos = {
+            modulo for (modulo, router) in set(prefijos_base) | set(prefijos_actual)
+            if prefijos_base.get((modulo, router)) != prefijos_actual.get((modulo, router))
+        }
+        afectados = [
+            r for r in listado
+            if r not in cambiados and modulo_relativo(r, self.analyzer.ruta_proyecto) in modulos
+        ]
+        if afectados:
+            self.analyzer.avisar(f"🔀 Montajes modificados, endpoints recalculados en: {', '.join(afectados)}",
+                                 NIVEL_RESUMEN)
+
+        registros_base, registros_actuales = [], []
+        for ruta_archivo in sorted(cambiados):
+            if ruta_archivo in anteriores:
+                registros = anteriores[ruta_archivo][0]
+                self.analyzer.aplicar_montajes(registros, prefijos_base)
+                registros_base.extend(registros)
+            if ruta_archivo in actuales:
+                registros = actuales[ruta_archivo][0]
+                self.analyzer.aplicar_montajes(registros, prefijos_actual)
+                registros_actuales.extend(registros)
+        for ruta_archivo in afectados:
+            registros = self.analyzer.analizar_archivo_aislado(ruta_archivo)[0]
+            copia = [Registro(r) for r in registros]
+            self.analyzer.aplicar_montajes(copia, prefijos_base)
+            self.analyzer.aplicar_montajes(registros, prefijos_actual)
+            registros_base.extend(copia)
+            registros_actuales.extend(registros)
+
+        delta = calcular_delta(registros_base, registros_actuales)
+        return dict(
+            delta,
+            base=commit,
+            archivos_cambiados=sorted(cambiados),
+            afectados_por_montaje=afectados
+        )
+
+
+def ejecutar_git_delta(analyzer: EnhancedEndpointAnalyzer, ref: str,
+                       archivo_delta: str = ARCHIVO_DELTA_GIT) -> Optional[Dict[str, Any]]:
+    """
+    Genera el delta del análisis respecto a ref y lo escribe en
+    archivo_delta. Devuelve None (y no escribe nada) si no hay repositorio
+    git o ref no existe en él: entonces corresponde el escaneo completo.
+    """
+    repo = RepositorioGit.detectar(analyzer.ruta_proyecto)
+    if repo is None:
+        analyzer.avisar("⚠️  No hay repositorio git: se hace el escaneo completo", NIVEL_RESUMEN)
+        return None
+    commit = repo.resolver(ref)
+    if commit is None:
+        analyzer.avisar(f"⚠️  '{ref}' no existe en el repositorio local: se hace el escaneo completo", NIVEL_RESUMEN)
+        return None
+
+    delta = DeltaGit(analyzer, repo).calcular(commit)
+    delta.update(ref=ref, fecha=datetime.now().isoformat(), version_analyzer=VERSION_ANALYZER)
+
+    os.makedirs(os.path.dirname(archivo_delta) or '.', exist_ok=True)
+    with open(archivo_delta + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(delta, f, indent=2, ensure_ascii=False, default=dict)
+    os.replace(archivo_delta + '.tmp', archivo_delta)
+
+    analyzer.avisar(f"\n📝 Delta respecto a {ref}: {len(delta['agregados'])} agregados, "
+                    f"{len(delta['eliminados'])} eliminados, {len(delta['modificados'])} modificados, "
+                    f"{len(delta['reubicados'])} reubicados", NIVEL_RESUMEN)
+    analyzer.avisar(f"   Guardado en: {archivo_delta}", NIVEL_RESUMEN)
+    return delta
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Modo watch del analyzer - Reanálisis continuo
+Mantiene en memoria el análisis por archivo y, cada vez que se guarda un
+archivo fuente, reanaliza SOLO ese archivo y emite un delta de registros
+(agregados, eliminados, modificados y reubicados: los que solo cambian de
+posición en el archivo) para la etapa de embeddings.
+
+Uso:
+    python -m ia.files_to_csv --watch
+    python -m ia.files_to_csv --watch --watch-socket /tmp/analisis.sock
+"""
+
+import os
+import json
+import time
+import errno
+import select
+import socket
+import struct
+import ctypes
+import ctypes.util
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable
+
+from ia.files_to_csv import (
+    EnhancedEndpointAnalyzer, CacheAnalisis, GrafoMontajes, Registro, CARPETAS_EXCLUIR, NIVEL_RESUMEN,
+    calcular_delta
+)
+
+ARCHIVO_CAMBIOS = "datasets/cambios_analisis.jsonl"
+
+# Tiempo que se siguen acumulando eventos tras el primero (un guardado
+# suele generar varios eventos seguidos)
+ESPERA_AGRUPAR = 0.2
+INTERVALO_POLLING = 1.0
+
+# Constantes de <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+MASCARA_INOTIFY = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                   IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+FORMATO_EVENTO = 'iIII'
+TAMANO_EVENTO = struct.calcsize(FORMATO_EVENTO)
+
+
+def directorio_observable(nombre: str) -> bool:
+    return nombre not in CARPETAS_EXCLUIR and not nombre.startswith('.')
+
+
+class ObservadorPolling:
+    """Detecta cambios comparando (mtime, tamaño) de los archivos cada intervalo"""
+
+    def __init__(self, carpeta_raiz: str, intervalo: float = INTERVALO_POLLING):
+        self.carpeta_raiz = carpeta_raiz
+        self.intervalo = intervalo
+        self._estado = self._instantanea()
+
+    def _instantanea(self) -> Dict[str, Tuple[int, int]]:
+        estado = {}
+        for raiz, dirs, archivos in os.walk(self.carpeta_raiz):
+            dirs[:] = [d for d in dirs if directorio_observable(d)]
+            for archivo in archivos:
+                ruta = os.path.join(raiz, archivo)
+                try:
+                    st = os.stat(ruta)
+                except OSError:
+                    continue
+                estado[ruta] = (st.st_mtime_ns, st.st_size)
+        return estado
+
+    def esperar_cambios(self, timeout: Optional[float] = None) -> Set[str]:
+        """Rutas creadas, modificadas o eliminadas desde la última llamada"""
+        time.sleep(self.intervalo if timeout is None else min(timeout, self.intervalo))
+        nuevo = self._instantanea()
+        cambiados = {r for r in nuevo if self._estado.get(r) != nuevo[r]}
+        cambiados |= set(self._estado) - set(nuevo)
+        self._estado = nuevo
+        return cambiados
+
+    def cerrar(self):
+        pass
+
+
+class ObservadorInotify:
+    """Detecta cambios con inotify (Linux) vía ctypes, sin dependencias externas"""
+
+    def __init__(self, carpeta_raiz: str):
+        nombre_libc = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(nombre_libc, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló")
+        self._directorios: Dict[int, str] = {}
+        for raiz, dirs, _ in os.walk(carpeta_raiz):
+            dirs[:] = [d for d in dirs if directorio_observable(d)]
+            self._observar(raiz)
+
+    def _observar(self, directorio: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directorio), MASCARA_INOTIFY)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOSPC, errno.EMFILE):
+                raise OSError(error, "Límite de inotify alcanzado")
+            return
+        self._directorios[wd] = directorio
+
+    def esperar_cambios(self, timeout: Optional[float] = None) -> Set[str]:
+        """Rutas creadas, modificadas o eliminadas (bloquea hasta timeout)"""
+        cambiados: Set[str] = set()
+        listos, _, _ = select.select([self._fd], [], [], timeout)
+        if not listos:
+            return cambiados
+
+        try:
+            datos = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return cambiados
+
+        desplazamiento = 0
+        while desplazamiento + TAMANO_EVENTO <= len(datos):
+            wd, mascara, _, longitud = struct.unpack_from(FORMATO_EVENTO, datos, desplazamiento)
+            nombre = datos[desplazamiento + TAMANO_EVENTO:desplazamiento + TAMANO_EVENTO + longitud]
+            desplazamiento += TAMANO_EVENTO + longitud
+
+            directorio = self._directorios.get(wd)
+            if directorio is None:
+                continue
+            if mascara & IN_DELETE_SELF:
+                self._directorios.pop(wd, None)
+                continue
+
+            ruta = os.path.join(directorio, os.fsdecode(nombre.rstrip(b'\0')))
+            if mascara & IN_ISDIR:
+                if mascara & (IN_CREATE | IN_MOVED_TO) and directorio_observable(os.path.basename(ruta)):
+                    self._observar(ruta)
+                continue
+            cambiados.add(ruta)
+
+        return cambiados
+
+    def cerrar(self):
+        os.close(self._fd)
+
+
+def crear_observador(carpeta_raiz: str, forzar_polling: bool = False, avisar: Callable[[str], None] = print):
+    """inotify si está disponible; si no, polling"""
+    if not forzar_polling:
+        try:
+            return ObservadorInotify(carpeta_raiz)
+        except (OSError, AttributeError) as e:
+            avisar(f"⚠️  inotify no disponible ({e}), se usa polling")
+    return ObservadorPolling(carpeta_raiz)
+
+
+class EstadoWatch:
+    """
+    Análisis por archivo en memoria: registros base (sin montajes externos),
+    resumen de montaje y registros finales ya con los prefixes aplicados
+    """
+
+    def __init__(self, analyzer: EnhancedEndpointAnalyzer, cache: Optional[CacheAnalisis] = None):
+        self.analyzer = analyzer
+        self.cache = cache
+        self.base: Dict[str, List[Dict]] = {}
+        self.resumenes: Dict[str, Optional[Dict]] = {}
+        self.finales: Dict[str, List[Dict]] = {}
+        self.prefijos: Dict[Tuple[str, str], str] = {}
+
+    def _analizar(self, ruta_archivo: str):
+        resultado = None
+        if self.cache is not None and self.cache.vigente(ruta_archivo):
+            resultado = self.cache.cargar(ruta_archivo)
+        if resultado is None:
+            resultado = self.analyzer.analizar_archivo_aislado(ruta_archivo)
+            if self.cache is not None:
+                self.cache.guardar(ruta_archivo, *resultado)
+        registros, _, resumen = resultado
+        self.base[ruta_archivo] = registros
+        self.resumenes[ruta_archivo] = resumen
+
+    def _finales_de(self, ruta_archivo: str) -> List[Dict]:
+        registros = [Registro(r) for r in self.base[ruta_archivo]]
+        self.analyzer.aplicar_montajes(registros, self.prefijos)
+        return registros
+
+    def _recalcular_prefijos(self) -> Set[str]:
+        """Rehace el grafo de montajes; devuelve las rutas con endpoints afectados"""
+        grafo = GrafoMontajes(list(self.resumenes.values()), self.analyzer.resumen_paquete)
+        nuevos = grafo.prefijos_externos()
+        modulos = {m for (m, r) in set(nuevos) | set(self.prefijos)
+                   if nuevos.get((m, r)) != self.prefijos.get((m, r))}
+        self.prefijos = nuevos
+        return {ruta for ruta, resumen in self.resumenes.items() if resumen and resumen['modulo'] in modulos}
+
+    def cargar_inicial(self):
+        for ruta_archivo in self.analyzer.listar_archivos():
+            self._analizar(ruta_archivo)
+        self._recalcular_prefijos()
+        self.finales = {ruta: self._finales_de(ruta) for ruta in self.base}
+        if self.cache is not None:
+            self.cache.escribir()
+
+    def actualizar(self, rutas: Set[str]) -> Dict[str, List]:
+        """Reanaliza las rutas cambiadas y devuelve el delta de registros"""
+        tocadas = set()
+        for ruta_archivo in sorted(rutas):
+            if os.path.isfile(ruta_archivo) and self.analyzer.deberia_procesar_archivo(ruta_archivo):
+                self._analizar(ruta_archivo)
+                tocadas.add(ruta_archivo)
+            elif ruta_archivo in self.base:
+                del self.base[ruta_archivo]
+                del self.resumenes[ruta_archivo]
+                tocadas.add(ruta_archivo)
+
+        if not tocadas:
+            return {'agregados': [], 'eliminados': [], 'modificados': [], 'reubicados': []}
+
+        # Un cambio de montaje (p.ej. en main.py) afecta a otros módulos
+        tocadas |= self._recalcular_prefijos()
+
+        anteriores, nuevos = [], []
+        for ruta_archivo in sorted(tocadas):
+            anteriores.extend(self.finales.pop(ruta_archivo, []))
+            if ruta_archivo in self.base:
+                self.finales[ruta_archivo] = self._finales_de(ruta_archivo)
+                nuevos.extend(self.finales[ruta_archivo])
+
+        if self.cache is not None:
+            self.cache.podar(list(self.base))
+            self.cache.escribir()
+
+        return calcular_delta(anteriores, nuevos)
+
+
+class EmisorCambios:
+    """Escribe cada delta como una línea JSON en un archivo y, opcionalmente, en un socket Unix"""
+
+    def __init__(self, archivo: str = ARCHIVO_CAMBIOS, ruta_socket: Optional[str] = None,
+                 avisar: Callable[[str], None] = print):
+        self.archivo = archivo
+        self.ruta_socket = ruta_socket
+        self.avisar = avisar
+        self._socket: Optional[socket.socket] = None
+        os.makedirs(os.path.dirname(archivo) or '.', exist_ok=True)
+
+    def _conectar(self) -> Optional[socket.socket]:
+        if self.ruta_socket and self._socket is None:
+            try:
+                self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._socket.connect(self.ruta_socket)
+            except OSError as e:
+                self.avisar(f"⚠️  No se pudo conectar a {self.ruta_socket}: {e}")
+                self._socket = None
+        return self._socket
+
+    def emitir(self, delta: Dict[str, List]):
+        linea = json.dumps(dict(delta, fecha=datetime.now().isoformat()),
+                           ensure_ascii=False, default=dict) + '\n'
+        with open(self.archivo, 'a', encoding='utf-8') as f:
+            f.write(linea)
+
+        conexion = self._conectar()
+        if conexion is not None:
+            try:
+                conexion.sendall(linea.encode('utf-8'))
+            except OSError:
+                conexion.close()
+                self._socket = None
+
+    def cerrar(self):
+        if self._socket is not None:
+            self._socket.close()
+
+
+def ejecutar_watch(analyzer: EnhancedEndpointAnalyzer, cache: Optional[CacheAnalisis] = None,
+                   archivo_cambios: str = ARCHIVO_CAMBIOS, ruta_socket: Optional[str] = None,
+                   forzar_polling: bool = False):
+    """Bucle principal del modo watch (termina con Ctrl+C)"""
+    estado = EstadoWatch(analyzer, cache)
+    estado.cargar_inicial()
+
+    # Los mensajes respetan el nivel de --nivel (nada en silencioso)
+    def avisar(mensaje: str):
+        analyzer.avisar(mensaje, NIVEL_RESUMEN)
+
+    carpeta_raiz = analyzer.encontrar_carpeta_raiz()
+    observador = crear_observador(carpeta_raiz, forzar_polling, avisar)
+    emisor = EmisorCambios(archivo_cambios, ruta_socket, avisar)
+
+    avisar(f"\n👀 Observando {carpeta_raiz} ({type(observador).__name__})")
+    avisar(f"   Cambios en: {archivo_cambios}" + (f" y {ruta_socket}" if ruta_socket else ''))
+    avisar("   Ctrl+C para salir\n")
+
+    try:
+        while True:
+            cambiados = observador.esperar_cambios(timeout=1.0)
+            if not cambiados:
+                continue
+            # Agrupar los eventos de un mismo guardado
+            cambiados |= observador.esperar_cambios(timeout=ESPERA_AGRUPAR)
+
+            inicio = time.perf_counter()
+            delta = estado.actualizar(cambiados)
+            if not any(delta.values()):
+                continue
+
+            emisor.emitir(delta)
+            avisar(f"🔄 {datetime.now():%H:%M:%S} "
+                   f"+{len(delta['agregados'])} -{len(delta['eliminados'])} "
+                   f"~{len(delta['modificados'])} registros, {len(delta['reubicados'])} reubicados "
+                   f"({(time.perf_counter() - inicio) * 1000:.0f} ms)")
+    except KeyboardInterrupt:
+        avisar("\n👋 Watch detenido")
+    finally:
+        observador.cerrar()
+        emisor.cerrar()
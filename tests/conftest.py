@@ -0,0 +1,124 @@
+"""
+Fixtures comunes: un proyecto FastAPI pequeño en una carpeta temporal, con
+routers montados desde main.py con include_router(prefix=...)
+"""
+
+import os
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+from ia.files_to_csv import EnhancedEndpointAnalyzer, ReportadorProgreso, NIVEL_SILENCIOSO
+
+ARCHIVOS_PROYECTO: Dict[str, str] = {
+    'app/__init__.py': '',
+    'app/main.py': '''from fastapi import FastAPI
+
+from app.routers import usuarios, productos
+
+app = FastAPI(title="Tienda")
+app.include_router(usuarios.router, prefix="/usuarios", tags=["usuarios"])
+app.include_router(productos.router, prefix="/productos", tags=["productos"])
+
+
+@app.get("/")
+async def raiz():
+    """Estado del servicio"""
+    return {"estado": "ok"}
+''',
+    'app/routers/__init__.py': '',
+    'app/routers/usuarios.py': '''from fastapi import APIRouter, Depends
+
+from app.models import Usuario
+from app.config import obtener_config
+
+router = APIRouter()
+
+
+@router.get("/{usuario_id}", response_model=Usuario)
+async def leer_usuario(usuario_id: int, config=Depends(obtener_config)):
+    """Devuelve un usuario por id"""
+    return Usuario(id=usuario_id, nombre="demo")
+
+
+@router.post("/")
+async def crear_usuario(usuario: Usuario):
+    """Crea un usuario"""
+    return usuario
+
+
+def normalizar_nombre(nombre: str) -> str:
+    """Nombre sin espacios sobrantes"""
+    return " ".join(nombre.split())
+''',
+    'app/routers/productos.py': '''from fastapi import APIRouter
+
+router = APIRouter()
+
+
+@router.get("/")
+async def listar_productos(limite: int = 10):
+    """Lista los productos"""
+    return []
+
+
+@router.delete("/{producto_id}")
+async def borrar_producto(producto_id: int):
+    """Borra un producto"""
+    return {"borrado": producto_id}
+''',
+    'app/models.py': '''from pydantic import BaseModel
+
+
+class Usuario(BaseModel):
+    """Usuario de la tienda"""
+    id: int
+    nombre: str
+
+
+class Producto(BaseModel):
+    """Producto del catálogo"""
+    id: int
+    precio: float
+''',
+    'app/config.py': '''import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///tienda.db")
+
+
+class Config:
+    """Configuración del servicio"""
+    debug: bool = False
+
+
+def obtener_config() -> Config:
+    return Config()
+''',
+}
+
+
+def escribir_archivo(raiz: Path, relativa: str, contenido: str):
+    ruta = raiz / relativa
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_text(contenido, encoding='utf-8')
+
+
+@pytest.fixture
+def proyecto(tmp_path, monkeypatch) -> Path:
+    """
+    Proyecto de ejemplo y directorio de trabajo en él: el analyzer trabaja
+    con rutas relativas (la carpeta temporal está en CARPETAS_EXCLUIR)
+    """
+    for relativa, contenido in ARCHIVOS_PROYECTO.items():
+        escribir_archivo(tmp_path, relativa, contenido)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def crear_analyzer(proyecto):
+    """Analyzers silenciosos sobre el proyecto de ejemplo"""
+    def crear(**opciones) -> EnhancedEndpointAnalyzer:
+        return EnhancedEndpointAnalyzer('.', progreso=ReportadorProgreso(NIVEL_SILENCIOSO), **opciones)
+    return crear
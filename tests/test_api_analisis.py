@@ -0,0 +1,52 @@
+"""iterar_registros: los mismos registros y en el mismo orden que la línea de comandos"""
+
+import json
+import os
+
+import pytest
+
+from ia.api_analisis import OpcionesAnalisis, iter_records, iterar_registros
+from ia.files_to_csv import ARCHIVO_SALIDA_JSON, main
+
+pytestmark = pytest.mark.integration
+
+
+def registros_cli(*argumentos: str):
+    main(['--sin-cache', '--nivel', 'silencioso', *argumentos])
+    with open(ARCHIVO_SALIDA_JSON, encoding='utf-8') as f:
+        return json.load(f)['registros']
+
+
+def test_mismos_registros_que_la_cli(proyecto, capsys):
+    desde_api = [dict(r) for r in iterar_registros('.')]
+    # Sin salida por consola ni archivos en datasets/
+    assert capsys.readouterr().out == ''
+    assert not os.path.exists('datasets')
+
+    assert desde_api == registros_cli()
+
+
+def test_opciones_como_en_la_cli(proyecto):
+    opciones = OpcionesAnalisis(workers=2, extractores=['endpoints', 'clases'])
+    assert [dict(r) for r in iterar_registros('.', opciones)] == \
+        registros_cli('--workers', '2', '--extractores', 'endpoints,clases')
+
+
+def test_sin_montajes_rutas_declaradas(proyecto):
+    con_montajes = {r['elemento']: r['endpoint'] for r in iterar_registros('.') if r['metodo_http']}
+    sin_montajes = {r['elemento']: r['endpoint']
+                    for r in iterar_registros('.', OpcionesAnalisis(montajes=False)) if r['metodo_http']}
+    assert con_montajes['leer_usuario'] == '/usuarios/{usuario_id}'
+    assert sin_montajes['leer_usuario'] == '/{usuario_id}'
+
+
+def test_se_puede_dejar_de_iterar(proyecto):
+    registros = iterar_registros('.', OpcionesAnalisis(workers=2))
+    primero = next(registros)
+    registros.close()
+    assert primero['ruta'] == dict(next(iter_records('.')))['ruta']
+
+
+def test_proyecto_inexistente(tmp_path):
+    with pytest.raises(NotADirectoryError):
+        iterar_registros(str(tmp_path / 'no-existe'))
@@ -0,0 +1,73 @@
+"""Benchmark de proyecto: la base guarda ratios de calibración, no valores absolutos"""
+
+import json
+import os
+
+import pytest
+
+from ia.benchmark_analyzer import (
+    ARCHIVO_BASE_PROYECTO,
+    METRICAS_BASE,
+    base_desde_resultado,
+    comparar_con_base,
+    main,
+)
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def resultado_con(ratio_tiempo, ratio_rss):
+    return {
+        'config': {'archivos': 1}, 'version_analyzer': 'x', 'fecha': '2026-01-01',
+        'archivos': 1, 'registros': 10, 'segundos': 0.5, 'archivos_por_segundo': 99.0,
+        'registros_por_segundo': 990.0, 'pico_rss_mb': 30.0,
+        'ratio_tiempo': ratio_tiempo, 'ratio_rss': ratio_rss
+    }
+
+
+@pytest.mark.unit
+def test_la_base_no_guarda_valores_absolutos():
+    base = base_desde_resultado(resultado_con(6.0, 1.1))
+    assert set(METRICAS_BASE) <= set(base)
+    assert not {'segundos', 'archivos_por_segundo', 'registros_por_segundo', 'pico_rss_mb'} & set(base)
+
+
+@pytest.mark.unit
+def test_base_del_repo_solo_tiene_ratios():
+    with open(os.path.join(RAIZ_REPO, ARCHIVO_BASE_PROYECTO), encoding='utf-8') as f:
+        base = json.load(f)
+    assert set(METRICAS_BASE) <= set(base)
+    assert 'archivos_por_segundo' not in base and 'pico_rss_mb' not in base
+
+
+@pytest.mark.unit
+def test_regresion_solo_por_encima_de_la_tolerancia():
+    base = base_desde_resultado(resultado_con(6.0, 1.1))
+    assert comparar_con_base(resultado_con(7.1, 1.3), base, 0.2) == []
+    regresiones = comparar_con_base(resultado_con(7.3, 1.1), base, 0.2)
+    assert len(regresiones) == 1 and regresiones[0].startswith('ratio_tiempo')
+    regresiones = comparar_con_base(resultado_con(6.0, 1.4), base, 0.2)
+    assert len(regresiones) == 1 and regresiones[0].startswith('ratio_rss')
+
+
+@pytest.mark.slow
+def test_guardar_y_comparar_en_la_misma_maquina(tmp_path, capsys):
+    ruta_base = str(tmp_path / 'base.json')
+    config = ['--proyecto', '--archivos', '10', '--routers', '2', '--endpoints-por-router', '3',
+              '--modelos', '10', '--helpers', '10', '--repeticiones', '1', '--base', ruta_base]
+    assert main(config + ['--guardar-base']) == 0
+    with open(ruta_base, encoding='utf-8') as f:
+        assert set(METRICAS_BASE) <= set(json.load(f))
+    # Proyecto diminuto: el tiempo es ruido, solo se comprueba que compara
+    assert main(config + ['--tolerancia', '100']) == 0
+    assert 'Sin regresiones' in capsys.readouterr().out
+
+
+@pytest.mark.unit
+def test_base_antigua_sin_ratios_no_se_compara(tmp_path, capsys, monkeypatch):
+    ruta_base = tmp_path / 'base.json'
+    ruta_base.write_text(json.dumps({'config': {}, 'archivos_por_segundo': 300.0}), encoding='utf-8')
+    monkeypatch.setattr('ia.benchmark_analyzer.benchmark_proyecto',
+                        lambda config, repeticiones, workers: dict(resultado_con(6.0, 1.0), config=config))
+    assert main(['--proyecto', '--base', str(ruta_base)]) == 1
+    assert 'no tiene ratios' in capsys.readouterr().out
@@ -0,0 +1,113 @@
+"""Análisis incremental: qué se reutiliza de la cache y qué la invalida"""
+
+import os
+
+import pytest
+
+from ia.files_to_csv import CacheAnalisis, LimitesArchivo
+
+from conftest import escribir_archivo
+
+pytestmark = pytest.mark.unit
+
+
+def escanear(analyzer, version=None):
+    """Registros y resumen de la cache tras escanear con la cache del proyecto"""
+    cache = CacheAnalisis(version=version or analyzer.version_analisis())
+    analyzer.escanear_proyecto(cache=cache)
+    return [dict(r) for r in analyzer.registros], cache.resumen
+
+
+def test_primera_ejecucion_analiza_todo(crear_analyzer):
+    _, resumen = escanear(crear_analyzer())
+
+    assert resumen['analizados'] == 5
+    assert resumen['reutilizados'] == 0
+
+
+def test_sin_cambios_reutiliza_todo(crear_analyzer):
+    registros, _ = escanear(crear_analyzer())
+    reutilizados, resumen = escanear(crear_analyzer())
+
+    assert resumen['analizados'] == 0
+    assert resumen['reutilizados'] == 5
+    assert reutilizados == registros
+
+
+def test_mtime_sin_cambio_de_contenido_reutiliza(crear_analyzer):
+    escanear(crear_analyzer())
+    os.utime('app/models.py', ns=(0, 0))
+
+    _, resumen = escanear(crear_analyzer())
+
+    assert resumen['analizados'] == 0
+
+
+def test_cambio_de_contenido_reanaliza_solo_ese_archivo(proyecto, crear_analyzer):
+    escanear(crear_analyzer())
+    contenido = (proyecto / 'app/models.py').read_text(encoding='utf-8')
+    escribir_archivo(proyecto, 'app/models.py', contenido + '''
+
+class Pedido(BaseModel):
+    """Pedido de un usuario"""
+    id: int
+''')
+
+    registros, resumen = escanear(crear_analyzer())
+
+    assert resumen['analizados'] == 1
+    assert resumen['reutilizados'] == 4
+    assert 'Pedido' in {r['elemento'] for r in registros if r['ruta'] == 'app/models.py'}
+    assert registros == [dict(r) for r in crear_analyzer().iterar_proyecto()]
+
+
+def test_archivo_borrado_sale_de_la_cache(proyecto, crear_analyzer):
+    escanear(crear_analyzer())
+    (proyecto / 'app/config.py').unlink()
+
+    registros, resumen = escanear(crear_analyzer())
+
+    assert resumen['eliminados'] == 1
+    assert all(r['ruta'] != 'app/config.py' for r in registros)
+
+
+def test_otra_version_del_analyzer_invalida_la_cache(crear_analyzer):
+    escanear(crear_analyzer(), version='anterior')
+
+    _, resumen = escanear(crear_analyzer(), version='actual')
+
+    assert resumen['analizados'] == 5
+    assert resumen['reutilizados'] == 0
+
+
+def test_otros_limites_invalidan_la_cache(crear_analyzer):
+    escanear(crear_analyzer())
+
+    registros, resumen = escanear(crear_analyzer(limites=LimitesArchivo(max_lineas=10)))
+
+    assert resumen['reutilizados'] == 0
+    # Los archivos largos quedan en un registro FILE superficial
+    assert [r['categoria'] for r in registros if r['ruta'] == 'app/routers/usuarios.py'] == ['FILE']
+
+
+def test_otros_extractores_invalidan_la_cache(crear_analyzer):
+    escanear(crear_analyzer())
+
+    registros, resumen = escanear(crear_analyzer(extractores=['endpoints']))
+
+    assert resumen['reutilizados'] == 0
+    categorias = {r['categoria'] for r in registros}
+    assert 'ENDPOINT' in categorias
+    assert not categorias & {'CLASS', 'FUNCTION', 'CONSTANT'}
+
+
+def test_sin_cache_no_pasa_por_disco(proyecto, crear_analyzer, monkeypatch):
+    def guardar(*argumentos, **opciones):
+        raise AssertionError("sin cache los registros no se guardan en disco")
+
+    monkeypatch.setattr(CacheAnalisis, 'guardar', guardar)
+    analyzer = crear_analyzer()
+    analyzer.escanear_proyecto()
+
+    assert [dict(r) for r in analyzer.registros] == [dict(r) for r in crear_analyzer().iterar_proyecto()]
+    assert not (proyecto / 'datasets').exists()
@@ -0,0 +1,88 @@
+"""Archivos copiados: cada contenido se analiza una vez y se reubica en las demás rutas"""
+
+import shutil
+
+import pytest
+
+from ia.files_to_csv import CacheAnalisis
+
+from conftest import escribir_archivo
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def proyecto_con_copias(proyecto):
+    """usuarios.py copiado en clientes.py (sin montar) y models.py en otro paquete"""
+    shutil.copy(proyecto / 'app/routers/usuarios.py', proyecto / 'app/routers/clientes.py')
+    escribir_archivo(proyecto, 'app/legado/__init__.py', '')
+    shutil.copy(proyecto / 'app/models.py', proyecto / 'app/legado/models.py')
+    return proyecto
+
+
+def espiar_analisis(analyzer):
+    """Rutas que el analyzer analiza de verdad (no reubicadas)"""
+    analizadas = []
+    original = analyzer.analizar_archivos
+
+    def analizar_archivos(rutas, workers=1):
+        analizadas.extend(rutas)
+        return original(rutas, workers)
+
+    analyzer.analizar_archivos = analizar_archivos
+    return analizadas
+
+
+def por_ruta(registros):
+    agrupados = {}
+    for registro in registros:
+        agrupados.setdefault(registro['ruta'], []).append(dict(registro))
+    return agrupados
+
+
+def test_cada_contenido_se_analiza_una_vez(proyecto_con_copias, crear_analyzer):
+    analyzer = crear_analyzer()
+    analizadas = espiar_analisis(analyzer)
+    registros = por_ruta(analyzer.iterar_proyecto(montajes=False))
+
+    assert './app/routers/clientes.py' not in analizadas
+    assert './app/legado/models.py' not in analizadas
+    assert './app/routers/usuarios.py' in analizadas and './app/models.py' in analizadas
+
+    # Las copias dan los mismos registros que analizarlas por separado
+    for copia in ('app/routers/clientes.py', 'app/legado/models.py'):
+        aislado = [dict(r) for r in crear_analyzer().analizar_archivo_aislado('./' + copia)[0]]
+        assert registros[copia] == aislado
+        assert all(r['nombre_archivo'] == copia.rsplit('/', 1)[1] for r in registros[copia])
+
+
+def test_los_montajes_se_aplican_por_ruta(proyecto_con_copias, crear_analyzer):
+    registros = por_ruta(crear_analyzer().iterar_proyecto())
+    rutas_usuarios = {r['endpoint'] for r in registros['app/routers/usuarios.py'] if r['metodo_http']}
+    rutas_clientes = {r['endpoint'] for r in registros['app/routers/clientes.py'] if r['metodo_http']}
+
+    # Solo usuarios.py está montado en /usuarios: la copia no hereda el prefix
+    assert rutas_usuarios and all(ruta.startswith('/usuarios') for ruta in rutas_usuarios)
+    assert rutas_clientes and not any(ruta.startswith('/usuarios') for ruta in rutas_clientes)
+
+
+def test_con_y_sin_workers_iguales(proyecto_con_copias, crear_analyzer):
+    en_serie = [dict(r) for r in crear_analyzer().iterar_proyecto()]
+    en_paralelo = [dict(r) for r in crear_analyzer().iterar_proyecto(workers=2)]
+    assert en_paralelo == en_serie
+
+
+def test_archivo_renombrado_se_reubica_desde_la_cache(proyecto, crear_analyzer):
+    analyzer = crear_analyzer()
+    analyzer.escanear_proyecto(cache=CacheAnalisis(version=analyzer.version_analisis()))
+
+    (proyecto / 'app/models.py').rename(proyecto / 'app/modelos.py')
+    analyzer = crear_analyzer()
+    analizadas = espiar_analisis(analyzer)
+    cache = CacheAnalisis(version=analyzer.version_analisis())
+    analyzer.escanear_proyecto(cache=cache)
+
+    assert analizadas == []
+    assert cache.resumen['reubicados'] == 1 and cache.resumen['analizados'] == 0
+    esperado = [dict(r) for r in crear_analyzer().analizar_archivo_aislado('./app/modelos.py')[0]]
+    assert [dict(r) for r in analyzer.registros if r['ruta'] == 'app/modelos.py'] == esperado
@@ -0,0 +1,60 @@
+"""Dependencias de inyección: funciones generadoras con yield propio"""
+
+import pytest
+
+pytestmark = pytest.mark.unit
+
+MODULO = '''from fastapi import Depends
+
+
+def obtener_config():
+    return {}
+
+
+def get_db() -> Iterator[Session]:
+    db = Session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_session():
+    async with crear_sesion() as sesion:
+        yield sesion
+
+
+def fabrica():
+    def interna():
+        yield 1
+    return interna
+'''
+
+
+def nombres(dependencias):
+    return [d['nombre'] for d in dependencias]
+
+
+def test_generadores_con_yield_propio(crear_analyzer):
+    analyzer = crear_analyzer()
+
+    dependencias = analyzer.extraer_dependencias_inyeccion(MODULO, analyzer.analizar_ast(MODULO))
+
+    # Antes la regex DOTALL tomaba obtener_config (el yield era de get_db)
+    # y no veía los async def
+    assert nombres(dependencias) == ['get_db', 'get_async_session', 'interna']
+    assert dependencias[0]['return_type'] == 'Iterator[Session]'
+
+
+def test_sin_ast_se_usa_la_regex(crear_analyzer):
+    assert nombres(crear_analyzer().extraer_dependencias_inyeccion(MODULO)) == ['obtener_config']
+
+
+def test_registros_de_dependencia(proyecto, crear_analyzer):
+    (proyecto / 'app/dependencias.py').write_text(MODULO, encoding='utf-8')
+
+    registros = [r for r in crear_analyzer().iterar_proyecto() if r['ruta'] == 'app/dependencias.py']
+
+    assert sorted(r['elemento'] for r in registros if r['categoria'] == 'DEPENDENCY_INJECTION') == [
+        'get_async_session', 'get_db', 'interna'
+    ]
@@ -0,0 +1,64 @@
+"""Changeset entre dos ejecuciones: aplicarlo sobre la anterior da la nueva"""
+
+import pytest
+
+from ia.diff_analisis import aplicar_cambios, calcular_cambios
+from ia.files_to_csv import indexar_registros
+
+from conftest import ARCHIVOS_PROYECTO, escribir_archivo
+
+pytestmark = pytest.mark.unit
+
+
+def analizar(crear_analyzer):
+    return [dict(r) for r in crear_analyzer().iterar_proyecto()]
+
+
+def por_clave(registros):
+    # aplicar_cambios no conserva el orden de los registros nuevos
+    return {clave: dict(registro) for clave, registro in indexar_registros(registros).items()}
+
+
+def comprobar_ida_y_vuelta(anteriores, nuevos):
+    cambios = calcular_cambios(anteriores, nuevos)
+    aplicados = aplicar_cambios(anteriores, cambios)
+    assert len(aplicados) == len(nuevos)
+    assert por_clave(aplicados) == por_clave(nuevos)
+    return cambios
+
+
+def test_sin_cambios(crear_analyzer):
+    registros = analizar(crear_analyzer)
+
+    cambios = comprobar_ida_y_vuelta(registros, registros)
+
+    assert not any(cambios[tipo] for tipo in ('agregados', 'eliminados', 'modificados', 'reubicados', 'movidos'))
+
+
+def test_edicion_de_archivos(proyecto, crear_analyzer):
+    anteriores = analizar(crear_analyzer)
+    # Función nueva al principio (reubica el resto), docstring cambiado y archivo borrado
+    escribir_archivo(proyecto, 'app/routers/usuarios.py', '''def primera():
+    """Nueva"""
+    return 1
+
+
+''' + ARCHIVOS_PROYECTO['app/routers/usuarios.py'])
+    escribir_archivo(proyecto, 'app/routers/productos.py',
+                     ARCHIVOS_PROYECTO['app/routers/productos.py'].replace('Borra un producto', 'Elimina'))
+    (proyecto / 'app/config.py').unlink()
+    nuevos = analizar(crear_analyzer)
+
+    cambios = comprobar_ida_y_vuelta(anteriores, nuevos)
+
+    assert cambios['agregados'] and cambios['eliminados'] and cambios['modificados']
+
+
+def test_archivo_movido(proyecto, crear_analyzer):
+    anteriores = analizar(crear_analyzer)
+    (proyecto / 'app/models.py').rename(proyecto / 'app/modelos.py')
+    nuevos = analizar(crear_analyzer)
+
+    cambios = comprobar_ida_y_vuelta(anteriores, nuevos)
+
+    assert cambios['movidos']
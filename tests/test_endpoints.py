@@ -0,0 +1,89 @@
+"""Endpoints desde el AST y fallback con regex para archivos que no parsean"""
+
+import pytest
+
+pytestmark = pytest.mark.unit
+
+MODULO = '''from fastapi import APIRouter, status
+
+router = APIRouter(prefix="/pedidos", tags=["pedidos"])
+
+
+@router.post(
+    "/",
+    response_model=Pedido,
+    status_code=status.HTTP_201_CREATED,
+    summary="Crear pedido",
+)
+async def crear_pedido(
+    pedido: PedidoNuevo,
+    usuario: Usuario = Depends(usuario_actual),
+):
+    """Crea un pedido"""
+    return pedido
+
+
+@router.get("/{pedido_id}", tags=["lectura"], deprecated=True)
+def leer_pedido(pedido_id: int, detalle: bool = False):
+    return {}
+
+
+@router.delete("/{pedido_id}", status_code=204)
+def borrar_pedido(pedido_id: int):
+    return None
+'''
+
+
+def resumen(endpoints):
+    return [(e['metodo'], e['ruta'], e['funcion'], e['tags'], e['status_code'], e['parametros_query'])
+            for e in endpoints]
+
+
+def test_decorador_multilinea(crear_analyzer):
+    analyzer = crear_analyzer()
+
+    endpoints = analyzer.extraer_endpoints_ast(MODULO, analyzer.analizar_ast(MODULO))
+
+    crear = endpoints[0]
+    assert (crear['metodo'], crear['ruta_original'], crear['funcion']) == ('POST', '/', 'crear_pedido')
+    assert crear['router_prefix'] == '/pedidos'
+    assert crear['status_code'] == '201'
+    assert crear['response_model'] == 'Pedido'
+    assert crear['summary'] == 'Crear pedido'
+    assert crear['es_async'] is True
+    assert crear['codigo_completo'].startswith('async def crear_pedido(\n')
+    assert crear['codigo_completo'].endswith('return pedido')
+
+
+def test_ast_y_regex_coinciden_en_decoradores_de_una_linea(crear_analyzer):
+    analyzer = crear_analyzer()
+
+    por_ast = analyzer.extraer_endpoints_ast(MODULO, analyzer.analizar_ast(MODULO))
+    por_regex = analyzer.extraer_endpoints_regex(MODULO)
+
+    # La regex no ve el decorador multilínea; el resto es igual
+    assert resumen(por_regex) == resumen(por_ast[1:])
+    assert resumen(por_regex) == [
+        ('GET', '/pedidos/{pedido_id}', 'leer_pedido', ['lectura'], '', ['pedido_id', 'detalle']),
+        ('DELETE', '/pedidos/{pedido_id}', 'borrar_pedido', [], '204', ['pedido_id']),
+    ]
+
+
+def test_archivo_que_no_parsea_usa_la_regex(crear_analyzer):
+    analyzer = crear_analyzer()
+    roto = MODULO + '\ndef incompleta(:\n'
+
+    assert analyzer.analizar_ast(roto) is None
+    endpoints = analyzer.extraer_endpoints_completos(roto, 'pedidos.py', None)
+
+    assert [e['funcion'] for e in endpoints] == ['leer_pedido', 'borrar_pedido']
+
+
+def test_registros_de_endpoint_sin_duplicar_funciones(proyecto, crear_analyzer):
+    (proyecto / 'app/routers/pedidos.py').write_text(MODULO, encoding='utf-8')
+
+    registros = [r for r in crear_analyzer().iterar_proyecto() if r['ruta'] == 'app/routers/pedidos.py']
+
+    assert sorted((r['categoria'], r['elemento']) for r in registros) == [
+        ('ENDPOINT', 'borrar_pedido'), ('ENDPOINT', 'crear_pedido'), ('ENDPOINT', 'leer_pedido')
+    ]
@@ -0,0 +1,72 @@
+"""Escritura en streaming de CSV y JSON: el mismo resultado que escribir todo al final"""
+
+import csv
+import io
+import json
+import os
+
+import pytest
+
+from ia.files_to_csv import CAMPOS_CSV, EscritorRegistros, ReportadorProgreso, NIVEL_SILENCIOSO
+
+pytestmark = pytest.mark.unit
+
+
+def crear_escritor(carpeta) -> EscritorRegistros:
+    return EscritorRegistros(str(carpeta / 'documentacion.csv'), str(carpeta / 'analisis.json'),
+                             progreso=ReportadorProgreso(NIVEL_SILENCIOSO))
+
+
+def csv_de(registros) -> bytes:
+    """CSV escrito de una vez con todos los registros"""
+    salida = io.StringIO(newline='')
+    writer = csv.DictWriter(salida, fieldnames=CAMPOS_CSV)
+    writer.writeheader()
+    writer.writerows(registros)
+    return salida.getvalue().encode('utf-8')
+
+
+def test_streaming_igual_a_escribir_todo(proyecto, crear_analyzer):
+    analyzer = crear_analyzer()
+    escritor = crear_escritor(proyecto).abrir()
+    analyzer.escanear_proyecto(sink=escritor)
+    escritor.cerrar(analyzer.estadisticas_serializables(), analyzer.metadatos_salida(escritor.total))
+
+    registros = [dict(r) for r in crear_analyzer().iterar_proyecto()]
+    # Con sink los registros no se acumulan en el analyzer
+    assert analyzer.registros == []
+    assert escritor.total == len(registros)
+    assert (proyecto / 'documentacion.csv').read_bytes() == csv_de(registros)
+
+    with open(proyecto / 'analisis.json', encoding='utf-8') as f:
+        datos = json.load(f)
+    assert datos['registros'] == registros
+    assert datos['estadisticas']['total_archivos'] == analyzer.estadisticas['total_archivos']
+    assert datos['metadatos']['total_registros'] == len(registros)
+
+
+def test_sin_registros(tmp_path):
+    escritor = crear_escritor(tmp_path).abrir()
+    escritor.cerrar({'total_archivos': 0}, {'total_registros': 0})
+
+    with open(tmp_path / 'analisis.json', encoding='utf-8') as f:
+        assert json.load(f) == {'registros': [], 'estadisticas': {'total_archivos': 0},
+                                'metadatos': {'total_registros': 0}}
+    assert (tmp_path / 'documentacion.csv').read_text(encoding='utf-8').strip() == ','.join(CAMPOS_CSV)
+
+
+def test_los_archivos_finales_se_reemplazan_al_cerrar(proyecto, crear_analyzer):
+    (proyecto / 'documentacion.csv').write_text('anterior', encoding='utf-8')
+    registros = [dict(r) for r in crear_analyzer().iterar_proyecto()]
+    escritor = crear_escritor(proyecto).abrir()
+    escritor.escribir(registros[:3])
+
+    # Mientras se escribe, la salida anterior sigue completa
+    assert (proyecto / 'documentacion.csv').read_text(encoding='utf-8') == 'anterior'
+    assert not (proyecto / 'analisis.json').exists()
+
+    escritor.escribir(registros[3:])
+    escritor.cerrar({}, {})
+
+    assert (proyecto / 'documentacion.csv').read_bytes() == csv_de(registros)
+    assert not [nombre for nombre in os.listdir(proyecto) if nombre.endswith('.tmp')]
@@ -0,0 +1,77 @@
+"""Registro de extractores: selección, orden y extractores añadidos desde fuera"""
+
+import pytest
+
+import ia.files_to_csv as files_to_csv
+from ia.files_to_csv import parsear_argumentos, registrar_extractor, seleccionar_extractores
+
+INCLUIDOS = ['endpoints', 'clases', 'funciones', 'configuraciones', 'dependencias']
+
+
+@pytest.fixture
+def registro_aislado(monkeypatch):
+    """Los extractores registrados en el test no quedan en el registro global"""
+    monkeypatch.setattr(files_to_csv, 'EXTRACTORES', dict(files_to_csv.EXTRACTORES))
+
+
+@pytest.mark.unit
+def test_por_defecto_todos_en_orden_de_registro():
+    assert seleccionar_extractores() == INCLUIDOS
+
+
+@pytest.mark.unit
+def test_seleccion_en_orden_de_registro():
+    assert seleccionar_extractores(['funciones', 'endpoints']) == ['endpoints', 'funciones']
+    assert seleccionar_extractores(desactivados=['clases', 'dependencias']) == \
+        ['endpoints', 'funciones', 'configuraciones']
+    assert seleccionar_extractores(['clases', 'funciones'], ['clases']) == ['funciones']
+
+
+@pytest.mark.unit
+def test_extractor_desconocido():
+    with pytest.raises(ValueError, match='Extractores desconocidos: rutas, modelos'):
+        seleccionar_extractores(['endpoints', 'rutas'], ['modelos'])
+
+
+@pytest.mark.unit
+def test_extractor_desconocido_en_la_cli(capsys):
+    with pytest.raises(SystemExit):
+        parsear_argumentos(['--extractores', 'endpoints,rutas'])
+    assert 'Extractores desconocidos: rutas' in capsys.readouterr().err
+    assert parsear_argumentos(['--sin-extractores', 'dependencias']).extractores == INCLUIDOS[:-1]
+
+
+@pytest.mark.integration
+def test_solo_clases(proyecto, crear_analyzer):
+    registros = list(crear_analyzer(extractores=['clases']).iterar_proyecto())
+    categorias = {r['categoria'] for r in registros}
+    assert 'CLASS' in categorias
+    assert not categorias & {'FUNCTION', 'CONSTANT', 'DEPENDENCY'}
+    assert not any(r['metodo_http'] for r in registros)
+
+
+@pytest.mark.integration
+def test_extractor_registrado_desde_fuera(proyecto, crear_analyzer, registro_aislado):
+    vistos = []
+
+    @registrar_extractor('todos')
+    def extractor_todos(analyzer, archivo):
+        # Corre tras los incluidos: ya tiene los endpoints del archivo
+        vistos.append((str(archivo.ruta), [ep['funcion'] for ep in archivo.endpoints]))
+        registro = analyzer.crear_registro_archivo_basico(archivo.contenido, archivo.ruta, archivo.tipo,
+                                                          archivo.tecnologias, archivo.imports, archivo.complejidad)
+        registro['elemento'] = 'todo'
+        return [registro] if 'TODO' in archivo.contenido else []
+
+    assert seleccionar_extractores()[-1] == 'todos'
+    (proyecto / 'app/config.py').write_text(
+        (proyecto / 'app/config.py').read_text(encoding='utf-8') + '\n# TODO: leer de variables\n',
+        encoding='utf-8')
+
+    analyzer = crear_analyzer()
+    registros = [dict(r) for r in analyzer.iterar_proyecto()]
+    del_config = [r['elemento'] for r in registros if r['ruta'] == 'app/config.py']
+    assert del_config[-1] == 'todo' and del_config.count('todo') == 1
+    assert ('app/routers/productos.py', ['listar_productos', 'borrar_producto']) in vistos
+    # Otro conjunto de extractores es otra versión de la cache
+    assert analyzer.version_analisis() != crear_analyzer(extractores=INCLUIDOS).version_analisis()
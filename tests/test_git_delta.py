@@ -0,0 +1,92 @@
+"""--git-base: el delta de los archivos cambiados es el mismo que entre dos escaneos completos"""
+
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from ia.files_to_csv import calcular_delta, clave_registro
+from ia.git_analisis import ejecutar_git_delta
+
+from conftest import escribir_archivo
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(shutil.which('git') is None, reason="git no está instalado"),
+]
+
+
+def git(*argumentos: str):
+    subprocess.run(['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', *argumentos],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+@pytest.fixture
+def repositorio(proyecto, monkeypatch):
+    # Que git no encuentre un repositorio por encima de la carpeta temporal
+    monkeypatch.setenv('GIT_CEILING_DIRECTORIES', str(proyecto.parent))
+    git('init', '-q')
+    git('add', '-A')
+    git('commit', '-q', '-m', 'base')
+    return proyecto
+
+
+def resumen(delta):
+    """Delta comparable sin depender del orden de los archivos"""
+    return {
+        'agregados': sorted(clave_registro(r) for r in delta['agregados']),
+        'eliminados': sorted(tuple(clave) for clave in delta['eliminados']),
+        'modificados': sorted((clave_registro(r), r['hash_codigo']) for r in delta['modificados']),
+        'reubicados': sorted((clave_registro(r), r['offset_codigo']) for r in delta['reubicados']),
+    }
+
+
+def test_delta_git_igual_al_de_dos_escaneos(repositorio, crear_analyzer):
+    base = [dict(r) for r in crear_analyzer().iterar_proyecto()]
+
+    # Cambio de código, archivo nuevo sin seguimiento, archivo borrado,
+    # elemento desplazado y montaje con otro prefix
+    usuarios = repositorio / 'app/routers/usuarios.py'
+    codigo = usuarios.read_text(encoding='utf-8')
+    usuarios.write_text('# desplaza los elementos\n' + codigo.replace(
+        'nombre="demo"', 'nombre="otro"'), encoding='utf-8')
+    escribir_archivo(repositorio, 'app/utilidades.py', 'def sumar(a: int, b: int) -> int:\n    return a + b\n')
+    (repositorio / 'app/config.py').unlink()
+    main = repositorio / 'app/main.py'
+    main.write_text(main.read_text(encoding='utf-8').replace('prefix="/productos"', 'prefix="/catalogo"'),
+                    encoding='utf-8')
+
+    actual = [dict(r) for r in crear_analyzer().iterar_proyecto()]
+    archivo_delta = repositorio / 'delta.json'
+    delta = ejecutar_git_delta(crear_analyzer(), 'HEAD', str(archivo_delta))
+
+    esperado = calcular_delta(base, actual)
+    assert resumen(delta) == resumen(esperado)
+    assert all(esperado[clave] for clave in ('agregados', 'eliminados', 'modificados'))
+    assert delta['archivos_cambiados'] == ['./app/config.py', './app/main.py',
+                                          './app/routers/usuarios.py', './app/utilidades.py']
+    assert delta['afectados_por_montaje'] == ['./app/routers/productos.py']
+
+    with open(archivo_delta, encoding='utf-8') as f:
+        guardado = json.load(f)
+    assert guardado['ref'] == 'HEAD' and resumen(guardado) == resumen(esperado)
+
+
+def test_sin_cambios_delta_vacio(repositorio, crear_analyzer):
+    delta = ejecutar_git_delta(crear_analyzer(), 'HEAD', str(repositorio / 'delta.json'))
+    assert delta['archivos_cambiados'] == []
+    assert not any(delta[clave] for clave in ('agregados', 'eliminados', 'modificados', 'reubicados'))
+
+
+def test_ref_inexistente_vuelve_al_escaneo_completo(repositorio, crear_analyzer):
+    archivo_delta = repositorio / 'delta.json'
+    assert ejecutar_git_delta(crear_analyzer(), 'no-existe', str(archivo_delta)) is None
+    assert not archivo_delta.exists()
+
+
+def test_sin_repositorio_vuelve_al_escaneo_completo(proyecto, crear_analyzer, monkeypatch):
+    monkeypatch.setenv('GIT_CEILING_DIRECTORIES', str(proyecto.parent))
+    archivo_delta = proyecto / 'delta.json'
+    assert ejecutar_git_delta(crear_analyzer(), 'HEAD', str(archivo_delta)) is None
+    assert not archivo_delta.exists()
@@ -0,0 +1,79 @@
+"""hash_simbolo: estable al mover o reformatear un símbolo, distinto si cambia su código"""
+
+import pytest
+
+from conftest import escribir_archivo
+
+pytestmark = pytest.mark.integration
+
+FUNCION = '''def normalizar_nombre(nombre: str) -> str:
+    """Nombre sin espacios sobrantes"""
+    return " ".join(nombre.split())
+'''
+
+FUNCION_REFORMATEADA = '''# Helper de texto, movido desde usuarios.py
+def normalizar_nombre(nombre: str)->str:
+    """Nombre sin espacios sobrantes"""
+
+    return " ".join(  nombre.split()  )  # sin espacios dobles
+'''
+
+
+def hashes(analyzer):
+    return {(r['ruta'], r['elemento']): r['hash_simbolo']
+            for r in analyzer.iterar_proyecto() if r['hash_simbolo']}
+
+
+def test_el_hash_sobrevive_a_mover_y_reformatear(proyecto, crear_analyzer):
+    escribir_archivo(proyecto, 'app/utilidades.py', FUNCION)
+    antes = hashes(crear_analyzer())[('app/utilidades.py', 'normalizar_nombre')]
+
+    (proyecto / 'app/utilidades.py').unlink()
+    escribir_archivo(proyecto, 'app/texto/limpieza.py', 'import re\n\n\n' + FUNCION_REFORMATEADA)
+    despues = hashes(crear_analyzer())
+    assert despues[('app/texto/limpieza.py', 'normalizar_nombre')] == antes
+    # Es el mismo símbolo que ya había en usuarios.py
+    assert despues[('app/routers/usuarios.py', 'normalizar_nombre')] == antes
+
+
+def test_el_hash_cambia_con_el_codigo(proyecto, crear_analyzer):
+    escribir_archivo(proyecto, 'app/utilidades.py', FUNCION)
+    antes = hashes(crear_analyzer())[('app/utilidades.py', 'normalizar_nombre')]
+
+    escribir_archivo(proyecto, 'app/utilidades.py', FUNCION.replace('" ".join', '"_".join'))
+    assert hashes(crear_analyzer())[('app/utilidades.py', 'normalizar_nombre')] != antes
+
+
+def test_clases_y_endpoints_tienen_hash(proyecto, crear_analyzer):
+    registros = list(crear_analyzer().iterar_proyecto())
+    con_hash = {(r['tipo'], r['elemento']) for r in registros if r['hash_simbolo']}
+    assert ('class', 'Usuario') in con_hash
+    assert any(tipo == 'route' for tipo, _ in con_hash)
+    assert all(not r['hash_simbolo'] for r in registros if r['tipo'] in ('config', 'file'))
+
+
+@pytest.fixture
+def embeddings():
+    # csv_to_embeddings necesita sentence_transformers, faiss, redis...
+    return pytest.importorskip('ia.csv_to_embeddings')
+
+
+def fila(embeddings, ruta: str, simbolo: str):
+    return embeddings.pd.Series({
+        'ruta': ruta, 'hash_simbolo': simbolo,
+        'texto_busqueda': f"función normalizar_nombre en {ruta}: nombre sin espacios sobrantes"
+    })
+
+
+def test_embedding_reutilizado_al_mover_el_simbolo(embeddings, tmp_path):
+    cache = embeddings.CacheEmbeddingsSimbolos(tmp_path / 'cache.npz', 'modelo')
+    clave = cache.clave(fila(embeddings, 'app/utilidades.py', 'abc'))
+    assert cache.clave(fila(embeddings, 'app/texto/limpieza.py', 'abc')) == clave
+    assert cache.clave(fila(embeddings, 'app/utilidades.py', 'def')) != clave
+
+    vector = embeddings.np.ones(4, dtype='float32')
+    cache.guardar([clave], embeddings.np.array([vector]))
+    recargada = embeddings.CacheEmbeddingsSimbolos(tmp_path / 'cache.npz', 'modelo').cargar()
+    assert embeddings.np.array_equal(recargada.vectores[clave], vector)
+    # Con otro modelo los vectores no sirven
+    assert embeddings.CacheEmbeddingsSimbolos(tmp_path / 'cache.npz', 'otro').cargar().vectores == {}
@@ -0,0 +1,74 @@
+"""Lectura de archivos: read() o mmap según el tamaño, con el mismo texto"""
+
+import mmap
+
+import pytest
+
+import ia.files_to_csv as files_to_csv
+from ia.files_to_csv import LIMITE_BYTES_ARCHIVO, UMBRAL_MMAP_BYTES
+
+from conftest import escribir_archivo
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def archivo_grande(proyecto):
+    """Módulo entre el umbral de mmap y el límite de tamaño, con CRLF y no ASCII"""
+    bloques = []
+    numero = 0
+    while sum(map(len, bloques)) < UMBRAL_MMAP_BYTES + 1024:
+        bloques.append(f'def funcion_{numero}(valor):\r\n    """Función {numero}: ñandú"""\r\n'
+                       f'    return valor + {numero}\r\n\r\n\r\n')
+        numero += 1
+    ruta = proyecto / 'app/grande.py'
+    ruta.write_bytes(''.join(bloques).encode('utf-8'))
+    return './app/grande.py'
+
+
+@pytest.fixture
+def llamadas_mmap(monkeypatch):
+    llamadas = []
+    original = mmap.mmap
+
+    def espiar(*argumentos, **opciones):
+        llamadas.append(argumentos)
+        return original(*argumentos, **opciones)
+
+    monkeypatch.setattr(files_to_csv.mmap, 'mmap', espiar)
+    return llamadas
+
+
+def test_el_umbral_de_mmap_queda_bajo_el_limite_de_tamano():
+    assert UMBRAL_MMAP_BYTES < LIMITE_BYTES_ARCHIVO
+
+
+def test_mmap_y_read_dan_el_mismo_texto(archivo_grande, crear_analyzer, llamadas_mmap):
+    con_read = crear_analyzer(usar_mmap=False).leer_contenido(archivo_grande)
+    assert not llamadas_mmap
+
+    con_mmap = crear_analyzer().leer_contenido(archivo_grande)
+
+    assert len(llamadas_mmap) == 1
+    assert con_mmap == con_read
+    assert '\r' not in con_mmap and 'ñandú' in con_mmap
+
+
+def test_archivo_grande_se_analiza_con_mmap(archivo_grande, crear_analyzer, llamadas_mmap):
+    sin_mmap = [dict(r) for r in crear_analyzer(usar_mmap=False).iterar_proyecto()]
+    filtro = len(llamadas_mmap)
+
+    con_mmap = [dict(r) for r in crear_analyzer().iterar_proyecto()]
+
+    # Las dos pasadas inspeccionan los mismos archivos con mmap (filtro);
+    # con los límites por defecto el archivo grande además se lee con mmap
+    assert len(llamadas_mmap) == 2 * filtro + 1
+    assert con_mmap == sin_mmap
+    assert sum(r['ruta'] == 'app/grande.py' and r['categoria'] == 'FUNCTION' for r in con_mmap) > 1000
+
+
+def test_archivo_pequeno_usa_read(proyecto, crear_analyzer, llamadas_mmap):
+    escribir_archivo(proyecto, 'app/pequeno.py', 'X = 1\r\n')
+
+    assert crear_analyzer().leer_contenido('./app/pequeno.py') == 'X = 1\n'
+    assert not llamadas_mmap
@@ -0,0 +1,104 @@
+"""Filtro previo: tamaño, líneas, líneas largas y código generado no se parsean"""
+
+import pickle
+
+import pytest
+
+from ia.files_to_csv import BYTES_CABECERA_GENERADO, LimitesArchivo
+
+from conftest import escribir_archivo
+
+GENERADO = '''# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: usuarios.proto
+
+class UsuarioMensaje:
+    """Mensaje generado"""
+
+    def SerializeToString(self):
+        return b""
+'''
+
+
+def inspeccionar(limites: LimitesArchivo, texto: str):
+    datos = texto.encode('utf-8')
+    return limites.inspeccionar(datos, len(datos))
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('limites, texto, motivo', [
+    (LimitesArchivo(max_bytes=100), 'x = 1\n' * 20, 'tamano'),
+    (LimitesArchivo(max_lineas=10), 'x = 1\n' * 11, 'lineas'),
+    (LimitesArchivo(max_lineas=10), 'x = 1\n' * 9, None),
+    (LimitesArchivo(), GENERADO, 'generado'),
+    (LimitesArchivo(), '"""Cliente auto-generated por openapi"""\n', 'generado'),
+    (LimitesArchivo(max_longitud_linea=50), 'DATOS = "' + 'a' * 60 + '"\n', 'lineas_largas'),
+    (LimitesArchivo(max_longitud_linea=50), 'DATOS = "' + 'a' * 30 + '"\n', None),
+    (LimitesArchivo(detectar_generados=False, max_longitud_linea=50), GENERADO + 'a' * 60, None),
+    # 0 = sin límite
+    (LimitesArchivo(max_bytes=0, max_lineas=0, max_longitud_linea=0), 'x = 1\n' * 50000, None),
+])
+def test_motivo_del_filtro(limites, texto, motivo):
+    assert inspeccionar(limites, texto) == motivo
+
+
+@pytest.mark.unit
+def test_marca_fuera_de_la_cabecera_no_cuenta():
+    texto = '# comentario\n' * (BYTES_CABECERA_GENERADO // 13 + 1) + '# DO NOT EDIT\n'
+    assert inspeccionar(LimitesArchivo(), texto) is None
+
+
+@pytest.mark.unit
+def test_limites_para_los_workers():
+    limites = LimitesArchivo(max_bytes=10, max_lineas=5, max_longitud_linea=20, omitir=True)
+    copia = pickle.loads(pickle.dumps(limites))
+    assert copia.huella() == limites.huella()
+    assert inspeccionar(copia, 'x = "' + 'a' * 30 + '"') == 'tamano'
+    assert LimitesArchivo(max_lineas=6).huella() != LimitesArchivo(max_lineas=5).huella()
+
+
+@pytest.fixture
+def proyecto_con_filtrados(proyecto):
+    escribir_archivo(proyecto, 'app/usuarios_pb2.py', GENERADO)
+    escribir_archivo(proyecto, 'app/tablas.py', ''.join(
+        f'def tabla_{i}():\n    return {i}\n\n\n' for i in range(30)))
+    return proyecto
+
+
+@pytest.mark.integration
+def test_analisis_superficial(proyecto_con_filtrados, crear_analyzer):
+    analyzer = crear_analyzer(limites=LimitesArchivo(max_lineas=100))
+    registros = [dict(r) for r in analyzer.iterar_proyecto()]
+
+    for ruta, motivo in (('app/usuarios_pb2.py', 'generado'), ('app/tablas.py', 'lineas')):
+        del_archivo = [r for r in registros if r['ruta'] == ruta]
+        assert len(del_archivo) == 1
+        registro = del_archivo[0]
+        assert registro['categoria'] == 'FILE' and registro['tags'].endswith(motivo)
+        assert registro['codigo_limpio'] and registro['archivo_id'] == ''
+    assert analyzer.estadisticas['archivos_filtrados'] == {'generado': 1, 'lineas': 1}
+    # El resto del proyecto se analiza igual
+    assert any(r['elemento'] == 'Usuario' for r in registros)
+
+
+@pytest.mark.integration
+def test_omitir_filtrados(proyecto_con_filtrados, crear_analyzer):
+    analyzer = crear_analyzer(limites=LimitesArchivo(max_lineas=100, omitir=True))
+    registros = [dict(r) for r in analyzer.iterar_proyecto()]
+
+    assert not any(r['ruta'] in ('app/usuarios_pb2.py', 'app/tablas.py') for r in registros)
+    assert analyzer.estadisticas['archivos_filtrados'] == {'generado': 1, 'lineas': 1}
+
+
+@pytest.mark.integration
+def test_incluir_generados(proyecto_con_filtrados, crear_analyzer):
+    analyzer = crear_analyzer(limites=LimitesArchivo(detectar_generados=False))
+    elementos = {r['elemento'] for r in analyzer.iterar_proyecto() if r['ruta'] == 'app/usuarios_pb2.py'}
+    assert 'UsuarioMensaje' in elementos
+
+
+@pytest.mark.integration
+def test_filtrados_con_workers(proyecto_con_filtrados, crear_analyzer):
+    limites = LimitesArchivo(max_lineas=100)
+    en_serie = [dict(r) for r in crear_analyzer(limites=limites).iterar_proyecto()]
+    assert [dict(r) for r in crear_analyzer(limites=limites).iterar_proyecto(workers=2)] == en_serie
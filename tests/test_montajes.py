@@ -0,0 +1,65 @@
+"""Prefixes de include_router: un cambio de montaje re-emite los endpoints del router"""
+
+import pytest
+
+from ia.files_to_csv import CacheAnalisis
+from ia.watch_analisis import EstadoWatch
+
+from conftest import ARCHIVOS_PROYECTO, escribir_archivo
+
+pytestmark = pytest.mark.unit
+
+
+def cambiar_prefijo(proyecto, anterior: str, nuevo: str):
+    contenido = ARCHIVOS_PROYECTO['app/main.py']
+    escribir_archivo(proyecto, 'app/main.py', contenido.replace(f'prefix="{anterior}"', f'prefix="{nuevo}"'))
+
+
+def endpoints_de(registros, ruta: str):
+    return sorted((r['metodo_http'], r['endpoint']) for r in registros
+                  if r['categoria'] == 'ENDPOINT' and r['ruta'] == ruta)
+
+
+def test_prefijo_de_include_router(crear_analyzer):
+    registros = list(crear_analyzer().iterar_proyecto())
+
+    assert endpoints_de(registros, 'app/routers/usuarios.py') == [
+        ('GET', '/usuarios/{usuario_id}'), ('POST', '/usuarios/')
+    ]
+    assert endpoints_de(registros, 'app/routers/productos.py') == [
+        ('DELETE', '/productos/{producto_id}'), ('GET', '/productos/')
+    ]
+
+
+def test_cambio_de_prefijo_con_cache(proyecto, crear_analyzer):
+    analyzer = crear_analyzer()
+    analyzer.escanear_proyecto(cache=CacheAnalisis(version=analyzer.version_analisis()))
+    cambiar_prefijo(proyecto, '/usuarios', '/v2/usuarios')
+
+    analyzer = crear_analyzer()
+    cache = CacheAnalisis(version=analyzer.version_analisis())
+    analyzer.escanear_proyecto(cache=cache)
+
+    # Solo se analiza main.py: el router sale de la cache con el prefix nuevo
+    assert cache.resumen['analizados'] == 1
+    assert endpoints_de(analyzer.registros, 'app/routers/usuarios.py') == [
+        ('GET', '/v2/usuarios/{usuario_id}'), ('POST', '/v2/usuarios/')
+    ]
+    assert endpoints_de(analyzer.registros, 'app/routers/productos.py') == [
+        ('DELETE', '/productos/{producto_id}'), ('GET', '/productos/')
+    ]
+    assert [dict(r) for r in analyzer.registros] == [dict(r) for r in crear_analyzer().iterar_proyecto()]
+
+
+def test_cambio_de_prefijo_en_watch(proyecto, crear_analyzer):
+    estado = EstadoWatch(crear_analyzer())
+    estado.cargar_inicial()
+    cambiar_prefijo(proyecto, '/productos', '/catalogo')
+
+    delta = estado.actualizar({'./app/main.py'})
+
+    assert endpoints_de(delta['modificados'], 'app/routers/productos.py') == [
+        ('DELETE', '/catalogo/{producto_id}'), ('GET', '/catalogo/')
+    ]
+    assert not endpoints_de(delta['modificados'], 'app/routers/usuarios.py')
+    assert not delta['agregados'] and not delta['eliminados']
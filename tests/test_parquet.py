@@ -0,0 +1,92 @@
+"""Salida Parquet: esquema tipado, row groups y pyarrow opcional"""
+
+import pytest
+
+import ia.files_to_csv as files_to_csv
+from ia.files_to_csv import (
+    CAMPOS_BOOLEANOS, CAMPOS_CSV, CAMPOS_ENTEROS, EscritorRegistros, ReportadorProgreso, NIVEL_SILENCIOSO,
+    NIVEL_RESUMEN
+)
+
+from conftest import escribir_archivo
+
+pytestmark = pytest.mark.unit
+
+
+def escribir_salida(carpeta, registros, nivel=NIVEL_SILENCIOSO, parquet=True) -> EscritorRegistros:
+    escritor = EscritorRegistros(str(carpeta / 'documentacion.csv'), str(carpeta / 'analisis.json'),
+                                 archivo_parquet=str(carpeta / 'documentacion.parquet') if parquet else None,
+                                 progreso=ReportadorProgreso(nivel)).abrir()
+    # Un registro por llamada, como si cada uno fuera de un archivo
+    for registro in registros:
+        escritor.escribir([registro])
+    escritor.cerrar({}, {})
+    return escritor
+
+
+@pytest.fixture
+def registros(proyecto, crear_analyzer):
+    escribir_archivo(proyecto, 'app/routers/pedidos.py', '''from fastapi import APIRouter
+
+router = APIRouter(prefix="/pedidos")
+
+
+@router.post("/", status_code=201)
+async def crear_pedido(pedido: dict):
+    """Crea un pedido"""
+    return pedido
+''')
+    return [dict(r) for r in crear_analyzer().iterar_proyecto()]
+
+
+def test_esquema_tipado(proyecto, registros):
+    pq = pytest.importorskip('pyarrow.parquet')
+    pa = pytest.importorskip('pyarrow')
+    escribir_salida(proyecto, registros)
+
+    tabla = pq.read_table(proyecto / 'documentacion.parquet')
+
+    assert tabla.column_names == list(CAMPOS_CSV)
+    for campo in CAMPOS_CSV:
+        esperado = pa.int32() if campo in CAMPOS_ENTEROS else pa.bool_() if campo in CAMPOS_BOOLEANOS \
+            else pa.string()
+        assert tabla.schema.field(campo).type == esperado, campo
+    assert tabla.to_pylist() == registros
+    # status_code queda como texto ('201', no 201.0 como al releer el CSV con pandas)
+    creado = next(r for r in tabla.to_pylist() if r['elemento'] == 'crear_pedido')
+    assert creado['status_code'] == '201' and creado['es_async'] is True
+
+
+def test_row_groups(proyecto, registros, monkeypatch):
+    pq = pytest.importorskip('pyarrow.parquet')
+    monkeypatch.setattr(files_to_csv, 'TAMANO_LOTE_PARQUET', 4)
+    escribir_salida(proyecto, registros)
+
+    archivo = pq.ParquetFile(proyecto / 'documentacion.parquet')
+
+    assert archivo.metadata.num_rows == len(registros)
+    assert archivo.num_row_groups == -(-len(registros) // 4)
+
+
+def test_sin_pyarrow_se_omite_el_parquet(proyecto, registros, monkeypatch, capsys):
+    monkeypatch.setattr(files_to_csv, 'cargar_pyarrow', lambda: False)
+
+    escritor = escribir_salida(proyecto, registros)
+
+    assert escritor.archivo_parquet is None
+    assert not (proyecto / 'documentacion.parquet').exists()
+    assert (proyecto / 'documentacion.csv').exists()
+    # El aviso respeta el nivel del reportador
+    assert capsys.readouterr().out == ''
+
+    escribir_salida(proyecto, registros, nivel=NIVEL_RESUMEN)
+    assert 'pyarrow no está instalado' in capsys.readouterr().out
+
+
+def test_sin_parquet_se_borra_el_anterior(proyecto, registros):
+    pytest.importorskip('pyarrow')
+    escribir_salida(proyecto, registros)
+
+    escribir_salida(proyecto, registros, parquet=False)
+
+    assert not (proyecto / 'documentacion.parquet').exists()
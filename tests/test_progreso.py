@@ -0,0 +1,135 @@
+"""Salida por niveles, barra de progreso con frecuencia limitada y eventos JSONL"""
+
+import io
+import json
+import types
+
+import pytest
+
+import ia.files_to_csv as files_to_csv
+from ia.files_to_csv import (
+    INTERVALO_BARRA,
+    INTERVALO_BARRA_LOG,
+    NIVEL_DETALLADO,
+    NIVEL_RESUMEN,
+    ReportadorProgreso,
+    main,
+)
+
+from conftest import escribir_archivo
+
+
+class Reloj:
+    """perf_counter controlado por el test"""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def perf_counter(self) -> float:
+        return self.ahora
+
+    def time(self) -> float:
+        return self.ahora
+
+
+class TerminalFalsa(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(files_to_csv, 'time', types.SimpleNamespace(perf_counter=reloj.perf_counter,
+                                                                   time=reloj.time))
+    return reloj
+
+
+def avanzar_durante(reportador, reloj, segundos: float, pasos: int):
+    for _ in range(pasos):
+        reloj.ahora += segundos / pasos
+        reportador.avanzar()
+
+
+@pytest.mark.unit
+def test_barra_en_log_una_linea_por_intervalo(reloj, capsys):
+    # Con capsys stderr no es una terminal
+    reportador = ReportadorProgreso(NIVEL_RESUMEN)
+    reportador.iniciar(1000)
+    avanzar_durante(reportador, reloj, INTERVALO_BARRA_LOG * 0.9, 500)
+    assert capsys.readouterr().err == ''
+
+    avanzar_durante(reportador, reloj, INTERVALO_BARRA_LOG * 0.2, 100)
+    reportador.terminar()
+    lineas = capsys.readouterr().err.splitlines()
+    assert len(lineas) == 2 and '\r' not in ''.join(lineas)
+    # Una al cumplirse el intervalo y la final al terminar
+    assert '550/1000' in lineas[0] and '600/1000' in lineas[1]
+
+
+@pytest.mark.unit
+def test_barra_en_terminal_se_redibuja_como_mucho_cada_intervalo(reloj, monkeypatch):
+    terminal = TerminalFalsa()
+    monkeypatch.setattr(files_to_csv.sys, 'stderr', terminal)
+    reportador = ReportadorProgreso(NIVEL_RESUMEN)
+    reportador.iniciar(1000)
+    avanzar_durante(reportador, reloj, INTERVALO_BARRA * 10, 1000)
+
+    dibujos = terminal.getvalue().count('\r⏳')
+    assert 9 <= dibujos <= 10
+    assert '\n' not in terminal.getvalue()
+
+
+@pytest.mark.unit
+def test_sin_barra_en_detallado_ni_silencioso(reloj, capsys):
+    for nivel in (NIVEL_DETALLADO, files_to_csv.NIVEL_SILENCIOSO):
+        reportador = ReportadorProgreso(nivel)
+        reportador.iniciar(10)
+        avanzar_durante(reportador, reloj, INTERVALO_BARRA_LOG * 2, 10)
+        reportador.terminar()
+    assert capsys.readouterr().err == ''
+
+
+@pytest.mark.integration
+def test_silencioso_no_escribe_nada(proyecto, capsys):
+    main(['--sin-cache', '--nivel', 'silencioso'])
+    salida = capsys.readouterr()
+    assert salida.out == '' and salida.err == ''
+
+
+@pytest.mark.integration
+def test_detallado_anade_cada_archivo(proyecto, capsys):
+    main(['--sin-cache', '--nivel', 'resumen'])
+    resumen = capsys.readouterr().out
+    main(['--sin-cache', '--nivel', 'detallado'])
+    detallado = capsys.readouterr().out
+
+    assert 'Total registros' in resumen and 'Total registros' in detallado
+    assert 'Analizando: usuarios.py' not in resumen
+    assert 'Analizando: usuarios.py' in detallado
+    assert set(resumen.splitlines()) <= set(detallado.splitlines()) | {''}
+
+
+@pytest.mark.integration
+def test_eventos_jsonl(proyecto, capsys):
+    escribir_archivo(proyecto, 'app/cliente_pb2.py', '# Generated by the protocol buffer compiler.  DO NOT EDIT!\n')
+    main(['--sin-cache', '--nivel', 'silencioso', '--eventos', 'eventos.jsonl'])
+    with open('eventos.jsonl', encoding='utf-8') as f:
+        eventos = [json.loads(linea) for linea in f]
+
+    assert eventos[0]['evento'] == 'inicio' and eventos[-1]['evento'] == 'fin'
+    archivos = {e['ruta']: e for e in eventos if e['evento'] == 'archivo'}
+    assert set(archivos) == {'app/main.py', 'app/config.py', 'app/models.py', 'app/routers/usuarios.py',
+                             'app/routers/productos.py', 'app/cliente_pb2.py'}
+    assert archivos['app/routers/usuarios.py']['estado'] == 'ok'
+    assert archivos['app/cliente_pb2.py']['estado'] == 'filtrado'
+    assert archivos['app/cliente_pb2.py']['motivo'] == 'generado'
+    assert eventos[-1]['registros'] == sum(e['registros'] for e in archivos.values())
+    assert sum(archivos['app/routers/usuarios.py']['categorias'].values()) == \
+        archivos['app/routers/usuarios.py']['registros']
+    assert capsys.readouterr().out == ''
+
+    # Cada ejecución se añade al final (el log se puede seguir con tail -f)
+    main(['--sin-cache', '--nivel', 'silencioso', '--eventos', 'eventos.jsonl'])
+    with open('eventos.jsonl', encoding='utf-8') as f:
+        assert sum(json.loads(linea)['evento'] == 'inicio' for linea in f) == 2
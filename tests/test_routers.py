@@ -0,0 +1,81 @@
+"""Tabla de routers por archivo: el router de cada línea se busca con bisect"""
+
+import pytest
+
+from ia.files_to_csv import TablaRouters
+
+pytestmark = pytest.mark.unit
+
+CONTENIDO = '''from fastapi import APIRouter
+
+usuarios = APIRouter(prefix="/usuarios", tags=["usuarios"])
+
+
+@usuarios.get("/")
+def listar():
+    return []
+
+
+admin = APIRouter(
+    prefix="/admin",
+    tags=["admin", "interno"],
+)
+
+
+@admin.get("/estado")
+def estado():
+    return {}
+
+app.include_router(admin, prefix="/v1")
+'''
+
+
+def linea_de(texto: str) -> int:
+    """Línea (0-based) de la primera aparición de texto"""
+    return CONTENIDO[:CONTENIDO.index(texto)].count('\n')
+
+
+def router_lineal(tabla: TablaRouters, linea_actual: int):
+    """Referencia: recorrer las declaraciones hasta la línea"""
+    cercano = None
+    for router, fin in zip(tabla.routers, tabla.lineas_fin):
+        if fin < linea_actual and (cercano is None or router['linea'] > cercano['linea']):
+            cercano = router
+    return cercano
+
+
+def test_declaraciones_ordenadas():
+    tabla = TablaRouters(CONTENIDO)
+
+    assert [(r['nombre'], r['prefix'], r['tags']) for r in tabla.routers] == [
+        ('usuarios', '/usuarios', ['usuarios']),
+        ('admin', '/admin', ['admin', 'interno']),
+    ]
+    assert tabla.prefijos_include == {'admin': ['/v1']}
+
+
+def test_router_de_cada_linea():
+    tabla = TablaRouters(CONTENIDO)
+
+    assert tabla.router_en_linea(0) is None
+    assert tabla.router_en_linea(linea_de('@usuarios.get'))['nombre'] == 'usuarios'
+    # Dentro de la declaración multilínea todavía vale el router anterior
+    assert tabla.router_en_linea(linea_de('tags=["admin"'))['nombre'] == 'usuarios'
+    assert tabla.router_en_linea(linea_de('@admin.get'))['nombre'] == 'admin'
+    for linea in range(CONTENIDO.count('\n') + 1):
+        assert tabla.router_en_linea(linea) == router_lineal(tabla, linea)
+
+
+def test_prefix_con_include_router_del_mismo_archivo(crear_analyzer):
+    analyzer = crear_analyzer()
+
+    info = analyzer.detectar_router_y_prefix(CONTENIDO, linea_de('@admin.get'))
+
+    assert info == {'router_name': 'admin', 'prefix': '/v1/admin', 'tags': ['admin', 'interno']}
+
+
+def test_sin_routers():
+    tabla = TablaRouters('def f():\n    return 1\n')
+
+    assert tabla.routers == []
+    assert tabla.router_en_linea(5) is None
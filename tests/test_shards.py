@@ -0,0 +1,46 @@
+"""--shard i/N y --merge: la salida combinada es la del escaneo completo"""
+
+import glob
+
+import pytest
+
+from ia.files_to_csv import ARCHIVO_SALIDA_CSV, CARPETA_SHARDS, main
+
+pytestmark = pytest.mark.integration
+
+
+def ejecutar(*argumentos: str):
+    main(['--nivel', 'silencioso', *argumentos])
+
+
+def leer_csv() -> bytes:
+    with open(ARCHIVO_SALIDA_CSV, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('total', [2, 3])
+def test_merge_igual_al_escaneo_completo(proyecto, total):
+    ejecutar('--sin-cache')
+    completo = leer_csv()
+
+    for indice in range(total):
+        ejecutar('--shard', f'{indice}/{total}', '--sin-cache')
+    ejecutar('--merge', *sorted(glob.glob(f'{CARPETA_SHARDS}/shard_*_de_{total}.jsonl')))
+
+    assert leer_csv() == completo
+
+
+def test_merge_con_shards_de_otros_limites(proyecto):
+    ejecutar('--shard', '0/2', '--sin-cache')
+    ejecutar('--shard', '1/2', '--sin-cache', '--limite-lineas', '10')
+
+    with pytest.raises(SystemExit, match='No se pueden combinar los shards'):
+        ejecutar('--merge', *sorted(glob.glob(f'{CARPETA_SHARDS}/shard_*_de_2.jsonl')))
+
+
+def test_merge_con_otros_limites_que_los_shards(proyecto):
+    ejecutar('--shard', '0/2', '--sin-cache')
+    ejecutar('--shard', '1/2', '--sin-cache')
+
+    with pytest.raises(SystemExit, match='otra versión del analyzer'):
+        ejecutar('--merge', *sorted(glob.glob(f'{CARPETA_SHARDS}/shard_*_de_2.jsonl')), '--limite-lineas', '10')
@@ -0,0 +1,109 @@
+"""--snapshot-fuentes: el código se lee del snapshot por archivo_id/offset/longitud"""
+
+import json
+
+import pytest
+
+from ia.files_to_csv import (
+    EscritorRegistros,
+    LectorFuentes,
+    NIVEL_SILENCIOSO,
+    ReportadorProgreso,
+    SnapshotFuentes,
+    hash_texto,
+)
+
+from conftest import escribir_archivo
+
+pytestmark = pytest.mark.integration
+
+# Registros cuyo codigo_limpio es el fuente tal cual (config y file guardan
+# un resumen o una vista previa, su índice apunta a las líneas originales)
+TIPOS_CON_CODIGO = ('route', 'function', 'class')
+
+
+def escribir_con_snapshot(carpeta, analyzer, registros, avisos):
+    snapshot = SnapshotFuentes(analyzer.leer_contenido, str(carpeta / 'fuentes.snapshot'),
+                               str(carpeta / 'fuentes.indice.json'), avisar=avisos.append)
+    escritor = EscritorRegistros(str(carpeta / 'documentacion.csv'), str(carpeta / 'analisis.json'),
+                                 snapshot=snapshot, progreso=ReportadorProgreso(NIVEL_SILENCIOSO)).abrir()
+    escritor.escribir(registros)
+    escritor.cerrar(analyzer.estadisticas_serializables(), analyzer.metadatos_salida(escritor.total))
+    with open(carpeta / 'analisis.json', encoding='utf-8') as f:
+        return json.load(f)['registros']
+
+
+def abrir_lector(carpeta) -> LectorFuentes:
+    return LectorFuentes(str(carpeta / 'fuentes.snapshot'), str(carpeta / 'fuentes.indice.json'))
+
+
+def test_el_indice_apunta_al_fuente(proyecto, crear_analyzer):
+    analyzer = crear_analyzer()
+    completos = [dict(r) for r in analyzer.iterar_proyecto()]
+    avisos = []
+    escritos = escribir_con_snapshot(proyecto, analyzer, completos, avisos)
+
+    assert avisos == []
+    assert len(escritos) == len(completos)
+    referenciados = [r for r in escritos if r['longitud_codigo']]
+    assert referenciados and all(r['codigo_limpio'] == '' for r in referenciados)
+
+    lector = abrir_lector(proyecto)
+    try:
+        for escrito, completo in zip(escritos, completos):
+            # El resto del registro no cambia
+            assert dict(escrito, codigo_limpio='') == dict(completo, codigo_limpio='')
+            if not escrito['longitud_codigo']:
+                continue
+            codigo = lector.codigo_de(escrito)
+            # El índice apunta a las líneas del fuente, con su hash
+            datos = (proyecto / escrito['ruta']).read_bytes()
+            fragmento = datos[escrito['offset_codigo']:escrito['offset_codigo'] + escrito['longitud_codigo']]
+            assert codigo == fragmento.decode('utf-8')
+            assert hash_texto(fragmento) == escrito['hash_codigo']
+            if escrito['tipo'] in TIPOS_CON_CODIGO:
+                assert codigo.rstrip('\n') == completo['codigo_limpio'].rstrip('\n')
+    finally:
+        lector.cerrar()
+
+
+def test_archivos_iguales_se_guardan_una_vez(proyecto, crear_analyzer):
+    contenido = (proyecto / 'app/models.py').read_text(encoding='utf-8')
+    escribir_archivo(proyecto, 'app/copia_models.py', contenido)
+    analyzer = crear_analyzer()
+    escribir_con_snapshot(proyecto, analyzer, [dict(r) for r in analyzer.iterar_proyecto()], [])
+
+    with open(proyecto / 'fuentes.indice.json', encoding='utf-8') as f:
+        archivos = json.load(f)['archivos']
+    rutas = [sorted(archivo['rutas']) for archivo in archivos.values()]
+    assert ['app/copia_models.py', 'app/models.py'] in rutas
+    assert (proyecto / 'fuentes.snapshot').stat().st_size == sum(a['longitud'] for a in archivos.values())
+
+
+def test_archivo_modificado_tras_el_analisis_conserva_su_codigo(proyecto, crear_analyzer):
+    analyzer = crear_analyzer()
+    completos = [dict(r) for r in analyzer.iterar_proyecto()]
+    escribir_archivo(proyecto, 'app/models.py', '# reescrito tras el análisis\n')
+    avisos = []
+    escritos = escribir_con_snapshot(proyecto, analyzer, completos, avisos)
+
+    assert any('app/models.py cambió desde su análisis' in aviso for aviso in avisos)
+    for escrito, completo in zip(escritos, completos):
+        if completo['ruta'].endswith('models.py') and completo['longitud_codigo']:
+            assert escrito['codigo_limpio'] == completo['codigo_limpio']
+    with open(proyecto / 'fuentes.indice.json', encoding='utf-8') as f:
+        assert all('app/models.py' not in a['rutas'] for a in json.load(f)['archivos'].values())
+
+
+def test_rangos_fuera_del_archivo(proyecto, crear_analyzer):
+    analyzer = crear_analyzer()
+    escritos = escribir_con_snapshot(proyecto, analyzer, [dict(r) for r in analyzer.iterar_proyecto()], [])
+    registro = next(r for r in escritos if r['longitud_codigo'])
+    lector = abrir_lector(proyecto)
+    try:
+        longitud = lector.archivos[registro['archivo_id']]['longitud']
+        assert lector.codigo(registro['archivo_id'], longitud - 1, 2) == ''
+        assert lector.codigo('no-existe', 0, 1) == ''
+        assert lector.codigo(registro['archivo_id'], 0, 10, limite=3).endswith('... (truncado)')
+    finally:
+        lector.cerrar()
@@ -0,0 +1,145 @@
+"""Modo watch: detección de cambios (inotify y polling) y delta por guardado"""
+
+import json
+import socket
+import threading
+
+import pytest
+
+from ia.watch_analisis import (
+    EmisorCambios, EstadoWatch, ObservadorInotify, ObservadorPolling, crear_observador
+)
+
+from conftest import ARCHIVOS_PROYECTO, escribir_archivo
+
+pytestmark = pytest.mark.integration
+
+
+def crear_inotify(carpeta):
+    try:
+        return ObservadorInotify(carpeta)
+    except (OSError, AttributeError) as e:
+        pytest.skip(f"inotify no disponible: {e}")
+
+
+@pytest.fixture(params=['polling', 'inotify'])
+def observador(request, proyecto):
+    if request.param == 'polling':
+        observador = ObservadorPolling('./app', intervalo=0.05)
+    else:
+        observador = crear_inotify('./app')
+    yield observador
+    observador.cerrar()
+
+
+def esperar(observador, ruta: str, intentos: int = 20) -> set:
+    """Cambios acumulados hasta que aparece ruta (o se agotan los intentos)"""
+    cambiados = set()
+    for _ in range(intentos):
+        cambiados |= observador.esperar_cambios(timeout=0.1)
+        if ruta in cambiados:
+            break
+    return cambiados
+
+
+def test_detecta_modificacion(observador, proyecto):
+    escribir_archivo(proyecto, 'app/models.py', ARCHIVOS_PROYECTO['app/models.py'] + '\nX = 1\n')
+
+    assert './app/models.py' in esperar(observador, './app/models.py')
+
+
+def test_detecta_borrado(observador, proyecto):
+    (proyecto / 'app/config.py').unlink()
+
+    assert './app/config.py' in esperar(observador, './app/config.py')
+
+
+def test_detecta_archivos_en_carpetas_nuevas(observador, proyecto):
+    (proyecto / 'app/nuevos').mkdir()
+    # inotify empieza a observar la carpeta al ver su creación
+    observador.esperar_cambios(timeout=0.2)
+    escribir_archivo(proyecto, 'app/nuevos/servicio.py', 'def servicio():\n    return 1\n')
+
+    assert './app/nuevos/servicio.py' in esperar(observador, './app/nuevos/servicio.py')
+
+
+def test_ignora_carpetas_excluidas(observador, proyecto):
+    escribir_archivo(proyecto, 'app/__pycache__/models.py', 'X = 1\n')
+    escribir_archivo(proyecto, 'app/models.py', ARCHIVOS_PROYECTO['app/models.py'] + '\nY = 2\n')
+
+    cambiados = esperar(observador, './app/models.py')
+
+    assert not any('__pycache__' in ruta for ruta in cambiados)
+
+
+def test_forzar_polling(proyecto):
+    assert isinstance(crear_observador('./app', forzar_polling=True), ObservadorPolling)
+
+
+def claves(registros):
+    return sorted((r['ruta'], r['elemento']) for r in registros)
+
+
+def test_delta_de_un_guardado(proyecto, crear_analyzer):
+    estado = EstadoWatch(crear_analyzer())
+    estado.cargar_inicial()
+    contenido = ARCHIVOS_PROYECTO['app/routers/productos.py']
+    escribir_archivo(proyecto, 'app/routers/productos.py',
+                     contenido.replace('Lista los productos', 'Productos del catálogo') + '''
+
+def precio_con_iva(precio: float) -> float:
+    """Precio final"""
+    return precio * 1.21
+''')
+
+    delta = estado.actualizar({'./app/routers/productos.py'})
+
+    assert claves(delta['agregados']) == [('app/routers/productos.py', 'precio_con_iva')]
+    assert claves(delta['modificados']) == [('app/routers/productos.py', 'listar_productos')]
+    assert delta['eliminados'] == []
+
+
+def test_delta_de_un_borrado(proyecto, crear_analyzer):
+    estado = EstadoWatch(crear_analyzer())
+    estado.cargar_inicial()
+    (proyecto / 'app/models.py').unlink()
+
+    delta = estado.actualizar({'./app/models.py'})
+
+    assert sorted(clave[2] for clave in delta['eliminados']) == ['Producto', 'Usuario']
+    assert not delta['agregados'] and not delta['modificados']
+
+
+def test_sin_cambios_no_hay_delta(crear_analyzer):
+    estado = EstadoWatch(crear_analyzer())
+    estado.cargar_inicial()
+
+    assert not any(estado.actualizar({'./app/models.py'}).values())
+
+
+def test_emisor_escribe_jsonl_y_socket(proyecto):
+    ruta_socket = str(proyecto / 'cambios.sock')
+    servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    servidor.bind(ruta_socket)
+    servidor.listen(1)
+    recibido = []
+
+    def recibir():
+        conexion, _ = servidor.accept()
+        with conexion:
+            recibido.append(conexion.makefile('r', encoding='utf-8').readline())
+
+    hilo = threading.Thread(target=recibir)
+    hilo.start()
+    emisor = EmisorCambios('datasets/cambios.jsonl', ruta_socket, avisar=lambda mensaje: None)
+    try:
+        emisor.emitir({'agregados': [], 'eliminados': [['app/x.py', 'FUNCTION', 'f', '']],
+                       'modificados': [], 'reubicados': []})
+    finally:
+        emisor.cerrar()
+        hilo.join(timeout=5)
+        servidor.close()
+
+    linea = (proyecto / 'datasets/cambios.jsonl').read_text(encoding='utf-8').splitlines()[0]
+    assert json.loads(linea)['eliminados'] == [['app/x.py', 'FUNCTION', 'f', '']]
+    assert recibido and json.loads(recibido[0]) == json.loads(linea)
@@ -0,0 +1,53 @@
+"""--workers: mismos registros y en el mismo orden que el escaneo en serie"""
+
+import pytest
+
+from ia.files_to_csv import CacheAnalisis
+
+from conftest import escribir_archivo
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def proyecto_grande(proyecto):
+    """Más archivos que workers, para que el pool termine fuera de orden"""
+    for numero in range(12):
+        escribir_archivo(proyecto, f'app/servicios/servicio_{numero}.py', ''.join(
+            f'''
+
+def tarea_{numero}_{i}(valor: int) -> int:
+    """Tarea {i} del servicio {numero}"""
+    return valor * {i}
+''' for i in range(numero * 3 + 1)))
+    return proyecto
+
+
+def registros_de(analyzer):
+    return [dict(r) for r in analyzer.registros]
+
+
+@pytest.mark.parametrize('workers', [2, 4])
+def test_escaneo_en_paralelo_igual_al_serie(proyecto_grande, crear_analyzer, workers):
+    serie = crear_analyzer()
+    serie.escanear_proyecto()
+    paralelo = crear_analyzer()
+    paralelo.escanear_proyecto(workers=workers)
+
+    assert registros_de(paralelo) == registros_de(serie)
+    assert paralelo.estadisticas['total_archivos'] == serie.estadisticas['total_archivos']
+
+
+def test_iterar_en_paralelo_igual_al_serie(proyecto_grande, crear_analyzer):
+    serie = [dict(r) for r in crear_analyzer().iterar_proyecto()]
+
+    assert [dict(r) for r in crear_analyzer().iterar_proyecto(workers=3)] == serie
+
+
+def test_paralelo_con_cache(proyecto_grande, crear_analyzer):
+    serie = crear_analyzer()
+    serie.escanear_proyecto()
+    paralelo = crear_analyzer()
+    paralelo.escanear_proyecto(workers=3, cache=CacheAnalisis(version=paralelo.version_analisis()))
+
+    assert registros_de(paralelo) == registros_de(serie)